@@ -26,9 +26,23 @@
 param(
     [switch]$EnableSCCM = $true,
     [switch]$EnableWindowsUpdate = $true,
+    [int]$SearchCacheMaxAge = 0,
+    [ValidateSet("", "Software", "Driver")]
+    [string]$UpdateType = "",
+    [string]$CategoryIDs = "",
+    [ValidateRange(-1, 1)]
+    [int]$BrowseOnly = -1,
+    [switch]$OfflineSearch = $false,
+    [int]$WindowsUpdateTimeBudget = 0,
+    [int]$SCCMTimeBudget = 0,
+    [int]$FullSnapshotInterval = 0,
+    [switch]$Concurrent = $true,
     [switch]$Debug = $false
 )
 
+# Version of the section format: tab separated columns, announced in the first section line
+$SectionFormatVersion = 2
+
 function Write-Debug-Info {
     param([string]$Message)
     if ($Debug) {
@@ -36,202 +50,756 @@ function Write-Debug-Info {
     }
 }
 
+function Get-StateDirectory {
+    if ($env:MK_STATEDIR) {
+        return $env:MK_STATEDIR
+    }
+    return [System.IO.Path]::GetTempPath()
+}
+
+function ConvertTo-AgentTimestamp {
+    param($Value)
+    if ($Value -is [datetime]) {
+        return $Value.ToUniversalTime().ToString("yyyy-MM-ddTHH:mm:ssZ", [cultureinfo]::InvariantCulture)
+    }
+    return [string]$Value
+}
+
+function Add-UpdateLine {
+    # Formats one update as tab separated UPDATE line in the reused buffer $Line and appends it
+    # to $Lines. Free text must not contain the separator or line breaks.
+    param(
+        [System.Collections.Generic.List[string]]$Lines,
+        [System.Text.StringBuilder]$Line,
+        [string]$Source,
+        [string]$Title,
+        [string]$KB,
+        [string]$Severity,
+        [string]$Categories,
+        $Size,
+        $IsDownloaded,
+        $RebootRequired,
+        $EvaluationState,
+        $Deadline,
+        $ComplianceState
+    )
+
+    $Title = $Title.Replace("`t", " ").Replace("`r", " ").Replace("`n", " ")
+    [void]$Line.Clear().Append("UPDATE`t").Append($Source).Append("`t").Append($Title)
+    if ($KB) {
+        [void]$Line.Append("`tKB:").Append($KB)
+    }
+    if ($Severity) {
+        [void]$Line.Append("`tSEVERITY:").Append($Severity)
+    }
+    if ($Categories) {
+        [void]$Line.Append("`tCATEGORIES:").Append($Categories.Replace("`t", " "))
+    }
+    # Size in MB for readability
+    if ($Size -and $Size -gt 0) {
+        $sizeMB = [math]::Round($Size / 1MB, 2)
+        [void]$Line.Append("`tSIZE:").Append($sizeMB.ToString([cultureinfo]::InvariantCulture)).Append("MB")
+    }
+    if ($null -ne $IsDownloaded) {
+        [void]$Line.Append("`tDOWNLOADED:").Append([string]$IsDownloaded)
+    }
+    if ($null -ne $RebootRequired) {
+        [void]$Line.Append("`tREBOOT:").Append([string]$RebootRequired)
+    }
+    # SCCM-specific information
+    if ($EvaluationState) {
+        [void]$Line.Append("`tEVAL_STATE:").Append([string]$EvaluationState)
+    }
+    if ($Deadline) {
+        [void]$Line.Append("`tDEADLINE:").Append((ConvertTo-AgentTimestamp $Deadline))
+    }
+    if ($ComplianceState) {
+        [void]$Line.Append("`tCOMPLIANCE:").Append([string]$ComplianceState)
+    }
+    $Lines.Add($Line.ToString())
+}
+
+function Get-WindowsUpdateMarkers {
+    # Windows Update records its last successful detection and installation. If neither
+    # changed, a new search would return the same result as the cached one.
+    $resultsKey = "HKLM:\SOFTWARE\Microsoft\Windows\CurrentVersion\WindowsUpdate\Auto Update\Results"
+    $lastDetect = (Get-ItemProperty -Path "$resultsKey\Detect" -Name "LastSuccessTime" -ErrorAction SilentlyContinue).LastSuccessTime
+    $lastInstall = (Get-ItemProperty -Path "$resultsKey\Install" -Name "LastSuccessTime" -ErrorAction SilentlyContinue).LastSuccessTime
+
+    # Newer Windows versions no longer maintain these registry values
+    if (-not $lastDetect -and -not $lastInstall) {
+        try {
+            $autoUpdateResults = (New-Object -ComObject Microsoft.Update.AutoUpdate).Results
+            $lastDetect = $autoUpdateResults.LastSearchSuccessDate
+            $lastInstall = $autoUpdateResults.LastInstallationSuccessDate
+        }
+        catch {
+            Write-Debug-Info "Error getting Windows Update markers: $($_.Exception.Message)"
+        }
+    }
+
+    return "$lastDetect|$lastInstall"
+}
+
+function Read-WindowsUpdateCache {
+    param([string]$Path, [string]$Markers)
+
+    if (-not (Test-Path -LiteralPath $Path)) {
+        return $null
+    }
+    try {
+        $cache = Get-Content -LiteralPath $Path -Raw | ConvertFrom-Json
+    }
+    catch {
+        Write-Debug-Info "Ignoring unreadable Windows Update cache: $($_.Exception.Message)"
+        return $null
+    }
+
+    if ($cache.Format -ne $SectionFormatVersion -or $null -eq $cache.Lines) {
+        return $null
+    }
+    $age = [DateTimeOffset]::UtcNow.ToUnixTimeSeconds() - [int64]$cache.Timestamp
+    if ($cache.Markers -ne $Markers -or $age -lt 0 -or $age -ge $SearchCacheMaxAge) {
+        Write-Debug-Info "Windows Update cache outdated (age: ${age}s)"
+        return $null
+    }
+    return $cache
+}
+
+function Write-WindowsUpdateCache {
+    param([string]$Path, [string]$Markers, [string[]]$Lines)
+
+    $cache = [PSCustomObject]@{
+        Format = $SectionFormatVersion
+        Markers = $Markers
+        Timestamp = [DateTimeOffset]::UtcNow.ToUnixTimeSeconds()
+        Lines = @($Lines)
+    }
+    try {
+        $cache | ConvertTo-Json -Depth 2 -Compress | Set-Content -LiteralPath $Path -Encoding UTF8
+    }
+    catch {
+        Write-Debug-Info "Error writing Windows Update cache: $($_.Exception.Message)"
+    }
+}
+
+function Get-WindowsUpdateSearchCriteria {
+    # Restricts the search to what is monitored, so Windows Update does not enumerate updates
+    # that are ignored later on anyway. $CategoryIDs is a comma separated list of category
+    # GUIDs, of which an update has to be in at least one.
+    $criteria = "IsInstalled=0 and IsHidden=0"
+    if ($UpdateType) {
+        $criteria += " and Type='$UpdateType'"
+    }
+    if ($BrowseOnly -ge 0) {
+        $criteria += " and BrowseOnly=$BrowseOnly"
+    }
+
+    $categories = @($CategoryIDs -split "," | ForEach-Object { $_.Trim() } | Where-Object { $_ -match '^[0-9a-fA-F-]+$' })
+    if ($categories.Count -gt 0) {
+        # The criteria language only allows OR between complete AND terms
+        $criteria = ($categories | ForEach-Object { "($criteria and CategoryIDs contains '$_')" }) -join " or "
+    }
+    return $criteria
+}
+
+function Invoke-WindowsUpdateSearch {
+    param([string]$Criteria)
+
+
+    $lines = [System.Collections.Generic.List[string]]::new()
+    $line = [System.Text.StringBuilder]::new(512)
+    $categoryNames = [System.Collections.Generic.List[string]]::new()
+
+    $UpdateSession = New-Object -ComObject Microsoft.Update.Session
+    $UpdateSearcher = $UpdateSession.CreateUpdateSearcher()
+    if ($OfflineSearch) {
+        # Only evaluate the update metadata already on the host, without contacting the server
+        $UpdateSearcher.Online = $false
+    }
+    $SearchResults = $UpdateSearcher.Search($Criteria)
+
+    # Read every COM property once and format the update line right away
+    $searchUpdates = $SearchResults.Updates
+    for ($index = 0; $index -lt $searchUpdates.Count; $index++) {
+        $Update = $searchUpdates.Item($index)
+
+        $kbArticleIds = $Update.KBArticleIDs
+        $kb = ""
+        if ($kbArticleIds.Count -gt 0) {
+            $kb = "KB" + ($kbArticleIds -join ",KB")
+        }
+
+        $categoryNames.Clear()
+        $categories = $Update.Categories
+        for ($categoryIndex = 0; $categoryIndex -lt $categories.Count; $categoryIndex++) {
+            $categoryNames.Add($categories.Item($categoryIndex).Name)
+        }
+
+        Add-UpdateLine -Lines $lines -Line $line -Source "WindowsUpdate" -Title $Update.Title `
+            -KB $kb -Severity $Update.MsrcSeverity -Categories ($categoryNames -join ", ") `
+            -Size $Update.MaxDownloadSize -IsDownloaded $Update.IsDownloaded `
+            -RebootRequired $Update.RebootRequired
+    }
+
+    return ,$lines
+}
+
 function Get-WindowsUpdates {
     Write-Debug-Info "Checking Windows Updates..."
-    $updates = @()
+    # Timestamp: when the data was collected, which is older than this run for a cached result
+    $data = [PSCustomObject]@{
+        Status = "ok"
+        Timestamp = [DateTimeOffset]::UtcNow.ToUnixTimeSeconds()
+        Lines = @()
+        Runtime = 0.0
+    }
+    $stopwatch = [System.Diagnostics.Stopwatch]::StartNew()
     
     try {
-        $UpdateSession = New-Object -ComObject Microsoft.Update.Session
-        $UpdateSearcher = $UpdateSession.CreateUpdateSearcher()
-        $SearchResults = $UpdateSearcher.Search("IsInstalled=0 and IsHidden=0")
-        
-        foreach ($Update in $SearchResults.Updates) {
-            $updates += [PSCustomObject]@{
-                Title = $Update.Title
-                Source = "WindowsUpdate"
-                KB = if ($Update.KBArticleIDs.Count -gt 0) { "KB" + ($Update.KBArticleIDs -join ",KB") } else { "" }
-                Severity = $Update.MsrcSeverity
-                Categories = ($Update.Categories | ForEach-Object { $_.Name }) -join ", "
-                Size = $Update.MaxDownloadSize
-                IsDownloaded = $Update.IsDownloaded
-                RebootRequired = $Update.RebootRequired
+        # The full search is expensive. With a cache age configured, reuse the last result
+        # as long as Windows Update did not detect or install anything in the meantime.
+        $criteria = Get-WindowsUpdateSearchCriteria
+        Write-Debug-Info "Windows Update search criteria: $criteria"
+
+        $cache = $null
+        if ($SearchCacheMaxAge -gt 0) {
+            $cacheFile = Join-Path (Get-StateDirectory) "ms_win_update_v2_wu_cache.json"
+            # A cached result is only valid for the same search scope
+            $markers = "$(Get-WindowsUpdateMarkers)|$criteria|Online=$(-not $OfflineSearch)"
+            $cache = Read-WindowsUpdateCache -Path $cacheFile -Markers $markers
+        }
+
+        if ($null -ne $cache) {
+            $data.Lines = @($cache.Lines)
+            $data.Timestamp = [int64]$cache.Timestamp
+            Write-Debug-Info "Using $($data.Lines.Count) cached Windows Updates"
+        }
+        else {
+            $data.Lines = Invoke-WindowsUpdateSearch -Criteria $criteria
+
+            if ($SearchCacheMaxAge -gt 0) {
+                Write-WindowsUpdateCache -Path $cacheFile -Markers $markers -Lines $data.Lines
             }
+            Write-Debug-Info "Found $($data.Lines.Count) Windows Updates"
         }
-        Write-Debug-Info "Found $($updates.Count) Windows Updates"
     }
     catch {
         Write-Debug-Info "Error getting Windows Updates: $($_.Exception.Message)"
+        # Without this, a failing search would look like no pending updates
+        $data.Status = "error"
     }
     
-    return $updates
+    $data.Runtime = $stopwatch.Elapsed.TotalSeconds
+    return $data
+}
+
+function Invoke-SCCMQuery {
+    param(
+        [Microsoft.Management.Infrastructure.CimSession]$CimSession,
+        [string]$Namespace,
+        [string]$ClassName,
+        [string]$Filter,
+        [string[]]$Property,
+        [System.Collections.IDictionary]$Durations
+    )
+
+    $query = @{
+        CimSession = $CimSession
+        Namespace = $Namespace
+        ClassName = $ClassName
+        Property = $Property
+        ErrorAction = "Stop"
+    }
+    if ($Filter) {
+        $query["Filter"] = $Filter
+    }
+
+    $stopwatch = [System.Diagnostics.Stopwatch]::StartNew()
+    try {
+        return Get-CimInstance @query
+    }
+    finally {
+        $stopwatch.Stop()
+        $Durations[$ClassName] = $stopwatch.Elapsed.TotalSeconds
+        Write-Debug-Info "Query of $ClassName took $($stopwatch.Elapsed.TotalSeconds)s"
+    }
 }
 
 function Get-SCCMUpdates {
+    param(
+        [Microsoft.Management.Infrastructure.CimSession]$CimSession,
+        [System.Collections.IDictionary]$Durations
+    )
+
     Write-Debug-Info "Checking SCCM Updates..."
-    $updates = @()
+    $lines = [System.Collections.Generic.List[string]]::new()
+    $line = [System.Text.StringBuilder]::new(512)
     
     try {
-        # Check if SCCM client is installed and running
-        $sccmClient = Get-Service -Name "CcmExec" -ErrorAction SilentlyContinue
-        if (-not $sccmClient -or $sccmClient.Status -ne "Running") {
-            Write-Debug-Info "SCCM client not found or not running"
-            return $updates
-        }
-
-        # Get SCCM updates using WMI
-        $sccmUpdates = Get-WmiObject -Namespace "ROOT\ccm\ClientSDK" -Class "CCM_SoftwareUpdate" -ErrorAction SilentlyContinue
-        
-        if ($sccmUpdates) {
-            foreach ($Update in $sccmUpdates) {
-                # Only include updates that are not installed
-                if ($Update.EvaluationState -ne 3) {  # 3 = Installed
-                    $updates += [PSCustomObject]@{
-                        Title = $Update.Name
-                        Source = "SCCM"
-                        KB = $Update.ArticleID
-                        Severity = $Update.Severity
-                        Categories = $Update.UpdateClassification
-                        Size = $Update.ContentSize
-                        IsDownloaded = $Update.EvaluationState -eq 6  # 6 = Downloaded
-                        RebootRequired = $Update.RebootRequired
-                        EvaluationState = $Update.EvaluationState
-                        Deadline = $Update.Deadline
-                        ComplianceState = $Update.ComplianceState
-                    }
-                }
-            }
+        # Only updates that are not installed (EvaluationState 3 = Installed)
+        $sccmUpdates = Invoke-SCCMQuery -CimSession $CimSession -Durations $Durations `
+            -Namespace "ROOT\ccm\ClientSDK" -ClassName "CCM_SoftwareUpdate" `
+            -Filter "EvaluationState <> 3" `
+            -Property "Name", "ArticleID", "ContentSize", "EvaluationState", "Deadline", "ComplianceState"
+
+        foreach ($Update in $sccmUpdates) {
+            # EvaluationState 6 = Downloaded
+            $evaluationState = $Update.EvaluationState
+            Add-UpdateLine -Lines $lines -Line $line -Source "SCCM" -Title $Update.Name `
+                -KB $Update.ArticleID -Size $Update.ContentSize `
+                -IsDownloaded ($evaluationState -eq 6) `
+                -EvaluationState $evaluationState -Deadline $Update.Deadline `
+                -ComplianceState $Update.ComplianceState
         }
-        
-        # Also check for SCCM Software Update assignments
-        $updateAssignments = Get-WmiObject -Namespace "ROOT\ccm\Policy\Machine\ActualConfig" -Class "CCM_UpdateStatus" -ErrorAction SilentlyContinue
-        
-        Write-Debug-Info "Found $($updates.Count) SCCM Updates"
+        Write-Debug-Info "Found $($lines.Count) SCCM Updates"
     }
     catch {
         Write-Debug-Info "Error getting SCCM Updates: $($_.Exception.Message)"
+        return $null
     }
     
-    return $updates
+    return ,$lines
 }
 
 function Get-SCCMClientInfo {
+    param(
+        [Microsoft.Management.Infrastructure.CimSession]$CimSession,
+        [System.Collections.IDictionary]$Durations
+    )
+
+    $clientVersion = ""
+    $lastPolicyUpdate = ""
+    $complete = $true
+
     try {
-        $sccmClient = Get-Service -Name "CcmExec" -ErrorAction SilentlyContinue
-        $clientVersion = ""
-        $lastPolicyUpdate = ""
-        
-        if ($sccmClient) {
-            try {
-                $clientInfo = Get-WmiObject -Namespace "ROOT\ccm" -Class "CCM_InstalledComponent" -Filter "DisplayName='Configuration Manager Client'" -ErrorAction SilentlyContinue
-                if ($clientInfo) {
-                    $clientVersion = $clientInfo.Version
-                }
-                
-                $policyInfo = Get-WmiObject -Namespace "ROOT\ccm\Policy\Machine" -Class "CCM_PolicyAgent_Configuration" -ErrorAction SilentlyContinue
-                if ($policyInfo) {
-                    $lastPolicyUpdate = $policyInfo.LastUpdateTime
-                }
+        $clientInfo = Invoke-SCCMQuery -CimSession $CimSession -Durations $Durations `
+            -Namespace "ROOT\ccm" -ClassName "CCM_InstalledComponent" `
+            -Filter "DisplayName='Configuration Manager Client'" -Property "Version"
+        if ($clientInfo) {
+            $clientVersion = @($clientInfo)[0].Version
+        }
+    }
+    catch {
+        Write-Debug-Info "Error getting SCCM client version: $($_.Exception.Message)"
+        $complete = $false
+    }
+
+    try {
+        $policyInfo = Invoke-SCCMQuery -CimSession $CimSession -Durations $Durations `
+            -Namespace "ROOT\ccm\Policy\Machine" -ClassName "CCM_PolicyAgent_Configuration" `
+            -Property "LastUpdateTime"
+        if ($policyInfo) {
+            $lastPolicyUpdate = ConvertTo-AgentTimestamp @($policyInfo)[0].LastUpdateTime
+        }
+    }
+    catch {
+        Write-Debug-Info "Error getting SCCM policy details: $($_.Exception.Message)"
+        $complete = $false
+    }
+
+    return [PSCustomObject]@{
+        Version = $clientVersion
+        LastPolicyUpdate = $lastPolicyUpdate
+        Complete = $complete
+    }
+}
+
+function Get-SCCMData {
+    # Status "partial" if some of the SCCM queries failed
+    $data = [PSCustomObject]@{
+        Status = "ok"
+        Timestamp = [DateTimeOffset]::UtcNow.ToUnixTimeSeconds()
+        Lines = @()
+        ServiceStatus = "NotInstalled"
+        Version = ""
+        LastPolicyUpdate = ""
+        QueryDurations = [ordered]@{}
+        Runtimes = [ordered]@{}
+    }
+
+    $sccmClient = Get-Service -Name "CcmExec" -ErrorAction SilentlyContinue
+    if (-not $sccmClient) {
+        Write-Debug-Info "SCCM client not found"
+        return $data
+    }
+    $data.ServiceStatus = $sccmClient.Status
+
+    # All SCCM queries share one local DCOM session, so WMI is connected only once
+    $session = $null
+    try {
+        $session = New-CimSession -SessionOption (New-CimSessionOption -Protocol Dcom) -ErrorAction Stop
+
+        if ($sccmClient.Status -eq "Running") {
+            $stopwatch = [System.Diagnostics.Stopwatch]::StartNew()
+            $lines = Get-SCCMUpdates -CimSession $session -Durations $data.QueryDurations
+            $data.Runtimes["sccm_updates"] = $stopwatch.Elapsed.TotalSeconds
+            if ($null -eq $lines) {
+                $data.Status = "partial"
             }
-            catch {
-                Write-Debug-Info "Error getting SCCM client details: $($_.Exception.Message)"
+            else {
+                $data.Lines = $lines
             }
         }
-        
-        return [PSCustomObject]@{
-            ServiceStatus = if ($sccmClient) { $sccmClient.Status } else { "NotInstalled" }
-            Version = $clientVersion
-            LastPolicyUpdate = $lastPolicyUpdate
+        else {
+            Write-Debug-Info "SCCM client not running"
+        }
+
+        $stopwatch = [System.Diagnostics.Stopwatch]::StartNew()
+        $clientInfo = Get-SCCMClientInfo -CimSession $session -Durations $data.QueryDurations
+        $data.Runtimes["sccm_client"] = $stopwatch.Elapsed.TotalSeconds
+        $data.Version = $clientInfo.Version
+        $data.LastPolicyUpdate = $clientInfo.LastPolicyUpdate
+        if (-not $clientInfo.Complete) {
+            $data.Status = "partial"
         }
     }
     catch {
         Write-Debug-Info "Error getting SCCM client info: $($_.Exception.Message)"
-        return $null
+        $data.Status = "partial"
     }
+    finally {
+        if ($session) {
+            Remove-CimSession -CimSession $session
+        }
+    }
+
+    return $data
 }
 
-# Main execution
-Write-Output "<<<ms_win_update_v2>>>"
+function Start-Collector {
+    param(
+        [System.Management.Automation.Runspaces.RunspacePool]$Pool,
+        [string]$Name,
+        [string]$Command
+    )
 
-# Get all updates
-$allUpdates = @()
+    $shell = [powershell]::Create().AddCommand($Command)
+    $shell.RunspacePool = $Pool
+    return [PSCustomObject]@{
+        Name = $Name
+        Shell = $shell
+        Stopwatch = [System.Diagnostics.Stopwatch]::StartNew()
+        Handle = $shell.BeginInvoke()
+    }
+}
 
-if ($EnableWindowsUpdate) {
-    $windowsUpdates = Get-WindowsUpdates
-    $allUpdates += $windowsUpdates
+function Receive-Collector {
+    # Stores the result of a collector started with Start-Collector in $Results. Returns $true if
+    # the collector exceeded its time budget (in seconds, 0 = none) and was abandoned.
+    param(
+        [PSCustomObject]$Job,
+        [int]$TimeBudget,
+        [hashtable]$Results
+    )
+
+    if ($TimeBudget -gt 0) {
+        $remaining = [Math]::Max(0, $TimeBudget - $Job.Stopwatch.Elapsed.TotalSeconds)
+        if (-not $Job.Handle.AsyncWaitHandle.WaitOne([TimeSpan]::FromSeconds($remaining))) {
+            Write-Debug-Info "Collector $($Job.Name) exceeded its time budget of ${TimeBudget}s"
+            $Results[$Job.Name] = [PSCustomObject]@{
+                Status = "timeout"
+                Lines = @()
+                Runtime = $Job.Stopwatch.Elapsed.TotalSeconds
+                Runtimes = [ordered]@{}
+                QueryDurations = [ordered]@{}
+            }
+            # A hung COM or WMI call may not react to a stop request, so do not wait for it
+            [void]$Job.Shell.BeginStop($null, $null)
+            return $true
+        }
+    }
+
+    try {
+        $Results[$Job.Name] = $Job.Shell.EndInvoke($Job.Handle)
+    }
+    catch {
+        Write-Debug-Info "Error in collector $($Job.Name): $($_.Exception.Message)"
+    }
+    finally {
+        $Job.Shell.Dispose()
+    }
+    return $false
 }
 
-if ($EnableSCCM) {
-    $sccmUpdates = Get-SCCMUpdates
-    $allUpdates += $sccmUpdates
+function Invoke-Collectors {
+    param(
+        [System.Collections.Specialized.OrderedDictionary]$Collectors,
+        [hashtable]$TimeBudgets = @{}
+    )
+
+    $results = @{}
+    $hasTimeBudget = @($TimeBudgets.Values | Where-Object { $_ -gt 0 }).Count -gt 0
+    if (-not $hasTimeBudget -and (-not $Concurrent -or $Collectors.Count -lt 2)) {
+        foreach ($name in $Collectors.Keys) {
+            $results[$name] = & $Collectors[$name]
+        }
+        return $results
+    }
+
+    # Run each collector in its own runspace. Run concurrently, the total runtime approaches
+    # the slowest source instead of the sum of all sources. A collector that exceeds its time
+    # budget is abandoned, so a hung source does not cost the output of the others. The
+    # runspaces get the functions and parameters of this script.
+    $sessionState = [System.Management.Automation.Runspaces.InitialSessionState]::CreateDefault()
+    foreach ($function in Get-ChildItem -Path Function: | Where-Object { $_.ScriptBlock.File -eq $PSCommandPath }) {
+        $sessionState.Commands.Add(
+            (New-Object System.Management.Automation.Runspaces.SessionStateFunctionEntry($function.Name, $function.Definition))
+        )
+    }
+    foreach ($name in @((Get-Command -Name $PSCommandPath).Parameters.Keys) + "SectionFormatVersion") {
+        $variable = Get-Variable -Name $name -Scope Script -ErrorAction SilentlyContinue
+        if ($variable) {
+            $sessionState.Variables.Add(
+                (New-Object System.Management.Automation.Runspaces.SessionStateVariableEntry($variable.Name, $variable.Value, $null))
+            )
+        }
+    }
+
+    # One runspace per collector, also if they run one after another: an abandoned collector
+    # keeps its runspace busy, and the next one must not queue behind it and time out as well.
+    $pool = [runspacefactory]::CreateRunspacePool(1, $Collectors.Count, $sessionState, $Host)
+    $pool.Open()
+    $abandoned = $false
+    try {
+        $jobs = [System.Collections.Generic.List[object]]::new()
+        foreach ($name in $Collectors.Keys) {
+            $job = Start-Collector -Pool $pool -Name $name -Command $Collectors[$name]
+            if ($Concurrent) {
+                $jobs.Add($job)
+            }
+            elseif (Receive-Collector -Job $job -TimeBudget $TimeBudgets[$name] -Results $results) {
+                $abandoned = $true
+            }
+        }
+
+        foreach ($job in $jobs) {
+            if (Receive-Collector -Job $job -TimeBudget $TimeBudgets[$job.Name] -Results $results) {
+                $abandoned = $true
+            }
+        }
+    }
+    finally {
+        if ($abandoned) {
+            # Closing waits for running pipelines. Abandoned ones end with the script.
+            [void]$pool.BeginClose($null, $null)
+        }
+        else {
+            $pool.Close()
+            $pool.Dispose()
+        }
+    }
+
+    return $results
 }
 
-# Output SCCM client information
-if ($EnableSCCM) {
-    $sccmInfo = Get-SCCMClientInfo
-    if ($sccmInfo) {
-        Write-Output "SCCM_CLIENT_STATUS:$($sccmInfo.ServiceStatus)"
-        Write-Output "SCCM_CLIENT_VERSION:$($sccmInfo.Version)"
-        Write-Output "SCCM_LAST_POLICY_UPDATE:$($sccmInfo.LastPolicyUpdate)"
+function Read-SnapshotState {
+    param([string]$Path)
+
+    if (-not (Test-Path -LiteralPath $Path)) {
+        return $null
+    }
+    try {
+        $state = Get-Content -LiteralPath $Path -Raw | ConvertFrom-Json
+    }
+    catch {
+        Write-Debug-Info "Ignoring unreadable snapshot state: $($_.Exception.Message)"
+        return $null
     }
+
+    if ($state.Format -ne $SectionFormatVersion -or $null -eq $state.Lines -or $null -eq $state.UpdateIds) {
+        return $null
+    }
+    return $state
 }
 
-# Output update counts by source
-$windowsUpdateCount = ($allUpdates | Where-Object { $_.Source -eq "WindowsUpdate" }).Count
-$sccmUpdateCount = ($allUpdates | Where-Object { $_.Source -eq "SCCM" }).Count
+function Get-UpdateSnapshot {
+    # Delta encodes the update lines. Every $FullSnapshotInterval runs (or if the state of the
+    # last run is lost), a full snapshot with all lines starts a new generation. In between,
+    # only lines added since the last run and the IDs of removed lines are sent. Each line gets
+    # an ID, appended as last field, which is unique within the generation.
+    param([string[]]$Lines)
 
-Write-Output "WINDOWS_UPDATE_COUNT:$windowsUpdateCount"
-Write-Output "SCCM_UPDATE_COUNT:$sccmUpdateCount"
-Write-Output "TOTAL_UPDATE_COUNT:$($allUpdates.Count)"
+    $path = Join-Path (Get-StateDirectory) "ms_win_update_v2_snapshot.json"
+    $state = Read-SnapshotState -Path $path
+    $full = $null -eq $state -or ([int]$state.Sequence + 1) -ge $FullSnapshotInterval
 
-# Output all pending updates with detailed information
-foreach ($Update in $allUpdates) {
-    $updateLine = "UPDATE|$($Update.Source)|$($Update.Title)"
-    
-    # Add KB information if available
-    if ($Update.KB) {
-        $updateLine += "|KB:$($Update.KB)"
+    $previous = [System.Collections.Generic.Dictionary[string, int]]::new()
+    if ($full) {
+        $generation = [guid]::NewGuid().ToString("N")
+        $sequence = 0
+        $nextId = 1
     }
-    
-    # Add severity if available
-    if ($Update.Severity) {
-        $updateLine += "|SEVERITY:$($Update.Severity)"
+    else {
+        $generation = $state.Generation
+        $sequence = [int]$state.Sequence + 1
+        $nextId = [int]$state.NextId
+        for ($index = 0; $index -lt $state.Lines.Count; $index++) {
+            $previous[$state.Lines[$index]] = [int]$state.UpdateIds[$index]
+        }
     }
-    
-    # Add categories if available
-    if ($Update.Categories) {
-        $updateLine += "|CATEGORIES:$($Update.Categories)"
+
+    $ids = [System.Collections.Generic.Dictionary[string, int]]::new()
+    $output = [System.Collections.Generic.List[string]]::new()
+    $id = 0
+    foreach ($line in $Lines) {
+        if ($ids.ContainsKey($line)) {
+            continue
+        }
+        if ($previous.TryGetValue($line, [ref]$id)) {
+            $ids[$line] = $id
+            [void]$previous.Remove($line)
+            continue
+        }
+        $ids[$line] = $nextId
+        $output.Add("$line`tID:$nextId")
+        $nextId++
     }
-    
-    # Add size if available (convert bytes to MB for readability)
-    if ($Update.Size -and $Update.Size -gt 0) {
-        $sizeMB = [math]::Round($Update.Size / 1MB, 2)
-        $updateLine += "|SIZE:${sizeMB}MB"
+    foreach ($id in $previous.Values) {
+        $output.Add("UPDATE_REMOVED`t$id")
     }
-    
-    # Add download status
-    if ($Update.IsDownloaded -ne $null) {
-        $updateLine += "|DOWNLOADED:$($Update.IsDownloaded)"
+
+    $newState = [PSCustomObject]@{
+        Format = $SectionFormatVersion
+        Generation = $generation
+        Sequence = $sequence
+        NextId = $nextId
+        Lines = @($ids.Keys)
+        UpdateIds = @($ids.Values)
     }
-    
-    # Add reboot requirement
-    if ($Update.RebootRequired -ne $null) {
-        $updateLine += "|REBOOT:$($Update.RebootRequired)"
+    try {
+        $newState | ConvertTo-Json -Depth 2 -Compress | Set-Content -LiteralPath $path -Encoding UTF8
     }
-    
-    # Add SCCM-specific information
-    if ($Update.Source -eq "SCCM") {
-        if ($Update.EvaluationState) {
-            $updateLine += "|EVAL_STATE:$($Update.EvaluationState)"
-        }
-        if ($Update.Deadline) {
-            $updateLine += "|DEADLINE:$($Update.Deadline)"
+    catch {
+        # Without the state, the next run sends a full snapshot again
+        Write-Debug-Info "Error writing snapshot state: $($_.Exception.Message)"
+    }
+
+    $kind = if ($full) { "full" } else { "delta" }
+    return [PSCustomObject]@{
+        Header = "SNAPSHOT`t$generation`t$sequence`t$kind"
+        Lines = $output
+    }
+}
+
+function Write-OutputBuffer {
+    param([System.Text.StringBuilder]$Buffer)
+    [Console]::Out.Write($Buffer.ToString())
+    [void]$Buffer.Clear()
+}
+
+# Allow dot-sourcing the functions (e.g. from Pester tests) without running the plugin
+if ($MyInvocation.InvocationName -eq '.') {
+    return
+}
+
+# Main execution
+$scriptStopwatch = [System.Diagnostics.Stopwatch]::StartNew()
+
+# Collect from all enabled sources
+$collectors = [ordered]@{}
+if ($EnableWindowsUpdate) {
+    $collectors["WindowsUpdates"] = "Get-WindowsUpdates"
+}
+if ($EnableSCCM) {
+    $collectors["SCCM"] = "Get-SCCMData"
+}
+$timeBudgets = @{
+    WindowsUpdates = $WindowsUpdateTimeBudget
+    SCCM = $SCCMTimeBudget
+}
+$results = Invoke-Collectors -Collectors $collectors -TimeBudgets $timeBudgets
+
+# All output goes through one buffer that is written to stdout in large blocks
+$outputBufferSize = 65536
+$output = [System.Text.StringBuilder]::new($outputBufferSize)
+[void]$output.AppendLine("<<<ms_win_update_v2:sep(9)>>>")
+[void]$output.AppendLine("FORMAT_VERSION`t$SectionFormatVersion")
+
+$windowsUpdateData = $null
+if ($EnableWindowsUpdate) {
+    $windowsUpdateData = $results["WindowsUpdates"] | Select-Object -First 1
+}
+$sccmData = $null
+if ($EnableSCCM) {
+    $sccmData = $results["SCCM"] | Select-Object -First 1
+}
+
+$allSourcesComplete = $true
+
+# Output the status of each source and when its data was collected. Status: ok, partial (some
+# queries failed), timeout (abandoned after its time budget) or error (no result at all)
+foreach ($source in @(
+    @{ Name = "WindowsUpdate"; Enabled = $EnableWindowsUpdate; Data = $windowsUpdateData },
+    @{ Name = "SCCM"; Enabled = $EnableSCCM; Data = $sccmData }
+)) {
+    if ($source.Enabled) {
+        $status = "error"
+        $timestamp = ""
+        if ($source.Data) {
+            $status = $source.Data.Status
+            $timestamp = $source.Data.Timestamp
         }
-        if ($Update.ComplianceState) {
-            $updateLine += "|COMPLIANCE:$($Update.ComplianceState)"
+        if ($status -ne "ok") {
+            $allSourcesComplete = $false
         }
+        [void]$output.AppendLine("SOURCE_STATUS`t$($source.Name)`t$status`t$timestamp")
+    }
+}
+
+# Output SCCM client information and query durations
+if ($sccmData -and $sccmData.Status -ne "timeout") {
+    [void]$output.AppendLine("SCCM_CLIENT_STATUS`t$($sccmData.ServiceStatus)")
+    [void]$output.AppendLine("SCCM_CLIENT_VERSION`t$($sccmData.Version)")
+    [void]$output.AppendLine("SCCM_LAST_POLICY_UPDATE`t$($sccmData.LastPolicyUpdate)")
+    foreach ($className in $sccmData.QueryDurations.Keys) {
+        [void]$output.AppendLine("SCCM_QUERY_DURATION`t${className}`t$($sccmData.QueryDurations[$className])")
+    }
+}
+
+# Output all pending updates
+$windowsUpdateLines = @()
+if ($windowsUpdateData) {
+    $windowsUpdateLines = @($windowsUpdateData.Lines)
+}
+$sccmUpdateLines = @()
+if ($sccmData) {
+    $sccmUpdateLines = @($sccmData.Lines)
+}
+$windowsUpdateCount = $windowsUpdateLines.Count
+$sccmUpdateCount = $sccmUpdateLines.Count
+
+# The delta encoding needs the complete update list. With an incomplete source, all lines are
+# sent without touching the snapshot state.
+$updateLines = $windowsUpdateLines + $sccmUpdateLines
+if ($FullSnapshotInterval -gt 0 -and $allSourcesComplete) {
+    $snapshot = Get-UpdateSnapshot -Lines $updateLines
+    [void]$output.AppendLine($snapshot.Header)
+    $updateLines = $snapshot.Lines
+}
+
+foreach ($updateLine in $updateLines) {
+    [void]$output.AppendLine($updateLine)
+    if ($output.Length -ge $outputBufferSize) {
+        Write-OutputBuffer -Buffer $output
+    }
+}
+
+# Output update counts by source
+[void]$output.AppendLine("WINDOWS_UPDATE_COUNT`t$windowsUpdateCount")
+[void]$output.AppendLine("SCCM_UPDATE_COUNT`t$sccmUpdateCount")
+[void]$output.AppendLine("TOTAL_UPDATE_COUNT`t$($windowsUpdateCount + $sccmUpdateCount)")
+
+# Output the runtime of each collection phase and of the whole plugin in seconds
+if ($windowsUpdateData) {
+    [void]$output.AppendLine("AGENT_RUNTIME`twu`t$($windowsUpdateData.Runtime)")
+}
+if ($sccmData) {
+    foreach ($phase in $sccmData.Runtimes.Keys) {
+        [void]$output.AppendLine("AGENT_RUNTIME`t${phase}`t$($sccmData.Runtimes[$phase])")
     }
-    
-    Write-Output $updateLine
 }
+[void]$output.AppendLine("AGENT_RUNTIME`ttotal`t$($scriptStopwatch.Elapsed.TotalSeconds)")
+Write-OutputBuffer -Buffer $output
 
 Write-Debug-Info "Script completed successfully"
@@ -0,0 +1,84 @@
+# Copyright (C) 2025  Christopher Pommer <cp.software@outlook.de>
+# Enhanced with SCCM support by Mario Fellner <mario.fellner@outlook.at>
+
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+####################################################################################################
+# CHECKMK AGENT PLUG-IN SCRIPT: Microsoft Windows Update with SCCM Support (pending reboot)
+#
+# This script generates the Checkmk agent section for pending reboots. It only reads a few
+# registry values and asks the SCCM client, so it can run far more often than the update search.
+# This file is part of the Microsoft Windows Update agent plug-in with SCCM support.
+####################################################################################################
+
+param(
+    [switch]$Debug = $false
+)
+
+function Write-Debug-Info {
+    param([string]$Message)
+    if ($Debug) {
+        Write-Host "[DEBUG] $Message" -ForegroundColor Yellow
+    }
+}
+
+function Get-RegistryRebootMarkers {
+    # Markers set by Windows while a reboot is needed to complete an installation
+    $pendingFileRenames = (Get-ItemProperty -Path "HKLM:\SYSTEM\CurrentControlSet\Control\Session Manager" `
+        -Name "PendingFileRenameOperations" -ErrorAction SilentlyContinue).PendingFileRenameOperations
+
+    return [ordered]@{
+        CBS_REBOOT_PENDING = Test-Path -Path "HKLM:\SOFTWARE\Microsoft\Windows\CurrentVersion\Component Based Servicing\RebootPending"
+        WU_REBOOT_REQUIRED = Test-Path -Path "HKLM:\SOFTWARE\Microsoft\Windows\CurrentVersion\WindowsUpdate\Auto Update\RebootRequired"
+        PENDING_FILE_RENAME = @($pendingFileRenames | Where-Object { $_ }).Count -gt 0
+    }
+}
+
+function Get-SCCMRebootMarkers {
+    # The SCCM client knows about reboots required by its deployments, including the
+    # deadline-enforced ("hard") ones. Without a running client, the markers are omitted.
+    $sccmClient = Get-Service -Name "CcmExec" -ErrorAction SilentlyContinue
+    if (-not $sccmClient -or $sccmClient.Status -ne "Running") {
+        Write-Debug-Info "SCCM client not running"
+        return [ordered]@{}
+    }
+
+    try {
+        $rebootState = Invoke-CimMethod -Namespace "ROOT\ccm\ClientSDK" -ClassName "CCM_ClientUtilities" `
+            -MethodName "DetermineIfRebootPending" -ErrorAction Stop
+        return [ordered]@{
+            SCCM_REBOOT_PENDING = [bool]$rebootState.RebootPending
+            SCCM_HARD_REBOOT_PENDING = [bool]$rebootState.IsHardRebootPending
+        }
+    }
+    catch {
+        Write-Debug-Info "Error getting SCCM reboot state: $($_.Exception.Message)"
+        return [ordered]@{
+            SCCM_REBOOT_PENDING = "unknown"
+        }
+    }
+}
+
+# Main execution
+$output = [System.Text.StringBuilder]::new(256)
+[void]$output.AppendLine("<<<ms_win_update_v2_reboot:sep(9)>>>")
+
+foreach ($markers in @((Get-RegistryRebootMarkers), (Get-SCCMRebootMarkers))) {
+    foreach ($name in $markers.Keys) {
+        [void]$output.AppendLine("${name}`t$($markers[$name])")
+    }
+}
+
+[Console]::Out.Write($output.ToString())
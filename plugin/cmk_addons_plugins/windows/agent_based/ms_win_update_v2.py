@@ -25,9 +25,18 @@
 # Windows Update and SCCM updates.
 ####################################################################################################
 
+import dataclasses
+import hashlib
+import heapq
+import itertools
 import re
-from collections.abc import Mapping
-from dataclasses import dataclass
+import statistics
+import sys
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Callable, Iterable, Iterator, Mapping, MutableMapping, Sequence
+from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Any, Optional
 from datetime import datetime, timezone
 
@@ -37,7 +46,9 @@ from cmk.agent_based.v2 import (
     CheckPlugin,
     CheckResult,
     DiscoveryResult,
+    get_value_store,
     Metric,
+    render,
     Result,
     Service,
     State,
@@ -45,7 +56,9 @@ from cmk.agent_based.v2 import (
 )
 
 
-@dataclass(frozen=True)
+# Parsed sections of many hosts are held in memory at once, so the section classes use slots and
+# the parser interns strings that repeat across the fleet (source, KB, severity, categories).
+@dataclass(frozen=True, slots=True)
 class WindowsUpdate:
     title: str
     source: str  # "WindowsUpdate" or "SCCM"
@@ -57,133 +70,468 @@ class WindowsUpdate:
     reboot_required: Optional[bool] = None
     # SCCM-specific fields
     evaluation_state: Optional[int] = None
-    deadline: Optional[str] = None
+    deadline: Optional[int] = None  # Unix timestamp
     compliance_state: Optional[int] = None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SCCMClientInfo:
     status: str
     version: str
     last_policy_update: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
+class Snapshot:
+    """Position of a section in the delta encoded update list of the agent plug-in.
+
+    A full snapshot starts a new generation and contains all updates. A delta contains the
+    updates added since the previous sequence number of the same generation and the IDs of the
+    updates removed since then.
+    """
+
+    generation: str
+    sequence: int
+    full: bool
+    # Update ID -> UPDATE row (tab separated) of the updates in this section
+    added: Mapping[str, str]
+    removed: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True, slots=True)
 class Section:
-    updates: list[WindowsUpdate]
+    updates: tuple[WindowsUpdate, ...]
     windows_update_count: int
     sccm_update_count: int
     total_count: int
     sccm_client_info: Optional[SCCMClientInfo] = None
+    # Runtime of the agent plug-in per collection phase in seconds
+    agent_runtimes: Mapping[str, float] = field(default_factory=dict)
+    # Duration of the WMI query of each SCCM client class in seconds
+    sccm_query_durations: Mapping[str, float] = field(default_factory=dict)
+    # Collection status per source: "ok", "partial", "timeout" or "error"
+    source_status: Mapping[str, str] = field(default_factory=dict)
+    # Time the data of each source was collected (Unix timestamp)
+    source_timestamps: Mapping[str, int] = field(default_factory=dict)
+    # Set if the agent plug-in sends the update list delta encoded
+    snapshot: Optional[Snapshot] = None
+    # Indexes of the updates, built on first use. Only the KB rules and the services per source
+    # and classification need them, so parsing does not pay for them.
+    _by_kb: Optional[Mapping[str, tuple[WindowsUpdate, ...]]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _by_source: Optional[Mapping[str, tuple[WindowsUpdate, ...]]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _by_classification: Optional[Mapping[str, tuple[WindowsUpdate, ...]]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    # Item -> section of the updates of one source or classification. All services of a host are
+    # checked with the same parsed section, so each slice is built once per section.
+    _slices: Optional[dict[str, "Section"]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    @property
+    def updates_by_kb(self) -> Mapping[str, tuple[WindowsUpdate, ...]]:
+        """The updates by KB number (without "KB" prefix)."""
+        if (index := self._by_kb) is None:
+            by_kb: dict[str, list[WindowsUpdate]] = {}
+            for update in self.updates:
+                if update.kb:
+                    for kb in update.kb.split(","):
+                        by_kb.setdefault(sys.intern(_normalize_kb(kb)), []).append(update)
+            index = {kb: tuple(updates) for kb, updates in by_kb.items()}
+            object.__setattr__(self, "_by_kb", index)
+        return index
+
+    @property
+    def updates_by_source(self) -> Mapping[str, tuple[WindowsUpdate, ...]]:
+        if (index := self._by_source) is None:
+            by_source: dict[str, list[WindowsUpdate]] = {}
+            for update in self.updates:
+                by_source.setdefault(update.source, []).append(update)
+            index = {source: tuple(updates) for source, updates in by_source.items()}
+            object.__setattr__(self, "_by_source", index)
+        return index
+
+    @property
+    def updates_by_classification(self) -> Mapping[str, tuple[WindowsUpdate, ...]]:
+        if (index := self._by_classification) is None:
+            by_classification: dict[str, list[WindowsUpdate]] = {}
+            for update in self.updates:
+                if (classification := _classify(update.categories, update.title)) is not None:
+                    by_classification.setdefault(classification, []).append(update)
+            index = {name: tuple(updates) for name, updates in by_classification.items()}
+            object.__setattr__(self, "_by_classification", index)
+        return index
+
+
+# Update classifications -> keywords in the categories (Windows Update) or title (SCCM, which
+# does not report categories). The first matching classification wins, so definition updates
+# named "Security Intelligence Update" are not counted as security updates.
+_CLASSIFICATIONS: Sequence[tuple[str, tuple[str, ...]]] = (
+    ("Definition", ("definition update", "security intelligence update")),
+    ("Security", ("security update",)),
+    ("Critical", ("critical update",)),
+    ("Driver", ("driver",)),
+    ("Feature Pack", ("feature pack",)),
+)
+
+
+@lru_cache(maxsize=32768)
+def _classify(categories: Optional[str], title: str) -> Optional[str]:
+    text = (categories or title).lower()
+    for classification, keywords in _CLASSIFICATIONS:
+        if any(keyword in text for keyword in keywords):
+            return classification
+    return None
+
+
+def _normalize_kb(kb: str) -> str:
+    """Normalize "KB5012345", "kb5012345" and "5012345" to "5012345"."""
+    kb = kb.strip().upper()
+    return kb[2:] if kb.startswith("KB") else kb
+
+
+def _parse_bool(value: str) -> bool:
+    return value.lower() == "true"
+
+
+def _parse_size_mb(value: str) -> float:
+    # Remove "MB" suffix and convert to float
+    return float(value.replace("MB", ""))
+
+
+def _parse_iso_timestamp(value: str) -> int:
+    # Current agent plug-in: "2025-01-15T00:00:00Z"
+    moment = datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ")
+    return int(moment.replace(tzinfo=timezone.utc).timestamp())
+
+
+def _parse_dmtf_timestamp(value: str) -> int:
+    # Older agent plug-ins, WMI DMTF datetime: "20250115000000.000000+000", the suffix being the
+    # offset to UTC in minutes
+    if len(value) != 25 or value[14] != "." or value[21] not in "+-":
+        raise ValueError(value)
+    moment = datetime.strptime(value[:14], "%Y%m%d%H%M%S")
+    return int(moment.replace(tzinfo=timezone.utc).timestamp()) - int(value[21:]) * 60
+
+
+def _parse_us_timestamp(value: str) -> int:
+    # Older agent plug-ins, CIM datetime converted with the invariant culture:
+    # "01/15/2025 00:00:00". The time zone is unknown, UTC is assumed.
+    moment = datetime.strptime(value, "%m/%d/%Y %H:%M:%S")
+    return int(moment.replace(tzinfo=timezone.utc).timestamp())
+
+
+# Known deadline formats. The one that matched last is moved to the front, as an agent plug-in
+# version always sends the same format.
+_DEADLINE_PARSERS: list[Callable[[str], int]] = [
+    _parse_iso_timestamp,
+    _parse_dmtf_timestamp,
+    _parse_us_timestamp,
+]
+
+
+@lru_cache(maxsize=4096)
+def _parse_deadline(value: str) -> Optional[int]:
+    """Convert a deadline to a Unix timestamp, None if the format is unknown."""
+    for index, parse in enumerate(_DEADLINE_PARSERS):
+        try:
+            timestamp = parse(value)
+        except ValueError:
+            continue
+        if index:
+            _DEADLINE_PARSERS.insert(0, _DEADLINE_PARSERS.pop(index))
+        return timestamp
+    return None
+
+
+# Header lines: "KEY:value" -> (parser state key, decoder)
+_HEADER_FIELDS: Mapping[str, tuple[str, Optional[Callable[[str], Any]]]] = {
+    "SCCM_CLIENT_STATUS": ("sccm_status", sys.intern),
+    "SCCM_CLIENT_VERSION": ("sccm_version", sys.intern),
+    "SCCM_LAST_POLICY_UPDATE": ("sccm_last_policy", None),
+    "WINDOWS_UPDATE_COUNT": ("windows_update_count", int),
+    "SCCM_UPDATE_COUNT": ("sccm_update_count", int),
+    "TOTAL_UPDATE_COUNT": ("total_count", int),
+}
+
+# Optional fields of an UPDATE line -> (WindowsUpdate field position, decoder). Fields without a
+# decoder are kept as plain strings.
+_UPDATE_FIELDS: Mapping[str, tuple[int, Optional[Callable[[str], Any]]]] = {
+    "KB": (2, sys.intern),
+    "SEVERITY": (3, sys.intern),
+    "CATEGORIES": (4, sys.intern),
+    "SIZE": (5, _parse_size_mb),
+    "DOWNLOADED": (6, _parse_bool),
+    "REBOOT": (7, _parse_bool),
+    "EVAL_STATE": (8, int),
+    "DEADLINE": (9, _parse_deadline),
+    "COMPLIANCE": (10, int),
+}
+_NO_UPDATE_FIELDS = (None,) * len(_UPDATE_FIELDS)
+
+
+# Parsed sections kept per process. The agent plug-in usually runs asynchronously, so the same
+# section is seen on many check cycles in a row. The cache is bounded both in sections and in
+# the total number of updates they hold.
+_PARSE_CACHE_SIZE = 1024
+_PARSE_CACHE_MAX_UPDATES = 100000
+_PARSE_CACHE: OrderedDict[bytes, Section] = OrderedDict()
+_PARSE_CACHE_STATS = {"hits": 0, "misses": 0, "evictions": 0, "cached_updates": 0}
+
+
+def _string_table_digest(string_table: StringTable) -> bytes:
+    return hashlib.blake2b(
+        "\n".join(map("\x1f".join, string_table)).encode("utf-8"), digest_size=16
+    ).digest()
 
 
 def parse_ms_win_update_v2(string_table: StringTable) -> Section:
-    updates = []
-    windows_update_count = 0
-    sccm_update_count = 0
-    total_count = 0
-    sccm_client_info = None
-    
-    sccm_status = ""
-    sccm_version = ""
-    sccm_last_policy = ""
+    """Parse the agent section, reusing the result of an identical earlier section.
 
+    Sections are cached by a digest of their content in a bounded LRU cache. Hit, miss and
+    eviction counters are available in _PARSE_CACHE_STATS.
+    """
+    digest = _string_table_digest(string_table)
+    if (section := _PARSE_CACHE.get(digest)) is not None:
+        _PARSE_CACHE.move_to_end(digest)
+        _PARSE_CACHE_STATS["hits"] += 1
+        return section
+
+    _PARSE_CACHE_STATS["misses"] += 1
+    section = _parse_string_table(string_table)
+    if len(section.updates) > _PARSE_CACHE_MAX_UPDATES:
+        return section
+
+    _PARSE_CACHE[digest] = section
+    _PARSE_CACHE_STATS["cached_updates"] += len(section.updates)
+    while (
+        len(_PARSE_CACHE) > _PARSE_CACHE_SIZE
+        or _PARSE_CACHE_STATS["cached_updates"] > _PARSE_CACHE_MAX_UPDATES
+    ):
+        _digest, evicted = _PARSE_CACHE.popitem(last=False)
+        _PARSE_CACHE_STATS["evictions"] += 1
+        _PARSE_CACHE_STATS["cached_updates"] -= len(evicted.updates)
+    return section
+
+
+def _iter_legacy_rows(string_table: StringTable) -> Iterator[Sequence[str]]:
+    """Convert the rows of the legacy whitespace split format to the columns of the current one.
+
+    Legacy agents send "KEY:value" header lines and "UPDATE|Source|Title|KEY:value|..." lines
+    without a section separator, so titles are split at whitespace and have to be joined again.
+    """
     for line in string_table:
         if not line:
             continue
-            
-        line_str = " ".join(line).strip()
-        
-        if line_str.startswith("SCCM_CLIENT_STATUS:"):
-            sccm_status = line_str.split(":", 1)[1]
-        elif line_str.startswith("SCCM_CLIENT_VERSION:"):
-            sccm_version = line_str.split(":", 1)[1]
-        elif line_str.startswith("SCCM_LAST_POLICY_UPDATE:"):
-            sccm_last_policy = line_str.split(":", 1)[1]
-        elif line_str.startswith("WINDOWS_UPDATE_COUNT:"):
-            windows_update_count = int(line_str.split(":", 1)[1])
-        elif line_str.startswith("SCCM_UPDATE_COUNT:"):
-            sccm_update_count = int(line_str.split(":", 1)[1])
-        elif line_str.startswith("TOTAL_UPDATE_COUNT:"):
-            total_count = int(line_str.split(":", 1)[1])
-        elif line_str.startswith("UPDATE|"):
-            # Parse update line: UPDATE|Source|Title|KB:xxx|SEVERITY:xxx|...
-            parts = line_str.split("|")
-            if len(parts) >= 3:
-                source = parts[1]
-                title = parts[2]
-                
-                # Parse additional fields
-                kb = None
-                severity = None
-                categories = None
-                size_mb = None
-                is_downloaded = None
-                reboot_required = None
-                evaluation_state = None
-                deadline = None
-                compliance_state = None
-                
-                for part in parts[3:]:
-                    if ":" in part:
-                        key, value = part.split(":", 1)
-                        if key == "KB":
-                            kb = value
-                        elif key == "SEVERITY":
-                            severity = value
-                        elif key == "CATEGORIES":
-                            categories = value
-                        elif key == "SIZE":
-                            # Remove "MB" suffix and convert to float
-                            try:
-                                size_mb = float(value.replace("MB", ""))
-                            except ValueError:
-                                pass
-                        elif key == "DOWNLOADED":
-                            is_downloaded = value.lower() == "true"
-                        elif key == "REBOOT":
-                            reboot_required = value.lower() == "true"
-                        elif key == "EVAL_STATE":
-                            try:
-                                evaluation_state = int(value)
-                            except ValueError:
-                                pass
-                        elif key == "DEADLINE":
-                            deadline = value
-                        elif key == "COMPLIANCE":
-                            try:
-                                compliance_state = int(value)
-                            except ValueError:
-                                pass
-                
-                updates.append(WindowsUpdate(
-                    title=title,
-                    source=source,
-                    kb=kb,
-                    severity=severity,
-                    categories=categories,
-                    size_mb=size_mb,
-                    is_downloaded=is_downloaded,
-                    reboot_required=reboot_required,
-                    evaluation_state=evaluation_state,
-                    deadline=deadline,
-                    compliance_state=compliance_state
-                ))
-    
+        first = line[0]
+        if first.startswith("UPDATE|"):
+            yield (" ".join(line) if len(line) > 1 else first).split("|")
+            continue
+        key, sep, value = first.partition(":")
+        if sep:
+            yield (key, " ".join([value, *line[1:]]) if len(line) > 1 else value)
+
+
+def _parse_string_table(string_table: StringTable) -> Section:
+    updates = []
+    agent_runtimes: dict[str, float] = {}
+    sccm_query_durations: dict[str, float] = {}
+    source_status: dict[str, str] = {}
+    source_timestamps: dict[str, int] = {}
+    header: dict[str, Any] = {
+        "sccm_status": "",
+        "sccm_version": "",
+        "sccm_last_policy": "",
+        "windows_update_count": 0,
+        "sccm_update_count": 0,
+        "total_count": 0,
+    }
+    header_fields = _HEADER_FIELDS.get
+    snapshot_header: Optional[tuple[str, int, bool]] = None
+    snapshot_added: dict[str, str] = {}
+    snapshot_removed: list[str] = []
+
+    # Current agents announce the (tab separated) format version in the first line
+    rows: Iterable[Sequence[str]]
+    if string_table and string_table[0] and string_table[0][0] == "FORMAT_VERSION":
+        rows = itertools.islice(string_table, 1, None)
+    else:
+        rows = _iter_legacy_rows(string_table)
+
+    for row in rows:
+        if not row:
+            continue
+
+        key = row[0]
+        if key == "UPDATE":
+            if (update := _parse_update_row(row)) is None:
+                continue
+            updates.append(update)
+            # Delta encoded update lists end each update row with its ID
+            if snapshot_header is not None and row[-1].startswith("ID:"):
+                snapshot_added[row[-1][3:]] = "\t".join(row)
+            continue
+
+        if key == "UPDATE_REMOVED":
+            # UPDATE_REMOVED, ID
+            if len(row) >= 2:
+                snapshot_removed.append(row[1])
+            continue
+
+        if key == "SNAPSHOT":
+            # SNAPSHOT, generation, sequence, "full" or "delta"
+            if len(row) >= 4 and row[2].isdigit():
+                snapshot_header = (row[1], int(row[2]), row[3] == "full")
+            continue
+
+        if key == "SOURCE_STATUS":
+            # SOURCE_STATUS, source, status[, timestamp]
+            if len(row) >= 3:
+                source = sys.intern(row[1])
+                source_status[source] = sys.intern(row[2])
+                if len(row) >= 4 and row[3].isdigit():
+                    source_timestamps[source] = int(row[3])
+            continue
+
+        if key == "AGENT_RUNTIME":
+            # AGENT_RUNTIME, phase, seconds
+            if len(row) >= 3:
+                try:
+                    agent_runtimes[row[1]] = float(row[2])
+                except ValueError:
+                    pass
+            continue
+
+        if key == "SCCM_QUERY_DURATION":
+            # SCCM_QUERY_DURATION, WMI class, seconds
+            if len(row) >= 3:
+                try:
+                    sccm_query_durations[row[1]] = float(row[2])
+                except ValueError:
+                    pass
+            continue
+
+        if len(row) < 2 or (field_spec := header_fields(key)) is None:
+            continue
+        attribute, decode = field_spec
+        if decode is None:
+            header[attribute] = row[1]
+            continue
+        try:
+            header[attribute] = decode(row[1])
+        except ValueError:
+            pass
+
     # Create SCCM client info if we have status information
-    if sccm_status:
+    sccm_client_info = None
+    if header["sccm_status"]:
         sccm_client_info = SCCMClientInfo(
-            status=sccm_status,
-            version=sccm_version,
-            last_policy_update=sccm_last_policy
+            status=header["sccm_status"],
+            version=header["sccm_version"],
+            last_policy_update=header["sccm_last_policy"],
         )
 
     return Section(
+        updates=tuple(updates),
+        windows_update_count=header["windows_update_count"],
+        sccm_update_count=header["sccm_update_count"],
+        total_count=header["total_count"],
+        sccm_client_info=sccm_client_info,
+        agent_runtimes=agent_runtimes,
+        sccm_query_durations=sccm_query_durations,
+        source_status=source_status,
+        source_timestamps=source_timestamps,
+        snapshot=(
+            None
+            if snapshot_header is None
+            else Snapshot(*snapshot_header, snapshot_added, tuple(snapshot_removed))
+        ),
+    )
+
+
+def _parse_update_row(row: Sequence[str]) -> Optional[WindowsUpdate]:
+    # UPDATE, Source, Title, KB:xxx, SEVERITY:xxx, ...
+    if len(row) < 3:
+        return None
+
+    fields: list[Any] = [row[2], sys.intern(row[1]), *_NO_UPDATE_FIELDS]
+    for part in row[3:]:
+        field_key, sep, value = part.partition(":")
+        if not sep or (field_spec := _UPDATE_FIELDS.get(field_key)) is None:
+            continue
+        position, decode = field_spec
+        if decode is None:
+            fields[position] = value
+            continue
+        try:
+            fields[position] = decode(value)
+        except ValueError:
+            pass
+
+    return WindowsUpdate(*fields)
+
+
+@lru_cache(maxsize=65536)
+def _parse_update_line(line: str) -> Optional[WindowsUpdate]:
+    # Update rows kept in the value store. The same rows are decoded on every check cycle.
+    return _parse_update_row(line.split("\t"))
+
+
+def _resolve_snapshot(
+    section: Section, value_store: MutableMapping[str, Any], store_key: str = "snapshot"
+) -> Optional[Section]:
+    """Rebuild the complete update list of a delta encoded section.
+
+    The update rows of the last full snapshot and all deltas applied to it are kept in the value
+    store. Returns None if a delta does not follow the stored state, e.g. after a missed agent
+    run. The stored state is then dropped until the next full snapshot.
+    """
+    snapshot = section.snapshot
+    if snapshot is None:
+        return section
+
+    if snapshot.full:
+        value_store[store_key] = {
+            "generation": snapshot.generation,
+            "sequence": snapshot.sequence,
+            "updates": dict(snapshot.added),
+        }
+        return section
+
+    state = value_store.get(store_key)
+    if state is None or state["generation"] != snapshot.generation:
+        value_store.pop(store_key, None)
+        return None
+
+    # Asynchronously collected agent output is seen on several check cycles
+    if state["sequence"] != snapshot.sequence:
+        if state["sequence"] != snapshot.sequence - 1:
+            value_store.pop(store_key, None)
+            return None
+        lines = dict(state["updates"])
+        for update_id in snapshot.removed:
+            lines.pop(update_id, None)
+        lines.update(snapshot.added)
+        state = {"generation": snapshot.generation, "sequence": snapshot.sequence, "updates": lines}
+        value_store[store_key] = state
+
+    updates = tuple(
+        update
+        for update in map(_parse_update_line, state["updates"].values())
+        if update is not None
+    )
+    windows_update_count = sum(1 for update in updates if update.source == "WindowsUpdate")
+    return dataclasses.replace(
+        section,
         updates=updates,
         windows_update_count=windows_update_count,
-        sccm_update_count=sccm_update_count,
-        total_count=total_count,
-        sccm_client_info=sccm_client_info
+        sccm_update_count=len(updates) - windows_update_count,
+        total_count=len(updates),
+        snapshot=None,
     )
 
 
@@ -191,7 +539,215 @@ def discover_ms_win_update_v2(section: Section) -> DiscoveryResult:
     yield Service()
 
 
+# Items of the optional services per source
+_SOURCE_ITEMS = {
+    "via Windows Update": "WindowsUpdate",
+    "via SCCM": "SCCM",
+}
+
+
+def discover_ms_win_update_v2_services(
+    params: Mapping[str, Any], section: Section
+) -> DiscoveryResult:
+    # The delta encoded update list can only be rebuilt from the value store of the main service
+    if section.snapshot is not None:
+        return
+    if params.get("per_source", False):
+        for item, source in _SOURCE_ITEMS.items():
+            if source in section.updates_by_source or (
+                source in section.source_status and _source_available(section, source)
+            ):
+                yield Service(item=item)
+
+    # Older rules enable all classifications with True
+    if (selected := params.get("per_classification", ())) is True:
+        selected = _CLASSIFICATION_CHOICES
+    for classification, _keywords in _CLASSIFICATIONS:
+        if _classification_choice(classification) in (selected or ()):
+            yield Service(item=classification)
+
+
+def _source_available(section: Section, source: str) -> bool:
+    """Whether the host uses the source. SCCM is reported without an installed client, too."""
+    if source != "SCCM":
+        return True
+    client = section.sccm_client_info
+    return client is not None and client.status != "NotInstalled"
+
+
+def _classification_choice(classification: str) -> str:
+    """The name of a classification in the discovery rule, e.g. "feature_pack"."""
+    return classification.lower().replace(" ", "_")
+
+
+_CLASSIFICATION_CHOICES = tuple(
+    _classification_choice(classification) for classification, _keywords in _CLASSIFICATIONS
+)
+
+
+def _section_slice(section: Section, item: str) -> Section:
+    """Return the section of the updates of one source or classification."""
+    if (source := _SOURCE_ITEMS.get(item)) is not None:
+        updates = section.updates_by_source.get(source, ())
+        sources: Iterable[str] = (source,)
+    else:
+        updates = section.updates_by_classification.get(item, ())
+        sources = section.source_status
+
+    windows_update_count = sum(1 for update in updates if update.source == "WindowsUpdate")
+    return Section(
+        updates=updates,
+        windows_update_count=windows_update_count,
+        sccm_update_count=len(updates) - windows_update_count,
+        total_count=len(updates),
+        sccm_client_info=section.sccm_client_info if source == "SCCM" else None,
+        source_status={
+            name: status for name, status in section.source_status.items() if name in sources
+        },
+        source_timestamps={
+            name: timestamp
+            for name, timestamp in section.source_timestamps.items()
+            if name in sources
+        },
+    )
+
+
+def check_ms_win_update_v2_services(
+    item: str, params: Mapping[str, Any], section: Section
+) -> CheckResult:
+    """Check the updates of one source or classification.
+
+    The check only walks the slice of the updates of its item. The updates are partitioned once
+    per section, and slices are built once per parsed section and item.
+
+    The services are not discovered for hosts sending a delta encoded update list. Only the main
+    service keeps the update rows needed to rebuild it.
+    """
+    # Update rows stored by earlier versions of the services
+    get_value_store().pop("snapshot", None)
+
+    if section.snapshot is not None:
+        yield Result(state=State.UNKNOWN, summary=_SNAPSHOT_UNSUPPORTED_MESSAGE)
+        return
+
+    if (slices := section._slices) is None:
+        slices = {}
+        object.__setattr__(section, "_slices", slices)
+    if (item_section := slices.get(item)) is None:
+        item_section = slices[item] = _section_slice(section, item)
+    yield from check_ms_win_update_v2(params, item_section)
+
+
+_CRITICAL_SEVERITIES = frozenset(("critical", "important"))
+
+_SOURCE_TITLES = {
+    "WindowsUpdate": "Windows Update",
+    "SCCM": "SCCM",
+}
+_SOURCE_METRIC_NAMES = {
+    "WindowsUpdate": "windows_update",
+    "SCCM": "sccm",
+}
+
+# Collection status of a source other than "ok" -> message and default state
+_SOURCE_STATUS_MESSAGES = {
+    "partial": "data incomplete, some queries failed",
+    "timeout": "collection exceeded its time budget",
+    "error": "collection failed",
+}
+_SOURCE_STATUS_DEFAULT_STATES = {
+    "partial": State.WARN.value,
+    "timeout": State.WARN.value,
+    "error": State.UNKNOWN.value,
+}
+
+# Collection phases of the agent plug-in reported in AGENT_RUNTIME lines
+_AGENT_RUNTIME_PHASES = {
+    "wu": "Windows Update search runtime",
+    "sccm_updates": "SCCM update query runtime",
+    "sccm_client": "SCCM client info query runtime",
+    "total": "Agent plugin runtime",
+}
+
+# WMI classes of the SCCM client reported in SCCM_QUERY_DURATION lines -> metric name suffix and
+# label
+_SCCM_QUERY_CLASSES = {
+    "CCM_SoftwareUpdate": ("software_update", "SCCM software update query"),
+    "CCM_InstalledComponent": ("installed_component", "SCCM installed component query"),
+    "CCM_PolicyAgent_Configuration": (
+        "policy_agent_configuration",
+        "SCCM policy agent configuration query",
+    ),
+}
+
+# Number of distinct ignore pattern lists (one per rule, typically) kept compiled per process
+_IGNORE_MATCHER_CACHE_SIZE = 128
+
+_REGEX_SPECIAL_CHARS = frozenset(".^$*+?{}[]\\|()")
+
+
+@lru_cache(maxsize=_IGNORE_MATCHER_CACHE_SIZE)
+def _compile_ignore_patterns(patterns: tuple[str, ...]) -> Callable[[str], Optional[str]]:
+    """Build a matcher returning the ignore pattern that matches a title, or None.
+
+    Plain-text patterns are matched by substring search, which is much cheaper than running
+    them through the regex engine. The remaining regexes are searched one by one: a combined
+    alternation is no faster for the few regexes left, cannot hold patterns with
+    backreferences or inline global flags such as "(?i)", and does not tell which pattern
+    matched.
+    """
+    literals = tuple(
+        pattern for pattern in patterns if _REGEX_SPECIAL_CHARS.isdisjoint(pattern)
+    )
+    regexes = tuple(
+        re.compile(pattern)
+        for pattern in patterns
+        if not _REGEX_SPECIAL_CHARS.isdisjoint(pattern)
+    )
+
+    def match(title: str) -> Optional[str]:
+        for literal in literals:
+            if literal in title:
+                return literal
+        for regex in regexes:
+            if regex.search(title):
+                return regex.pattern
+        return None
+
+    return match
+
+
+# Number of (pattern set, update title) verdicts kept per process. Titles repeat across the
+# fleet, so after warm-up classifying an update is a single cache lookup.
+_IGNORE_VERDICT_CACHE_SIZE = 32768
+
+
+@lru_cache(maxsize=_IGNORE_VERDICT_CACHE_SIZE)
+def _ignore_verdict(matcher: Callable[[str], Optional[str]], title: str) -> Optional[str]:
+    """Return the ignore pattern matching the title, memoized per pattern set.
+
+    The matcher object identifies the pattern set: a changed pattern list yields a different
+    matcher and thus never reuses verdicts of the old one. Hit and miss counters are available
+    via _ignore_verdict.cache_info().
+    """
+    return matcher(title)
+
+
+_SNAPSHOT_GAP_MESSAGE = (
+    "Update list incomplete, an agent run was missed. Waiting for the next full snapshot."
+)
+_SNAPSHOT_UNSUPPORTED_MESSAGE = (
+    "Not available with the delta encoded update list, see the service \"Windows update\". "
+    "Disable the full snapshot interval of the agent plug-in or remove this service."
+)
+
+
 def check_ms_win_update_v2(params: Mapping[str, Any], section: Section) -> CheckResult:
+    if (resolved := _resolve_snapshot(section, get_value_store())) is None:
+        yield Result(state=State.UNKNOWN, summary=_SNAPSHOT_GAP_MESSAGE)
+        return
+    section = resolved
+
     # Check SCCM client status first if SCCM monitoring is enabled
     if section.sccm_client_info and params.get("monitor_sccm_client", True):
         sccm_info = section.sccm_client_info
@@ -214,30 +770,106 @@ def check_ms_win_update_v2(params: Mapping[str, Any], section: Section) -> Check
                 notice=client_details
             )
 
+    # Sources whose data is incomplete. Their counts are reported without metrics, so graphs do
+    # not drop to zero for a run in which a source could not be collected.
+    incomplete_sources = {
+        source for source, status in section.source_status.items() if status != "ok"
+    }
+    source_status_states = params.get("source_status", {})
+    for source, status in sorted(section.source_status.items()):
+        if (message := _SOURCE_STATUS_MESSAGES.get(status)) is None:
+            continue
+        yield Result(
+            state=State(source_status_states.get(status, _SOURCE_STATUS_DEFAULT_STATES[status])),
+            summary=f"{_SOURCE_TITLES.get(source, source)}: {message}",
+        )
+
+    # Age of the data per source. The agent plug-in usually runs asynchronously and may reuse
+    # an older Windows Update search result.
+    now = time.time()
+    for source, timestamp in sorted(section.source_timestamps.items()):
+        if section.source_status.get(source) not in ("ok", "partial"):
+            continue
+        metric_source = _SOURCE_METRIC_NAMES.get(source, source.lower())
+        yield from check_levels(
+            max(now - timestamp, 0.0),
+            levels_upper=params.get("data_age"),
+            metric_name=f"ms_win_updates_data_age_{metric_source}",
+            label=f"{_SOURCE_TITLES.get(source, source)} data age",
+            render_func=render.timespan,
+            notice_only=True,
+        )
+
+    # Runtime of the agent plug-in, to find hosts where the collection itself is slow
+    runtime_levels = params.get("agent_runtime", {})
+    for phase, label in _AGENT_RUNTIME_PHASES.items():
+        if (runtime := section.agent_runtimes.get(phase)) is None:
+            continue
+        yield from check_levels(
+            runtime,
+            levels_upper=runtime_levels.get(phase),
+            metric_name=f"ms_win_update_agent_runtime_{phase}",
+            label=label,
+            render_func=render.timespan,
+            notice_only=True,
+        )
+
+    # Duration of each WMI query of the SCCM client, to find the class that makes it slow
+    for class_name, (metric_suffix, label) in _SCCM_QUERY_CLASSES.items():
+        if (duration := section.sccm_query_durations.get(class_name)) is None:
+            continue
+        yield from check_levels(
+            duration,
+            metric_name=f"ms_win_update_sccm_query_{metric_suffix}",
+            label=label,
+            render_func=render.timespan,
+            notice_only=True,
+        )
+
     # Filter updates based on ignore patterns
-    ignored_patterns_param = params.get("ignored_update_patterns", [])
-    compiled_patterns = [re.compile(pattern) for pattern in ignored_patterns_param]
-    
+    match_ignore_pattern = _compile_ignore_patterns(
+        tuple(params.get("ignored_update_patterns", ()))
+    )
+
     # Separate updates by source and apply filtering
     windows_pending = []
     windows_ignored = []
     sccm_pending = []
     sccm_ignored = []
     
+    critical_count = 0
+    reboot_count = 0
+    not_downloaded_count = 0
+    download_mb = 0.0
+    deadlines = []
+
     for update in section.updates:
-        is_ignored = any(pattern.search(update.title) for pattern in compiled_patterns)
-        
+        ignore_pattern = _ignore_verdict(match_ignore_pattern, update.title)
+
         if update.source == "WindowsUpdate":
-            if is_ignored:
-                windows_ignored.append(update)
-            else:
-                windows_pending.append(update)
+            if ignore_pattern is not None:
+                windows_ignored.append((update, ignore_pattern))
+                continue
+            windows_pending.append(update)
         elif update.source == "SCCM":
-            if is_ignored:
-                sccm_ignored.append(update)
-            else:
-                sccm_pending.append(update)
-    
+            if ignore_pattern is not None:
+                sccm_ignored.append((update, ignore_pattern))
+                continue
+            sccm_pending.append(update)
+        else:
+            continue
+
+        # Aggregate the pending update in the same pass
+        if update.severity and update.severity.lower() in _CRITICAL_SEVERITIES:
+            critical_count += 1
+        if update.reboot_required:
+            reboot_count += 1
+        if update.is_downloaded is False:
+            not_downloaded_count += 1
+            download_mb += update.size_mb or 0.0
+        if update.deadline is not None:
+            deadlines.append(update.deadline)
+
     total_pending = len(windows_pending) + len(sccm_pending)
     total_ignored = len(windows_ignored) + len(sccm_ignored)
     
@@ -250,88 +882,393 @@ def check_ms_win_update_v2(params: Mapping[str, Any], section: Section) -> Check
     yield from check_levels(
         total_pending,
         levels_upper=update_count_params,
-        metric_name="ms_win_updates_pending",
+        metric_name=None if incomplete_sources else "ms_win_updates_pending",
         label="Total pending",
         render_func=int,
     )
     
     # Windows Update specific count
+    windows_complete = "WindowsUpdate" not in incomplete_sources
     if windows_count_params and len(windows_pending) > 0:
         yield from check_levels(
             len(windows_pending),
             levels_upper=windows_count_params,
-            metric_name="ms_win_updates_windows_pending",
+            metric_name="ms_win_updates_windows_pending" if windows_complete else None,
             label="Windows Update pending",
             render_func=int,
         )
-    else:
+    elif windows_complete:
         yield Metric(name="ms_win_updates_windows_pending", value=len(windows_pending))
     
     # SCCM specific count
+    sccm_complete = "SCCM" not in incomplete_sources
     if sccm_count_params and len(sccm_pending) > 0:
         yield from check_levels(
             len(sccm_pending),
             levels_upper=sccm_count_params,
-            metric_name="ms_win_updates_sccm_pending",
+            metric_name="ms_win_updates_sccm_pending" if sccm_complete else None,
             label="SCCM pending",
             render_func=int,
         )
-    else:
+    elif sccm_complete:
         yield Metric(name="ms_win_updates_sccm_pending", value=len(sccm_pending))
     
-    # Ignored updates metric
-    if total_ignored > 0:
-        yield Metric(name="ms_win_updates_ignored", value=total_ignored)
-    else:
-        yield Metric(name="ms_win_updates_ignored", value=0)
-
     # Check for critical updates (security updates, etc.)
-    critical_updates = [u for u in windows_pending + sccm_pending 
-                      if u.severity and u.severity.lower() in ['critical', 'important']]
-    
-    if critical_updates and params.get("alert_on_critical", False):
+    if critical_count and params.get("alert_on_critical", False):
         yield Result(
             state=State.WARN,
-            summary=f"{len(critical_updates)} critical/important updates pending"
+            summary=f"{critical_count} critical/important updates pending"
         )
 
     # Check for updates requiring reboot
-    reboot_updates = [u for u in windows_pending + sccm_pending 
-                     if u.reboot_required]
-    
-    if reboot_updates:
+    if reboot_count:
         yield Result(
             state=State.OK,
-            notice=f"{len(reboot_updates)} updates require reboot"
+            notice=f"{reboot_count} updates require reboot"
         )
 
-    # Build detailed output
-    result_details = []
-    
-    if windows_pending:
-        result_details.append("Windows Update - Pending:\n" + 
-            "\n".join(f"  • {_format_update_details(update)}" for update in windows_pending))
-    
-    if sccm_pending:
-        result_details.append("SCCM - Pending:\n" + 
-            "\n".join(f"  • {_format_update_details(update)}" for update in sccm_pending))
-    
-    if windows_ignored:
-        result_details.append("Windows Update - Ignored:\n" + 
-            "\n".join(f"  • {update.title}" for update in windows_ignored))
-    
-    if sccm_ignored:
-        result_details.append("SCCM - Ignored:\n" + 
-            "\n".join(f"  • {update.title}" for update in sccm_ignored))
+    # Pending updates that still have to be downloaded
+    if not_downloaded_count:
+        yield Result(
+            state=State.OK,
+            notice=f"{not_downloaded_count} updates not yet downloaded ({download_mb:.2f}MB)"
+        )
+
+    # The aggregates cover all sources, so like the total they are not recorded as long as one
+    # of them is incomplete
+    if not incomplete_sources:
+        yield Metric(name="ms_win_updates_ignored", value=total_ignored)
+        yield Metric(name="ms_win_updates_critical", value=critical_count)
+        yield Metric(name="ms_win_updates_reboot", value=reboot_count)
+        yield Metric(name="ms_win_updates_not_downloaded", value=not_downloaded_count)
+        yield Metric(name="ms_win_updates_download_mb", value=round(download_mb, 2))
+
+    # Deployment deadlines of the pending updates
+    if deadlines:
+        yield from _check_deadlines(params, deadlines, now, metrics=not incomplete_sources)
 
-    if result_details:
+    # Since when the updates are pending. With incomplete data, the stored state is kept as it
+    # is, as the updates of the missing source would be forgotten otherwise.
+    if not incomplete_sources:
+        yield from _check_pending_age(
+            params, itertools.chain(windows_pending, sccm_pending), get_value_store(), now
+        )
+
+    # KBs that must not be pending (e.g. during out-of-band patch campaigns) and KBs whose state
+    # is reported individually. Ignore patterns do not apply to them.
+    for kb in params.get("forbidden_pending_kbs", ()):
+        if forbidden := section.updates_by_kb.get(_normalize_kb(kb)):
+            yield Result(
+                state=State.CRIT,
+                summary=f"KB{_normalize_kb(kb)} must not be pending ({_format_sources(forbidden)})",
+            )
+
+    for kb in params.get("tracked_kbs", ()):
+        if tracked := section.updates_by_kb.get(_normalize_kb(kb)):
+            yield Result(
+                state=State.OK,
+                notice=f"KB{_normalize_kb(kb)}: pending ({_format_sources(tracked)})",
+            )
+        else:
+            yield Result(state=State.OK, notice=f"KB{_normalize_kb(kb)}: not pending")
+
+    # Build detailed output, most relevant updates first and bounded by the configured limits
+    max_listed_updates = params.get("max_listed_updates")
+    if max_listed_updates == 0 or not (windows_pending or sccm_pending or total_ignored):
+        return
+
+    details = _render_details(
+        [
+            ("Windows Update - Pending:", windows_pending, _update_display_order,
+             _format_update_details),
+            ("SCCM - Pending:", sccm_pending, _update_display_order, _format_update_details),
+            ("Windows Update - Ignored:", windows_ignored, _ignored_display_order,
+             _format_ignored_entry),
+            ("SCCM - Ignored:", sccm_ignored, _ignored_display_order, _format_ignored_entry),
+        ],
+        max_listed_updates,
+        params.get("max_details_size"),
+    )
+    if details:
         yield Result(
             state=State.OK,
             notice=" ",
-            details="\n\n".join(result_details),
+            details=details,
         )
 
 
+_SEVERITY_RANK = {"critical": 0, "important": 1, "moderate": 2, "low": 3}
+
+
+def _update_display_order(update: WindowsUpdate) -> tuple[int, float]:
+    """Sort key listing the most severe, then the largest updates first."""
+    return (
+        _SEVERITY_RANK.get((update.severity or "").lower(), len(_SEVERITY_RANK)),
+        -(update.size_mb or 0.0),
+    )
+
+
+def _ignored_display_order(entry: tuple[WindowsUpdate, str]) -> tuple[int, float]:
+    return _update_display_order(entry[0])
+
+
+def _render_details(
+    groups: list[tuple[str, list[Any], Callable[[Any], Any], Callable[[Any], str]]],
+    max_listed_updates: Optional[int],
+    max_details_size: Optional[int],
+) -> str:
+    """Render the non-empty update groups for the service details.
+
+    At most max_listed_updates entries are listed per group, and the text never exceeds
+    max_details_size bytes. The headings, the separators between the groups and a "+N more"
+    line per group are reserved first; groups for which this does not fit are left out, from
+    the last one. The rest is shared evenly between the groups in the given order, and what a
+    group does not use (including its "+N more" line if all entries are listed) is passed on to
+    the following ones. Entries that are not listed are never formatted.
+    """
+    groups = [group for group in groups if group[1]]
+    available = float("inf")
+    # Size of the "+N more" line of each group, with its line break, if no entry is listed
+    more_sizes = []
+    if max_details_size is not None:
+        more_sizes = [len(f"\n  +{len(group[1])} more") for group in groups]
+        # Headings, "+N more" lines and the "\n\n" separators between the blocks
+        reserved = sum(len(group[0].encode("utf-8")) for group in groups)
+        reserved += sum(more_sizes) + 2 * (len(groups) - 1)
+        while groups and reserved > max_details_size:
+            heading = groups.pop()[0]
+            reserved -= len(heading.encode("utf-8")) + more_sizes.pop() + 2
+        available = max_details_size - reserved
+
+    blocks = []
+    for index, (heading, entries, sort_key, format_entry) in enumerate(groups):
+        if max_listed_updates is not None and max_listed_updates < len(entries):
+            listed = heapq.nsmallest(max_listed_updates, entries, key=sort_key)
+        else:
+            listed = sorted(entries, key=sort_key)
+
+        share = available / (len(groups) - index)
+        used = 0
+        lines = [heading]
+        for entry in listed:
+            line = f"  • {format_entry(entry)}"
+            if max_details_size is not None:
+                size = len(line.encode("utf-8")) + 1  # with the preceding line break
+                if used + size > share:
+                    break
+                used += size
+            lines.append(line)
+        available -= used
+
+        if hidden := len(entries) - (len(lines) - 1):
+            lines.append(f"  +{hidden} more")
+        elif more_sizes:
+            # The reserved "+N more" line is not needed
+            available += more_sizes[index]
+        blocks.append("\n".join(lines))
+
+    return "\n\n".join(blocks)
+
+
+def _comparable_sources(section: Section) -> set[str]:
+    """Return the sources whose pending updates are complete enough to compare between nodes."""
+    sccm_running = section.sccm_client_info is not None and (
+        section.sccm_client_info.status == "Running"
+    )
+    return {
+        source
+        for source, status in section.source_status.items()
+        if status == "ok" and (source != "SCCM" or sccm_running)
+    }
+
+
+def cluster_check_ms_win_update_v2(
+    params: Mapping[str, Any], section: Mapping[str, Optional[Section]]
+) -> CheckResult:
+    """Check the merged updates of all cluster nodes and flag nodes lagging behind the others.
+
+    Updates are deduplicated by source and KB (or title, if there is no KB). A node lags behind
+    if updates are pending on it that are not pending on another node. Only sources that were
+    collected completely on both nodes are compared, as an update missing from an incomplete
+    source or from a node without a running SCCM client is not installed.
+    """
+    value_store = get_value_store()
+    node_sections = {}
+    for node, node_section in section.items():
+        if not node_section:
+            continue
+        resolved = _resolve_snapshot(node_section, value_store, f"snapshot.{node}")
+        if resolved is None:
+            yield Result(state=State.UNKNOWN, summary=f"[{node}] {_SNAPSHOT_GAP_MESSAGE}")
+            continue
+        node_sections[node] = resolved
+    if not node_sections:
+        return
+
+    match_ignore_pattern = _compile_ignore_patterns(
+        tuple(params.get("ignored_update_patterns", ()))
+    )
+
+    merged: dict[tuple[str, str], WindowsUpdate] = {}
+    source_status: dict[str, str] = {}
+    source_timestamps: dict[str, int] = {}
+    pending_keys_by_node: dict[str, set[tuple[str, str]]] = {}
+    pending_nodes_by_key: Counter[tuple[str, str]] = Counter()
+    comparable_nodes_by_source: Counter[str] = Counter()
+    for node, node_section in node_sections.items():
+        # A source counts as incomplete if it is incomplete on any node, and is as old as its
+        # oldest data
+        for source, status in node_section.source_status.items():
+            if source_status.get(source, "ok") == "ok":
+                source_status[source] = status
+        for source, timestamp in node_section.source_timestamps.items():
+            source_timestamps[source] = min(timestamp, source_timestamps.get(source, timestamp))
+
+        comparable_sources = _comparable_sources(node_section)
+        comparable_nodes_by_source.update(comparable_sources)
+        pending_keys = set()
+        for update in node_section.updates:
+            key = (update.source, update.kb or update.title)
+            merged.setdefault(key, update)
+            if _ignore_verdict(match_ignore_pattern, update.title) is None:
+                pending_keys.add(key)
+        pending_keys_by_node[node] = pending_keys
+        pending_nodes_by_key.update(key for key in pending_keys if key[0] in comparable_sources)
+
+    merged_updates = tuple(merged.values())
+    windows_update_count = sum(1 for update in merged_updates if update.source == "WindowsUpdate")
+    yield from check_ms_win_update_v2(
+        params,
+        Section(
+            updates=merged_updates,
+            windows_update_count=windows_update_count,
+            sccm_update_count=len(merged_updates) - windows_update_count,
+            total_count=len(merged_updates),
+            source_status=source_status,
+            source_timestamps=source_timestamps,
+        ),
+    )
+
+    lagging_nodes = []
+    for node, pending_keys in sorted(pending_keys_by_node.items()):
+        yield Result(state=State.OK, notice=f"[{node}] Pending: {len(pending_keys)}")
+
+        sccm_info = node_sections[node].sccm_client_info
+        if (
+            sccm_info
+            and params.get("monitor_sccm_client", True)
+            and sccm_info.status not in ("Running", "NotInstalled")
+        ):
+            yield Result(
+                state=State.WARN, notice=f"[{node}] SCCM client status: {sccm_info.status}"
+            )
+
+        comparable_sources = _comparable_sources(node_sections[node])
+        if behind := sum(
+            1
+            for key in pending_keys
+            if key[0] in comparable_sources
+            and pending_nodes_by_key[key] < comparable_nodes_by_source[key[0]]
+        ):
+            lagging_nodes.append(f"{node} ({behind} not pending on other nodes)")
+
+    if lagging_nodes:
+        yield Result(
+            state=State(params.get("cluster_lagging_node_state", State.WARN.value)),
+            summary=f"Nodes lagging behind: {', '.join(lagging_nodes)}",
+        )
+
+
+def _check_deadlines(
+    params: Mapping[str, Any], deadlines: Sequence[int], now: float, metrics: bool = True
+) -> CheckResult:
+    upcoming = [deadline for deadline in deadlines if deadline > now]
+    overdue_count = len(deadlines) - len(upcoming)
+
+    if upcoming:
+        yield from check_levels(
+            min(upcoming) - now,
+            levels_lower=params.get("deadline_nearest"),
+            metric_name="ms_win_updates_deadline_nearest" if metrics else None,
+            label="Nearest deadline in",
+            render_func=render.timespan,
+            notice_only=True,
+        )
+
+    yield from check_levels(
+        overdue_count,
+        levels_upper=params.get("deadline_overdue_count"),
+        metric_name="ms_win_updates_overdue" if metrics else None,
+        label="Overdue deployments",
+        render_func=int,
+        notice_only=not overdue_count,
+    )
+    if overdue_count:
+        yield from check_levels(
+            now - min(deadlines),
+            levels_upper=params.get("deadline_overdue_age"),
+            metric_name="ms_win_updates_overdue_age" if metrics else None,
+            label="Oldest deadline overdue by",
+            render_func=render.timespan,
+        )
+    elif metrics:
+        yield Metric(name="ms_win_updates_overdue_age", value=0)
+
+
+def _pending_since_key(update: WindowsUpdate) -> str:
+    # Short, stable key of an update in the value store
+    return hashlib.blake2b(
+        f"{update.source}\x1f{update.kb or update.title}".encode(), digest_size=8
+    ).hexdigest()
+
+
+def _check_pending_age(
+    params: Mapping[str, Any],
+    pending: Iterable[WindowsUpdate],
+    value_store: MutableMapping[str, Any],
+    now: float,
+) -> CheckResult:
+    """Report since when the pending updates are pending.
+
+    The value store maps a key per pending update to the time it was first seen as pending.
+    Updates that are no longer pending are dropped, so the stored state never holds more
+    entries than there are pending updates.
+    """
+    previous: Mapping[str, int] = value_store.get("pending_since", {})
+    first_seen = int(now)
+    pending_since = {}
+    for update in pending:
+        key = _pending_since_key(update)
+        pending_since[key] = previous.get(key, first_seen)
+    value_store["pending_since"] = pending_since
+
+    if not pending_since:
+        yield Metric(name="ms_win_updates_pending_age_oldest", value=0)
+        yield Metric(name="ms_win_updates_pending_age_median", value=0)
+        return
+
+    yield from check_levels(
+        now - min(pending_since.values()),
+        levels_upper=params.get("pending_age_oldest"),
+        metric_name="ms_win_updates_pending_age_oldest",
+        label="Oldest pending for",
+        render_func=render.timespan,
+        notice_only=True,
+    )
+    yield from check_levels(
+        now - statistics.median(pending_since.values()),
+        levels_upper=params.get("pending_age_median"),
+        metric_name="ms_win_updates_pending_age_median",
+        label="Median pending for",
+        render_func=render.timespan,
+        notice_only=True,
+    )
+
+
+def _format_sources(updates: Iterable[WindowsUpdate]) -> str:
+    return ", ".join(sorted({update.source for update in updates}))
+
+
 def _format_update_details(update: WindowsUpdate) -> str:
     """Format update details for display."""
     details = update.title
@@ -347,8 +1284,8 @@ def _format_update_details(update: WindowsUpdate) -> str:
         info_parts.append(f"Downloaded: {'Yes' if update.is_downloaded else 'No'}")
     if update.reboot_required:
         info_parts.append("Reboot required")
-    if update.deadline:
-        info_parts.append(f"Deadline: {update.deadline}")
+    if update.deadline is not None:
+        info_parts.append(f"Deadline: {render.datetime(update.deadline)}")
     
     if info_parts:
         details += f" ({', '.join(info_parts)})"
@@ -356,21 +1293,61 @@ def _format_update_details(update: WindowsUpdate) -> str:
     return details
 
 
+def _format_ignored_entry(entry: tuple[WindowsUpdate, str]) -> str:
+    """Format an ignored update together with the pattern that caused it to be ignored."""
+    update, pattern = entry
+    return f"{update.title} (ignored by pattern: {pattern})"
+
+
+# Current agents send a tab separated section ("<<<ms_win_update_v2:sep(9)>>>") starting with a
+# FORMAT_VERSION line. The legacy whitespace split format is still accepted.
 agent_section_ms_win_update_v2 = AgentSection(
     name="ms_win_update_v2",
     parse_function=parse_ms_win_update_v2,
 )
 
 
+_CHECK_DEFAULT_PARAMETERS = {
+    "update_count": ("fixed", (1.0, 5.0)),
+    # Conservative, so that only an agent plug-in that stopped reporting is flagged, not a
+    # reused search result or an agent plug-in running once a day
+    "data_age": ("fixed", (86400.0, 172800.0)),
+    "monitor_sccm_client": True,
+    "alert_on_critical": False,
+    # Keep the service details of hosts with hundreds of pending SCCM updates small
+    "max_listed_updates": 20,
+    "max_details_size": 16000,
+}
+
+
 check_plugin_ms_win_update_v2 = CheckPlugin(
     name="ms_win_update_v2",
     service_name="Windows update",
     discovery_function=discover_ms_win_update_v2,
     check_function=check_ms_win_update_v2,
+    cluster_check_function=cluster_check_ms_win_update_v2,
     check_ruleset_name="ms_win_update_v2",
-    check_default_parameters={
-        "update_count": ("fixed", (1.0, 5.0)),
-        "monitor_sccm_client": True,
-        "alert_on_critical": False,
-    },
+    check_default_parameters=_CHECK_DEFAULT_PARAMETERS,
+)
+
+
+# The services per source and classification are for thresholds of their own. Without a rule, they
+# must not alert on the count: definition updates, for example, are pending most of the time.
+_SERVICES_DEFAULT_PARAMETERS = {
+    **_CHECK_DEFAULT_PARAMETERS,
+    "update_count": ("no_levels", None),
+}
+
+
+# Optional services per source and per classification, in addition to the main service
+check_plugin_ms_win_update_v2_services = CheckPlugin(
+    name="ms_win_update_v2_services",
+    sections=["ms_win_update_v2"],
+    service_name="Windows update %s",
+    discovery_function=discover_ms_win_update_v2_services,
+    discovery_ruleset_name="ms_win_update_v2_discovery",
+    discovery_default_parameters={},
+    check_function=check_ms_win_update_v2_services,
+    check_ruleset_name="ms_win_update_v2_services",
+    check_default_parameters=_SERVICES_DEFAULT_PARAMETERS,
 )
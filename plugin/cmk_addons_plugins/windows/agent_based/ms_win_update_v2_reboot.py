@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; py-indent-offset: 4; max-line-length: 100 -*-
+
+# Copyright (C) 2025  Christopher Pommer <cp.software@outlook.de>
+# Enhanced with SCCM support by Mario Fellner <mario.fellner@outlook.at>
+
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+####################################################################################################
+# CHECKMK CHECK PLUG-IN: Microsoft Windows Update with SCCM Support (pending reboot)
+#
+# This plug-in generates the Checkmk service for pending reboots reported by Windows and the
+# SCCM client.
+####################################################################################################
+
+from collections.abc import Mapping
+from typing import Any, Optional
+
+from cmk.agent_based.v2 import (
+    AgentSection,
+    CheckPlugin,
+    CheckResult,
+    DiscoveryResult,
+    Result,
+    Service,
+    State,
+    StringTable,
+)
+
+# Marker -> True if a reboot is pending, None if the agent plug-in could not determine it
+Section = Mapping[str, Optional[bool]]
+
+# Lines of the agent section -> (marker, title)
+_MARKERS: Mapping[str, tuple[str, str]] = {
+    "CBS_REBOOT_PENDING": ("cbs", "Component Based Servicing"),
+    "WU_REBOOT_REQUIRED": ("windows_update", "Windows Update"),
+    "PENDING_FILE_RENAME": ("pending_file_rename", "pending file rename operations"),
+    "SCCM_REBOOT_PENDING": ("sccm", "SCCM client"),
+    "SCCM_HARD_REBOOT_PENDING": ("sccm_hard", "SCCM client (enforced by deadline)"),
+}
+
+# File rename operations are also scheduled by many installers that do not need a reboot
+_DEFAULT_MARKER_STATES = {
+    "cbs": State.WARN.value,
+    "windows_update": State.WARN.value,
+    "pending_file_rename": State.OK.value,
+    "sccm": State.WARN.value,
+    "sccm_hard": State.WARN.value,
+}
+
+
+def parse_ms_win_update_v2_reboot(string_table: StringTable) -> Section:
+    section: dict[str, Optional[bool]] = {}
+    for row in string_table:
+        if len(row) < 2 or (marker := _MARKERS.get(row[0])) is None:
+            continue
+        value = row[1].lower()
+        section[marker[0]] = None if value not in ("true", "false") else value == "true"
+    return section
+
+
+def discover_ms_win_update_v2_reboot(section: Section) -> DiscoveryResult:
+    if section:
+        yield Service()
+
+
+def check_ms_win_update_v2_reboot(params: Mapping[str, Any], section: Section) -> CheckResult:
+    marker_states = params.get("marker_states", {})
+    pending = []
+    for marker, title in _MARKERS.values():
+        if marker not in section:
+            continue
+        if (reboot_pending := section[marker]) is None:
+            yield Result(state=State.UNKNOWN, notice=f"Reboot state of {title} unknown")
+            continue
+        if reboot_pending:
+            pending.append(title)
+            yield Result(
+                state=State(marker_states.get(marker, _DEFAULT_MARKER_STATES[marker])),
+                notice=f"Reboot pending: {title}",
+            )
+
+    if pending:
+        yield Result(state=State.OK, summary=f"Reboot pending ({', '.join(pending)})")
+    else:
+        yield Result(state=State.OK, summary="No reboot pending")
+
+
+agent_section_ms_win_update_v2_reboot = AgentSection(
+    name="ms_win_update_v2_reboot",
+    parse_function=parse_ms_win_update_v2_reboot,
+)
+
+
+check_plugin_ms_win_update_v2_reboot = CheckPlugin(
+    name="ms_win_update_v2_reboot",
+    service_name="Windows reboot pending",
+    discovery_function=discover_ms_win_update_v2_reboot,
+    check_function=check_ms_win_update_v2_reboot,
+    check_ruleset_name="ms_win_update_v2_reboot",
+    check_default_parameters={},
+)
@@ -32,12 +32,15 @@ from cmk.graphing.v1.metrics import (
     DecimalNotation,
     Metric,
     StrictPrecision,
+    TimeNotation,
     Unit,
     WarningOf,
 )
 from cmk.graphing.v1.perfometers import Closed, Open, FocusRange, Perfometer
 
 UNIT_COUNTER = Unit(DecimalNotation(""), StrictPrecision(0))
+UNIT_MEGABYTES = Unit(DecimalNotation("MB"), StrictPrecision(2))
+UNIT_SECONDS = Unit(TimeNotation())
 
 # --------------------------------------------------------------------------------------------------
 # Microsoft Windows Update with SCCM Support
@@ -71,6 +74,132 @@ metric_ms_win_updates_ignored = Metric(
     color=Color.DARK_GRAY,
 )
 
+metric_ms_win_updates_critical = Metric(
+    name="ms_win_updates_critical",
+    title=Title("Critical/Important Pending Updates"),
+    unit=UNIT_COUNTER,
+    color=Color.RED,
+)
+
+metric_ms_win_updates_reboot = Metric(
+    name="ms_win_updates_reboot",
+    title=Title("Pending Updates Requiring Reboot"),
+    unit=UNIT_COUNTER,
+    color=Color.PURPLE,
+)
+
+metric_ms_win_updates_not_downloaded = Metric(
+    name="ms_win_updates_not_downloaded",
+    title=Title("Pending Updates Not Yet Downloaded"),
+    unit=UNIT_COUNTER,
+    color=Color.YELLOW,
+)
+
+metric_ms_win_updates_download_mb = Metric(
+    name="ms_win_updates_download_mb",
+    title=Title("Pending Download Size"),
+    unit=UNIT_MEGABYTES,
+    color=Color.CYAN,
+)
+
+metric_ms_win_updates_deadline_nearest = Metric(
+    name="ms_win_updates_deadline_nearest",
+    title=Title("Time Until Nearest Deployment Deadline"),
+    unit=UNIT_SECONDS,
+    color=Color.PURPLE,
+)
+
+metric_ms_win_updates_overdue = Metric(
+    name="ms_win_updates_overdue",
+    title=Title("Overdue Deployments"),
+    unit=UNIT_COUNTER,
+    color=Color.RED,
+)
+
+metric_ms_win_updates_overdue_age = Metric(
+    name="ms_win_updates_overdue_age",
+    title=Title("Oldest Deployment Deadline Overdue By"),
+    unit=UNIT_SECONDS,
+    color=Color.DARK_RED,
+)
+
+metric_ms_win_updates_pending_age_oldest = Metric(
+    name="ms_win_updates_pending_age_oldest",
+    title=Title("Oldest Pending Update Age"),
+    unit=UNIT_SECONDS,
+    color=Color.BROWN,
+)
+
+metric_ms_win_updates_pending_age_median = Metric(
+    name="ms_win_updates_pending_age_median",
+    title=Title("Median Pending Update Age"),
+    unit=UNIT_SECONDS,
+    color=Color.YELLOW,
+)
+
+metric_ms_win_updates_data_age_windows_update = Metric(
+    name="ms_win_updates_data_age_windows_update",
+    title=Title("Windows Update Data Age"),
+    unit=UNIT_SECONDS,
+    color=Color.BLUE,
+)
+
+metric_ms_win_updates_data_age_sccm = Metric(
+    name="ms_win_updates_data_age_sccm",
+    title=Title("SCCM Data Age"),
+    unit=UNIT_SECONDS,
+    color=Color.GREEN,
+)
+
+metric_ms_win_update_agent_runtime_wu = Metric(
+    name="ms_win_update_agent_runtime_wu",
+    title=Title("Agent Windows Update Search Runtime"),
+    unit=UNIT_SECONDS,
+    color=Color.BLUE,
+)
+
+metric_ms_win_update_agent_runtime_sccm_updates = Metric(
+    name="ms_win_update_agent_runtime_sccm_updates",
+    title=Title("Agent SCCM Update Query Runtime"),
+    unit=UNIT_SECONDS,
+    color=Color.GREEN,
+)
+
+metric_ms_win_update_agent_runtime_sccm_client = Metric(
+    name="ms_win_update_agent_runtime_sccm_client",
+    title=Title("Agent SCCM Client Info Query Runtime"),
+    unit=UNIT_SECONDS,
+    color=Color.LIGHT_GREEN,
+)
+
+metric_ms_win_update_agent_runtime_total = Metric(
+    name="ms_win_update_agent_runtime_total",
+    title=Title("Agent Plugin Runtime"),
+    unit=UNIT_SECONDS,
+    color=Color.ORANGE,
+)
+
+metric_ms_win_update_sccm_query_software_update = Metric(
+    name="ms_win_update_sccm_query_software_update",
+    title=Title("SCCM Software Update Query Duration"),
+    unit=UNIT_SECONDS,
+    color=Color.GREEN,
+)
+
+metric_ms_win_update_sccm_query_installed_component = Metric(
+    name="ms_win_update_sccm_query_installed_component",
+    title=Title("SCCM Installed Component Query Duration"),
+    unit=UNIT_SECONDS,
+    color=Color.PURPLE,
+)
+
+metric_ms_win_update_sccm_query_policy_agent_configuration = Metric(
+    name="ms_win_update_sccm_query_policy_agent_configuration",
+    title=Title("SCCM Policy Agent Configuration Query Duration"),
+    unit=UNIT_SECONDS,
+    color=Color.CYAN,
+)
+
 # Main graph showing all update sources
 graph_ms_win_updates_v2 = Graph(
     name="ms_win_updates_v2",
@@ -120,3 +249,79 @@ perfometer_ms_win_updates_sccm = Perfometer(
     focus_range=FocusRange(Closed(0), Open(10)),
     segments=["ms_win_updates_sccm_pending"],
 )
+
+# Graph of pending updates that need attention
+graph_ms_win_updates_attention = Graph(
+    name="ms_win_updates_attention",
+    title=Title("Windows Updates Needing Attention"),
+    simple_lines=[
+        "ms_win_updates_critical",
+        "ms_win_updates_reboot",
+        "ms_win_updates_not_downloaded",
+    ],
+)
+
+# Graph of the pending patch traffic
+graph_ms_win_updates_download = Graph(
+    name="ms_win_updates_download",
+    title=Title("Windows Updates Pending Download Size"),
+    compound_lines=["ms_win_updates_download_mb"],
+)
+
+# Graph of the overdue SCCM deployments
+graph_ms_win_updates_overdue_age = Graph(
+    name="ms_win_updates_overdue_age",
+    title=Title("Windows Updates Oldest Overdue Deployment"),
+    simple_lines=[
+        "ms_win_updates_overdue_age",
+        WarningOf("ms_win_updates_overdue_age"),
+        CriticalOf("ms_win_updates_overdue_age"),
+    ],
+)
+
+# Graph of how long updates are pending
+graph_ms_win_updates_pending_age = Graph(
+    name="ms_win_updates_pending_age",
+    title=Title("Windows Updates Pending Age"),
+    simple_lines=[
+        "ms_win_updates_pending_age_oldest",
+        "ms_win_updates_pending_age_median",
+        WarningOf("ms_win_updates_pending_age_oldest"),
+        CriticalOf("ms_win_updates_pending_age_oldest"),
+    ],
+)
+
+# Graph of the age of the collected data
+graph_ms_win_updates_data_age = Graph(
+    name="ms_win_updates_data_age",
+    title=Title("Windows Updates Data Age"),
+    simple_lines=[
+        "ms_win_updates_data_age_windows_update",
+        "ms_win_updates_data_age_sccm",
+    ],
+)
+
+# Graph of the agent plugin runtime per collection phase
+graph_ms_win_update_agent_runtime = Graph(
+    name="ms_win_update_agent_runtime",
+    title=Title("Windows Update Agent Plugin Runtime"),
+    simple_lines=[
+        "ms_win_update_agent_runtime_total",
+        "ms_win_update_agent_runtime_wu",
+        "ms_win_update_agent_runtime_sccm_updates",
+        "ms_win_update_agent_runtime_sccm_client",
+        WarningOf("ms_win_update_agent_runtime_total"),
+        CriticalOf("ms_win_update_agent_runtime_total"),
+    ],
+)
+
+# Graph of the duration of the WMI queries of the SCCM client
+graph_ms_win_update_sccm_query = Graph(
+    name="ms_win_update_sccm_query",
+    title=Title("SCCM Client Query Duration"),
+    simple_lines=[
+        "ms_win_update_sccm_query_software_update",
+        "ms_win_update_sccm_query_installed_component",
+        "ms_win_update_sccm_query_policy_agent_configuration",
+    ],
+)
@@ -27,6 +27,7 @@
 from cmk.rulesets.v1 import Help, Title
 from cmk.rulesets.v1.form_specs import (
     BooleanChoice,
+    DefaultValue,
     DictElement,
     Dictionary,
     InputHint,
@@ -35,14 +36,19 @@ from cmk.rulesets.v1.form_specs import (
     List,
     MatchingScope,
     RegularExpression,
+    ServiceState,
     SimpleLevels,
+    String,
+    TimeMagnitude,
+    TimeSpan,
 )
 from cmk.rulesets.v1.rule_specs import (
     CheckParameters,
+    HostAndItemCondition,
     HostCondition,
     Topic,
 )
-from cmk.rulesets.v1.form_specs.validators import LengthInRange
+from cmk.rulesets.v1.form_specs.validators import LengthInRange, MatchRegex, NumberInRange
 
 
 def _parameter_form_ms_win_update_v2() -> Dictionary:
@@ -126,6 +132,216 @@ def _parameter_form_ms_win_update_v2() -> Dictionary:
                     ),
                 ),
             ),
+            "forbidden_pending_kbs": DictElement(
+                parameter_form=List[str](
+                    title=Title("Must-Not-Be-Pending KBs"),
+                    help_text=Help(
+                        "The service goes CRIT if an update with one of these KB numbers is pending "
+                        "from any source, regardless of the ignored update patterns. Use this "
+                        "during emergency out-of-band patch campaigns."
+                    ),
+                    custom_validate=(LengthInRange(min_value=1),),
+                    element_template=String(
+                        title=Title("KB number"),
+                        custom_validate=(MatchRegex(regex=r"^\s*(?:[Kk][Bb])?\d+\s*$"),),
+                    ),
+                ),
+            ),
+            "tracked_kbs": DictElement(
+                parameter_form=List[str](
+                    title=Title("Tracked KBs"),
+                    help_text=Help(
+                        "Report for each of these KB numbers whether an update with this KB is "
+                        "still pending, and from which source."
+                    ),
+                    custom_validate=(LengthInRange(min_value=1),),
+                    element_template=String(
+                        title=Title("KB number"),
+                        custom_validate=(MatchRegex(regex=r"^\s*(?:[Kk][Bb])?\d+\s*$"),),
+                    ),
+                ),
+            ),
+            "deadline_nearest": DictElement(
+                parameter_form=SimpleLevels[float](
+                    title=Title("Time Until Nearest Deployment Deadline"),
+                    help_text=Help(
+                        "Set lower thresholds for the time left until the nearest deadline of a "
+                        "pending SCCM deployment."
+                    ),
+                    form_spec_template=TimeSpan(
+                        displayed_magnitudes=[TimeMagnitude.DAY, TimeMagnitude.HOUR],
+                    ),
+                    level_direction=LevelDirection.LOWER,
+                    prefill_fixed_levels=InputHint(value=(86400.0, 3600.0)),
+                ),
+            ),
+            "deadline_overdue_count": DictElement(
+                parameter_form=SimpleLevels[int](
+                    title=Title("Overdue Deployments"),
+                    help_text=Help(
+                        "Set upper thresholds for the number of pending SCCM deployments whose "
+                        "deadline has passed."
+                    ),
+                    form_spec_template=Integer(),
+                    level_direction=LevelDirection.UPPER,
+                    prefill_fixed_levels=InputHint(value=(1, 5)),
+                ),
+            ),
+            "deadline_overdue_age": DictElement(
+                parameter_form=SimpleLevels[float](
+                    title=Title("Oldest Overdue Deployment"),
+                    help_text=Help(
+                        "Set upper thresholds for how long the deadline of the oldest overdue SCCM "
+                        "deployment has passed."
+                    ),
+                    form_spec_template=TimeSpan(
+                        displayed_magnitudes=[TimeMagnitude.DAY, TimeMagnitude.HOUR],
+                    ),
+                    level_direction=LevelDirection.UPPER,
+                    prefill_fixed_levels=InputHint(value=(86400.0, 604800.0)),
+                ),
+            ),
+            "pending_age_oldest": DictElement(
+                parameter_form=SimpleLevels[float](
+                    title=Title("Age of the Oldest Pending Update"),
+                    help_text=Help(
+                        "Set upper thresholds for how long the oldest pending update has been "
+                        "pending. The age is counted from the first check that saw the update."
+                    ),
+                    form_spec_template=TimeSpan(
+                        displayed_magnitudes=[TimeMagnitude.DAY, TimeMagnitude.HOUR],
+                    ),
+                    level_direction=LevelDirection.UPPER,
+                    prefill_fixed_levels=InputHint(value=(2592000.0, 5184000.0)),
+                ),
+            ),
+            "pending_age_median": DictElement(
+                parameter_form=SimpleLevels[float](
+                    title=Title("Median Age of the Pending Updates"),
+                    help_text=Help(
+                        "Set upper thresholds for the median time the pending updates have been "
+                        "pending."
+                    ),
+                    form_spec_template=TimeSpan(
+                        displayed_magnitudes=[TimeMagnitude.DAY, TimeMagnitude.HOUR],
+                    ),
+                    level_direction=LevelDirection.UPPER,
+                    prefill_fixed_levels=InputHint(value=(1209600.0, 2592000.0)),
+                ),
+            ),
+            "data_age": DictElement(
+                parameter_form=SimpleLevels[float](
+                    title=Title("Data Age per Source"),
+                    help_text=Help(
+                        "Set upper thresholds for the age of the data of each source. The agent "
+                        "plugin usually runs asynchronously and may reuse an older Windows Update "
+                        "search result, so the data can be considerably older than the last check."
+                        "<br>The default values are 1 day (WARN) and 2 days (CRIT)."
+                    ),
+                    form_spec_template=TimeSpan(
+                        displayed_magnitudes=[TimeMagnitude.DAY, TimeMagnitude.HOUR],
+                    ),
+                    level_direction=LevelDirection.UPPER,
+                    prefill_fixed_levels=DefaultValue(value=(86400.0, 172800.0)),
+                ),
+            ),
+            "source_status": DictElement(
+                parameter_form=Dictionary(
+                    title=Title("State on Incomplete Data Collection"),
+                    help_text=Help(
+                        "The state if the agent plugin could not collect all data of a source. "
+                        "Counts of an incomplete source are still shown, but no metrics are "
+                        "recorded for them."
+                    ),
+                    elements={
+                        status: DictElement(
+                            parameter_form=ServiceState(
+                                title=title,
+                                prefill=DefaultValue(prefill),
+                            ),
+                        )
+                        for status, title, prefill in (
+                            ("partial", Title("Some queries failed"), ServiceState.WARN),
+                            ("timeout", Title("Time budget exceeded"), ServiceState.WARN),
+                            ("error", Title("Collection failed"), ServiceState.UNKNOWN),
+                        )
+                    },
+                ),
+            ),
+            "agent_runtime": DictElement(
+                parameter_form=Dictionary(
+                    title=Title("Agent Plugin Runtime"),
+                    help_text=Help(
+                        "Set upper thresholds for the runtime of the agent plugin, in total and per "
+                        "collection phase. This helps to find hosts where collecting the update "
+                        "information is a performance problem itself."
+                    ),
+                    elements={
+                        phase: DictElement(
+                            parameter_form=SimpleLevels[float](
+                                title=title,
+                                form_spec_template=TimeSpan(
+                                    displayed_magnitudes=[
+                                        TimeMagnitude.SECOND,
+                                        TimeMagnitude.MINUTE,
+                                    ],
+                                ),
+                                level_direction=LevelDirection.UPPER,
+                                prefill_fixed_levels=InputHint(value=prefill),
+                            ),
+                        )
+                        for phase, title, prefill in (
+                            ("wu", Title("Windows Update search"), (60.0, 180.0)),
+                            ("sccm_updates", Title("SCCM update query"), (30.0, 120.0)),
+                            ("sccm_client", Title("SCCM client info query"), (30.0, 120.0)),
+                            ("total", Title("Total runtime"), (120.0, 240.0)),
+                        )
+                    },
+                ),
+            ),
+            "cluster_lagging_node_state": DictElement(
+                parameter_form=ServiceState(
+                    title=Title("State if Cluster Nodes Lag Behind"),
+                    help_text=Help(
+                        "For clustered services: the state if updates are pending on a node that "
+                        "are not pending on another node of the cluster. Only sources collected "
+                        "completely on both nodes are compared, SCCM only with a running SCCM "
+                        "client."
+                    ),
+                    prefill=DefaultValue(ServiceState.WARN),
+                ),
+            ),
+            "max_listed_updates": DictElement(
+                parameter_form=Integer(
+                    title=Title("Maximum Listed Updates per Group"),
+                    help_text=Help(
+                        "Limit the number of updates listed in the service details for each group "
+                        "(pending and ignored, per source). Updates are listed by severity, then "
+                        "by download size. Updates beyond the limit are summarized as "
+                        '"+N more". Set to 0 to omit the update list from the service details.'
+                    ),
+                    prefill=DefaultValue(20),
+                    custom_validate=(NumberInRange(min_value=0),),
+                ),
+            ),
+            "max_details_size": DictElement(
+                parameter_form=Integer(
+                    title=Title("Maximum Size of Service Details"),
+                    help_text=Help(
+                        "Limit the size of the update list in the service details to keep the "
+                        "monitoring history and Livestatus responses small on hosts with many "
+                        'pending updates. Updates that do not fit are summarized as "+N more". '
+                        "The limit includes the group headings and the \"+N more\" lines. It is "
+                        "shared evenly between the groups, in the order Windows Update pending, "
+                        "SCCM pending, Windows Update ignored and SCCM ignored. Space a group "
+                        "does not need is passed on to the following groups. If not even the "
+                        "headings fit, the last groups are left out."
+                    ),
+                    unit_symbol="bytes",
+                    prefill=DefaultValue(16000),
+                    custom_validate=(NumberInRange(min_value=1),),
+                ),
+            ),
         },
     )
 
@@ -137,3 +353,43 @@ rule_spec_ms_win_update_v2 = CheckParameters(
     topic=Topic.OPERATING_SYSTEM,
     condition=HostCondition(),
 )
+
+
+# Parameters of the main service that do not apply to the services per source and
+# classification: they are not clustered and do not report the agent plugin runtime
+_MAIN_SERVICE_ONLY_PARAMETERS = frozenset(("agent_runtime", "cluster_lagging_node_state"))
+
+
+def _parameter_form_ms_win_update_v2_services() -> Dictionary:
+    form = _parameter_form_ms_win_update_v2()
+    return Dictionary(
+        title=form.title,
+        help_text=Help(
+            "Check parameters for the Windows update services per source and classification. "
+            "To use these services, you need to deploy the <b>Windows Updates v2</b> agent "
+            "plugin and enable them in the discovery rule."
+        ),
+        elements={
+            name: element
+            for name, element in form.elements.items()
+            if name not in _MAIN_SERVICE_ONLY_PARAMETERS
+        },
+    )
+
+
+rule_spec_ms_win_update_v2_services = CheckParameters(
+    name="ms_win_update_v2_services",
+    title=Title("Microsoft Windows Update with SCCM per Source and Classification"),
+    parameter_form=_parameter_form_ms_win_update_v2_services,
+    topic=Topic.OPERATING_SYSTEM,
+    condition=HostAndItemCondition(
+        item_title=Title("Source or classification"),
+        item_form=String(
+            help_text=Help(
+                "The source (<tt>via Windows Update</tt>, <tt>via SCCM</tt>) or the "
+                "classification (<tt>Security</tt>, <tt>Critical</tt>, <tt>Definition</tt>, "
+                "<tt>Driver</tt>, <tt>Feature Pack</tt>) of the service."
+            ),
+        ),
+    ),
+)
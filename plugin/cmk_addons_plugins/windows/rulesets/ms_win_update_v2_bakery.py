@@ -24,7 +24,7 @@
 # This file defines the deployment parameters for the ms_win_update_v2.ps1 agent plug-in.
 ####################################################################################################
 
-from cmk.rulesets.v1 import Title, Help
+from cmk.rulesets.v1 import Help, Label, Title
 from cmk.rulesets.v1.form_specs import (
     BooleanChoice,
     CascadingSingleChoice,
@@ -34,9 +34,15 @@ from cmk.rulesets.v1.form_specs import (
     Dictionary,
     FixedValue,
     InputHint,
+    Integer,
+    List,
+    SingleChoice,
+    SingleChoiceElement,
+    String,
     TimeMagnitude,
     TimeSpan,
 )
+from cmk.rulesets.v1.form_specs.validators import MatchRegex, NumberInRange
 
 from cmk.rulesets.v1.rule_specs import AgentConfig, Topic
 
@@ -106,6 +112,191 @@ def _valuespec_agent_config_ms_win_update_v2():
                                             prefill=InputHint(True),
                                         ),
                                     ),
+                                    "search_cache_max_age": DictElement(
+                                        parameter_form=TimeSpan(
+                                            title=Title("Reuse Windows Update Search Results"),
+                                            help_text=Help(
+                                                "The Windows Update search is the most expensive part "
+                                                "of the plugin. If configured, the plugin keeps the last "
+                                                "search result in the agent's state directory and reuses it "
+                                                "until Windows Update records a new detection or "
+                                                "installation, or until the result is older than the "
+                                                "configured age."
+                                            ),
+                                            displayed_magnitudes=[
+                                                TimeMagnitude.MINUTE,
+                                                TimeMagnitude.HOUR,
+                                                TimeMagnitude.DAY,
+                                            ],
+                                            prefill=DefaultValue(14400.0),
+                                        ),
+                                    ),
+                                    "search_update_type": DictElement(
+                                        parameter_form=SingleChoice(
+                                            title=Title("Windows Update Search: Update Type"),
+                                            help_text=Help(
+                                                "Restrict the Windows Update search to software "
+                                                "or driver updates. Updates that are not searched "
+                                                "for are not enumerated on the host at all, which "
+                                                "is cheaper than ignoring them in the check."
+                                            ),
+                                            elements=[
+                                                SingleChoiceElement(
+                                                    name="Software",
+                                                    title=Title("Software updates only"),
+                                                ),
+                                                SingleChoiceElement(
+                                                    name="Driver",
+                                                    title=Title("Driver updates only"),
+                                                ),
+                                            ],
+                                            prefill=DefaultValue("Software"),
+                                        ),
+                                    ),
+                                    "search_category_ids": DictElement(
+                                        parameter_form=List[str](
+                                            title=Title("Windows Update Search: Categories"),
+                                            help_text=Help(
+                                                "Restrict the Windows Update search to updates in "
+                                                "at least one of these categories, given by their "
+                                                "category ID, e.g. "
+                                                "<tt>0fa1201d-4330-4fa8-8ae9-b877473b6441</tt> for "
+                                                "security updates."
+                                            ),
+                                            element_template=String(
+                                                title=Title("Category ID"),
+                                                custom_validate=(
+                                                    MatchRegex(
+                                                        regex=r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-"
+                                                        r"[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$"
+                                                    ),
+                                                ),
+                                            ),
+                                        ),
+                                    ),
+                                    "search_browse_only": DictElement(
+                                        parameter_form=SingleChoice(
+                                            title=Title("Windows Update Search: Optional Updates"),
+                                            help_text=Help(
+                                                "Windows Update offers optional updates (like "
+                                                "preview releases) only for manual installation. "
+                                                "Choose whether to search for them."
+                                            ),
+                                            elements=[
+                                                SingleChoiceElement(
+                                                    name="exclude",
+                                                    title=Title("Exclude optional updates"),
+                                                ),
+                                                SingleChoiceElement(
+                                                    name="only",
+                                                    title=Title("Only optional updates"),
+                                                ),
+                                            ],
+                                            prefill=DefaultValue("exclude"),
+                                        ),
+                                    ),
+                                    "offline_search": DictElement(
+                                        parameter_form=BooleanChoice(
+                                            title=Title("Windows Update Search: Offline"),
+                                            help_text=Help(
+                                                "Search only the update metadata already present "
+                                                "on the host, without contacting Windows Update or "
+                                                "WSUS. Results then depend on the host's own "
+                                                "scheduled scans."
+                                            ),
+                                            prefill=InputHint(True),
+                                        ),
+                                    ),
+                                    "time_budgets": DictElement(
+                                        parameter_form=Dictionary(
+                                            title=Title("Time Budgets per Source"),
+                                            help_text=Help(
+                                                "Abandon the collection of a source if it takes "
+                                                "longer than this, so a hung Windows Update search "
+                                                "or WMI provider does not cost the data of the other "
+                                                "source. The source is then reported as timed out. "
+                                                "Keep the sum below the execution interval."
+                                            ),
+                                            elements={
+                                                source: DictElement(
+                                                    parameter_form=TimeSpan(
+                                                        title=title,
+                                                        displayed_magnitudes=[
+                                                            TimeMagnitude.SECOND,
+                                                            TimeMagnitude.MINUTE,
+                                                        ],
+                                                        prefill=DefaultValue(prefill),
+                                                    ),
+                                                )
+                                                for source, title, prefill in (
+                                                    ("windows_update", Title("Windows Update"), 180.0),
+                                                    ("sccm", Title("SCCM"), 60.0),
+                                                )
+                                            },
+                                        ),
+                                    ),
+                                    "full_snapshot_interval": DictElement(
+                                        parameter_form=Integer(
+                                            title=Title("Delta Encoded Update List"),
+                                            help_text=Help(
+                                                "Send the complete update list only every given "
+                                                "number of runs, and only the updates added or "
+                                                "removed since the previous run in between. This "
+                                                "reduces the section size on hosts with many SCCM "
+                                                "updates. If the monitoring server misses a run, "
+                                                "the service is UNKNOWN until the next complete "
+                                                "list, so the plugin is always run asynchronously "
+                                                "with this option, by default every 5 minutes. The "
+                                                "services per source and classification are not "
+                                                "available with a delta encoded update list. The "
+                                                "monitoring server stores the update list of each "
+                                                "host instead, which costs more than parsing the "
+                                                "complete list, so only use this option if the "
+                                                "agent output is transferred over a slow link."
+                                            ),
+                                            label=Label("Send the complete list every"),
+                                            unit_symbol="runs",
+                                            prefill=DefaultValue(12),
+                                            custom_validate=(NumberInRange(min_value=2),),
+                                        ),
+                                    ),
+                                    "reboot_probe": DictElement(
+                                        parameter_form=Dictionary(
+                                            title=Title("Deploy Pending Reboot Probe"),
+                                            help_text=Help(
+                                                "Deploy a separate, lightweight plugin that only "
+                                                "reads the pending reboot markers of Windows and "
+                                                "the SCCM client. It creates the service "
+                                                "<i>Windows reboot pending</i> and can run far more "
+                                                "often than the update search."
+                                            ),
+                                            elements={
+                                                "interval": DictElement(
+                                                    parameter_form=TimeSpan(
+                                                        title=Title("Run Asynchronously"),
+                                                        displayed_magnitudes=[
+                                                            TimeMagnitude.SECOND,
+                                                            TimeMagnitude.MINUTE,
+                                                            TimeMagnitude.HOUR,
+                                                        ],
+                                                        prefill=DefaultValue(60.0),
+                                                    ),
+                                                ),
+                                            },
+                                        ),
+                                    ),
+                                    "concurrent": DictElement(
+                                        parameter_form=BooleanChoice(
+                                            title=Title("Collect Sources Concurrently"),
+                                            help_text=Help(
+                                                "Query Windows Update and SCCM in parallel, so the "
+                                                "plugin runtime approaches that of the slowest source "
+                                                "instead of the sum of all sources. Disable this to "
+                                                "query the sources one after another."
+                                            ),
+                                            prefill=InputHint(True),
+                                        ),
+                                    ),
                                     "debug_mode": DictElement(
                                         parameter_form=BooleanChoice(
                                             title=Title("Enable Debug Mode"),
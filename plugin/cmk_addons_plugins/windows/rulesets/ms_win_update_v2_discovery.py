@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; py-indent-offset: 4; max-line-length: 100 -*-
+
+# Copyright (C) 2025  Christopher Pommer <cp.software@outlook.de>
+# Enhanced with SCCM support by Mario Fellner <mario.fellner@outlook.at>
+
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+####################################################################################################
+# CHECKMK RULESET: Microsoft Windows Update with SCCM Support (discovery)
+#
+# This file defines the discovery parameters for the optional services per update source and
+# per update classification.
+####################################################################################################
+
+from cmk.rulesets.v1 import Help, Title
+from cmk.rulesets.v1.form_specs import (
+    BooleanChoice,
+    DefaultValue,
+    DictElement,
+    Dictionary,
+    InputHint,
+    MultipleChoice,
+    MultipleChoiceElement,
+)
+from cmk.rulesets.v1.rule_specs import DiscoveryParameters, Topic
+
+
+def _migrate_per_classification(value: object) -> list[str]:
+    # Earlier versions of the rule enabled all classifications at once
+    if isinstance(value, bool):
+        return (
+            ["security", "critical", "definition", "driver", "feature_pack"] if value else []
+        )
+    assert isinstance(value, list)
+    return value
+
+
+def _parameter_form_ms_win_update_v2_discovery() -> Dictionary:
+    return Dictionary(
+        title=Title("Discovery Parameters"),
+        help_text=Help(
+            "In addition to the <b>Windows update</b> service, create separate services per "
+            "update source and per update classification. Each of them can get its own "
+            "thresholds via the rule <b>Microsoft Windows Update with SCCM per Source and "
+            "Classification</b>."
+        ),
+        elements={
+            "per_source": DictElement(
+                parameter_form=BooleanChoice(
+                    title=Title("Services per Source"),
+                    help_text=Help(
+                        "Create the services <tt>Windows update via Windows Update</tt> and "
+                        "<tt>Windows update via SCCM</tt> for the sources the agent plugin "
+                        "reports. The SCCM service is only created on hosts with an SCCM "
+                        "client."
+                    ),
+                    prefill=InputHint(True),
+                ),
+            ),
+            "per_classification": DictElement(
+                parameter_form=MultipleChoice(
+                    title=Title("Services per Classification"),
+                    help_text=Help(
+                        "Create one service each for the selected classifications. The "
+                        "classification is taken from the update categories, or from the title "
+                        "for SCCM updates."
+                    ),
+                    elements=[
+                        MultipleChoiceElement(name="security", title=Title("Security")),
+                        MultipleChoiceElement(name="critical", title=Title("Critical")),
+                        MultipleChoiceElement(name="definition", title=Title("Definition")),
+                        MultipleChoiceElement(name="driver", title=Title("Driver")),
+                        MultipleChoiceElement(name="feature_pack", title=Title("Feature Pack")),
+                    ],
+                    prefill=DefaultValue(["security", "critical"]),
+                    migrate=_migrate_per_classification,
+                ),
+            ),
+        },
+    )
+
+
+rule_spec_ms_win_update_v2_discovery = DiscoveryParameters(
+    name="ms_win_update_v2_discovery",
+    title=Title("Microsoft Windows Update with SCCM Services"),
+    parameter_form=_parameter_form_ms_win_update_v2_discovery,
+    topic=Topic.OPERATING_SYSTEM,
+)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; py-indent-offset: 4; max-line-length: 100 -*-
+
+# Copyright (C) 2025  Christopher Pommer <cp.software@outlook.de>
+# Enhanced with SCCM support by Mario Fellner <mario.fellner@outlook.at>
+
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+####################################################################################################
+# CHECKMK RULESET: Microsoft Windows Update with SCCM Support (pending reboot)
+#
+# This file defines the check plug-in parameters for the "Windows reboot pending" check.
+####################################################################################################
+
+from cmk.rulesets.v1 import Help, Title
+from cmk.rulesets.v1.form_specs import (
+    DefaultValue,
+    DictElement,
+    Dictionary,
+    ServiceState,
+)
+from cmk.rulesets.v1.rule_specs import (
+    CheckParameters,
+    HostCondition,
+    Topic,
+)
+
+
+def _parameter_form_ms_win_update_v2_reboot() -> Dictionary:
+    return Dictionary(
+        title=Title("Check Parameters"),
+        help_text=Help(
+            "Check parameters for pending reboots reported by Windows and the SCCM client. "
+            "To use this service, you need to deploy the pending reboot probe of the "
+            "<b>Windows Updates v2</b> agent plugin."
+        ),
+        elements={
+            "marker_states": DictElement(
+                parameter_form=Dictionary(
+                    title=Title("State per Reboot Marker"),
+                    help_text=Help(
+                        "The state if a reboot is pending according to the marker. Pending file "
+                        "rename operations are also scheduled by many installers that do not "
+                        "need a reboot, so they are OK by default."
+                    ),
+                    elements={
+                        marker: DictElement(
+                            parameter_form=ServiceState(
+                                title=title,
+                                prefill=DefaultValue(prefill),
+                            ),
+                        )
+                        for marker, title, prefill in (
+                            ("cbs", Title("Component Based Servicing"), ServiceState.WARN),
+                            ("windows_update", Title("Windows Update"), ServiceState.WARN),
+                            (
+                                "pending_file_rename",
+                                Title("Pending file rename operations"),
+                                ServiceState.OK,
+                            ),
+                            ("sccm", Title("SCCM client"), ServiceState.WARN),
+                            (
+                                "sccm_hard",
+                                Title("SCCM client, enforced by deadline"),
+                                ServiceState.WARN,
+                            ),
+                        )
+                    },
+                ),
+            ),
+        },
+    )
+
+
+rule_spec_ms_win_update_v2_reboot = CheckParameters(
+    name="ms_win_update_v2_reboot",
+    title=Title("Microsoft Windows Pending Reboot"),
+    parameter_form=_parameter_form_ms_win_update_v2_reboot,
+    topic=Topic.OPERATING_SYSTEM,
+    condition=HostCondition(),
+)
@@ -36,6 +36,12 @@ from .bakery_api.v1 import (
 )
 
 
+# A delta encoded update list breaks if the monitoring server misses an agent run. Synchronous
+# agent queries, e.g. during service discovery or with "cmk -d", would each start a run, so the
+# plugin runs asynchronously with this interval unless another interval is configured.
+_DELTA_DEFAULT_INTERVAL = 300
+
+
 class WinUpdateConfigV2(TypedDict, total=False):
     deployment: tuple[str, dict[str, any] | None]
 
@@ -50,6 +56,15 @@ def get_ms_win_update_v2_files(conf: WinUpdateConfigV2) -> FileGenerator:
     interval = config.get("interval")
     enable_sccm = config.get("enable_sccm", True)
     enable_windows_update = config.get("enable_windows_update", True)
+    search_cache_max_age = config.get("search_cache_max_age")
+    search_update_type = config.get("search_update_type")
+    search_category_ids = config.get("search_category_ids")
+    search_browse_only = config.get("search_browse_only")
+    offline_search = config.get("offline_search", False)
+    concurrent = config.get("concurrent", True)
+    time_budgets = config.get("time_budgets", {})
+    full_snapshot_interval = config.get("full_snapshot_interval")
+    reboot_probe = config.get("reboot_probe")
     debug_mode = config.get("debug_mode", False)
 
     # Build PowerShell parameters based on configuration
@@ -58,6 +73,25 @@ def get_ms_win_update_v2_files(conf: WinUpdateConfigV2) -> FileGenerator:
         ps_params.append("-EnableSCCM:$false")
     if not enable_windows_update:
         ps_params.append("-EnableWindowsUpdate:$false")
+    if not concurrent:
+        ps_params.append("-Concurrent:$false")
+    if search_cache_max_age:
+        ps_params.append(f"-SearchCacheMaxAge {int(search_cache_max_age)}")
+    if search_update_type:
+        ps_params.append(f"-UpdateType {search_update_type}")
+    if search_category_ids:
+        ps_params.append(f"-CategoryIDs {','.join(search_category_ids)}")
+    if search_browse_only:
+        ps_params.append(f"-BrowseOnly {1 if search_browse_only == 'only' else 0}")
+    if offline_search:
+        ps_params.append("-OfflineSearch")
+    if time_budgets.get("windows_update"):
+        ps_params.append(f"-WindowsUpdateTimeBudget {int(time_budgets['windows_update'])}")
+    if time_budgets.get("sccm"):
+        ps_params.append(f"-SCCMTimeBudget {int(time_budgets['sccm'])}")
+    if full_snapshot_interval:
+        ps_params.append(f"-FullSnapshotInterval {int(full_snapshot_interval)}")
+        interval = interval or _DELTA_DEFAULT_INTERVAL
     if debug_mode:
         ps_params.append("-Debug")
 
@@ -75,6 +109,16 @@ def get_ms_win_update_v2_files(conf: WinUpdateConfigV2) -> FileGenerator:
         config=plugin_config,
     )
 
+    # The pending reboot probe only reads a few markers and runs on its own, shorter interval
+    if reboot_probe is not None:
+        reboot_interval = reboot_probe.get("interval")
+        yield Plugin(
+            base_os=OS.WINDOWS,
+            source=Path("ms_win_update_v2_reboot.ps1"),
+            interval=int(reboot_interval) if reboot_interval else None,
+            config=PluginConfig(arguments=["-Debug"]) if debug_mode else None,
+        )
+
 
 register.bakery_plugin(
     name="ms_win_update_v2",
@@ -0,0 +1,164 @@
+# Copyright (C) 2025  Christopher Pommer <cp.software@outlook.de>
+# Enhanced with SCCM support by Mario Fellner <mario.fellner@outlook.at>
+
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+####################################################################################################
+# PESTER TESTS: Windows Update search cache of the agent plug-in
+#
+# Invalidation of the cached search result by Read-WindowsUpdateCache and Get-WindowsUpdates.
+# The agent plug-in is dot-sourced, so only its functions are defined. Requires Pester 5:
+#
+#   pwsh -Command "Invoke-Pester -Path tests/agent"
+####################################################################################################
+
+BeforeAll {
+    $pluginPath = Join-Path $PSScriptRoot "../../plugin/agents/windows/plugins/ms_win_update_v2.ps1"
+    . $pluginPath -EnableSCCM:$false -SearchCacheMaxAge 3600
+
+    $script:stateDirectory = $env:MK_STATEDIR
+    $env:MK_STATEDIR = $TestDrive
+    $script:cacheFile = Join-Path $TestDrive "ms_win_update_v2_wu_cache.json"
+    $script:searchLines = @(
+        "UPDATE`tWindowsUpdate`t2025-01 Cumulative Update for Windows Server 2022`tKB:KB5050001",
+        "UPDATE`tWindowsUpdate`tSecurity Update for Microsoft Office`tKB:KB5050002"
+    )
+
+    function Set-CacheFile {
+        # Writes a cache file like Write-WindowsUpdateCache, with the given age in seconds
+        param([string]$Markers, [int64]$Age = 0, [int]$Format = $SectionFormatVersion)
+        [PSCustomObject]@{
+            Format = $Format
+            Markers = $Markers
+            Timestamp = [DateTimeOffset]::UtcNow.ToUnixTimeSeconds() - $Age
+            Lines = $script:searchLines
+        } | ConvertTo-Json -Depth 2 -Compress | Set-Content -LiteralPath $script:cacheFile -Encoding UTF8
+    }
+}
+
+AfterAll {
+    $env:MK_STATEDIR = $script:stateDirectory
+}
+
+Describe "Read-WindowsUpdateCache" {
+    BeforeEach {
+        Remove-Item -LiteralPath $script:cacheFile -ErrorAction SilentlyContinue
+    }
+
+    It "returns the cached lines for the same markers within the maximum age" {
+        Set-CacheFile -Markers "detect|install" -Age 60
+
+        $cache = Read-WindowsUpdateCache -Path $script:cacheFile -Markers "detect|install"
+
+        @($cache.Lines) | Should -Be $script:searchLines
+    }
+
+    It "reads what Write-WindowsUpdateCache wrote" {
+        Write-WindowsUpdateCache -Path $script:cacheFile -Markers "detect|install" -Lines $script:searchLines
+
+        $cache = Read-WindowsUpdateCache -Path $script:cacheFile -Markers "detect|install"
+
+        @($cache.Lines) | Should -Be $script:searchLines
+    }
+
+    It "is invalidated by changed markers" {
+        Set-CacheFile -Markers "detect|install"
+
+        Read-WindowsUpdateCache -Path $script:cacheFile -Markers "detect|install2" | Should -BeNullOrEmpty
+    }
+
+    It "expires at the maximum age" {
+        Set-CacheFile -Markers "detect|install" -Age 3600
+
+        Read-WindowsUpdateCache -Path $script:cacheFile -Markers "detect|install" | Should -BeNullOrEmpty
+    }
+
+    It "is invalidated by a timestamp in the future" {
+        Set-CacheFile -Markers "detect|install" -Age -60
+
+        Read-WindowsUpdateCache -Path $script:cacheFile -Markers "detect|install" | Should -BeNullOrEmpty
+    }
+
+    It "is invalidated by another section format version" {
+        Set-CacheFile -Markers "detect|install" -Format ($SectionFormatVersion - 1)
+
+        Read-WindowsUpdateCache -Path $script:cacheFile -Markers "detect|install" | Should -BeNullOrEmpty
+    }
+
+    It "ignores a missing or unreadable cache file" {
+        Read-WindowsUpdateCache -Path $script:cacheFile -Markers "detect|install" | Should -BeNullOrEmpty
+
+        Set-Content -LiteralPath $script:cacheFile -Value "{ not json"
+        Read-WindowsUpdateCache -Path $script:cacheFile -Markers "detect|install" | Should -BeNullOrEmpty
+    }
+}
+
+Describe "Get-WindowsUpdates" {
+    BeforeEach {
+        Remove-Item -LiteralPath $script:cacheFile -ErrorAction SilentlyContinue
+        $script:markers = "detect|install"
+        Mock Get-WindowsUpdateMarkers { $script:markers }
+        Mock Invoke-WindowsUpdateSearch { $script:searchLines }
+    }
+
+    It "reuses the search result while the markers are unchanged" {
+        $first = Get-WindowsUpdates
+        $second = Get-WindowsUpdates
+
+        Should -Invoke Invoke-WindowsUpdateSearch -Times 1 -Exactly
+        $second.Status | Should -Be "ok"
+        @($second.Lines) | Should -Be @($first.Lines)
+    }
+
+    It "searches again after a marker change" {
+        Get-WindowsUpdates | Out-Null
+        $script:markers = "detect2|install"
+        Get-WindowsUpdates | Out-Null
+
+        Should -Invoke Invoke-WindowsUpdateSearch -Times 2 -Exactly
+    }
+
+    It "searches again after the maximum age" {
+        Get-WindowsUpdates | Out-Null
+        $cache = Get-Content -LiteralPath $script:cacheFile -Raw | ConvertFrom-Json
+        $cache.Timestamp -= 3600
+        $cache | ConvertTo-Json -Depth 2 -Compress | Set-Content -LiteralPath $script:cacheFile -Encoding UTF8
+        Get-WindowsUpdates | Out-Null
+
+        Should -Invoke Invoke-WindowsUpdateSearch -Times 2 -Exactly
+    }
+
+    It "does not write the cache for a failed search" {
+        Mock Invoke-WindowsUpdateSearch { throw "Exception from HRESULT: 0x8024402C" }
+        Mock Write-WindowsUpdateCache { }
+
+        $data = Get-WindowsUpdates
+
+        $data.Status | Should -Be "error"
+        Should -Invoke Write-WindowsUpdateCache -Times 0 -Exactly
+        Test-Path -LiteralPath $script:cacheFile | Should -BeFalse
+    }
+
+    It "does not replace a valid cache after a failed search" {
+        Get-WindowsUpdates | Out-Null
+        $script:markers = "detect2|install"
+        Mock Invoke-WindowsUpdateSearch { throw "Exception from HRESULT: 0x8024402C" }
+
+        $data = Get-WindowsUpdates
+
+        $data.Status | Should -Be "error"
+        (Get-Content -LiteralPath $script:cacheFile -Raw | ConvertFrom-Json).Markers | Should -BeLike "detect|install|*"
+    }
+}
@@ -0,0 +1,55 @@
+# Copyright (C) 2025  Christopher Pommer <cp.software@outlook.de>
+# Enhanced with SCCM support by Mario Fellner <mario.fellner@outlook.at>
+
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+####################################################################################################
+# PESTER TESTS: Collectors of the agent plug-in
+#
+# Time budgets of the collectors run by Invoke-Collectors. Wait-Event without a source identifier
+# waits forever and stands in for a hung Windows Update search or WMI query. Requires Pester 5:
+#
+#   pwsh -Command "Invoke-Pester -Path tests/agent"
+####################################################################################################
+
+BeforeAll {
+    $pluginPath = Join-Path $PSScriptRoot "../../plugin/agents/windows/plugins/ms_win_update_v2.ps1"
+    . $pluginPath -EnableSCCM:$false
+}
+
+Describe "Invoke-Collectors" {
+    BeforeEach {
+        $script:collectors = [ordered]@{ Hung = "Wait-Event"; Fast = "Get-Date" }
+        $script:timeBudgets = @{ Hung = 1; Fast = 10 }
+    }
+
+    It "abandons a hung collector and runs the next one in sequential mode" {
+        $Concurrent = $false
+        $results = Invoke-Collectors -Collectors $script:collectors -TimeBudgets $script:timeBudgets
+
+        $results.Hung.Status | Should -Be "timeout"
+        $results.Fast | Should -BeOfType [datetime]
+    }
+
+    It "abandons a hung collector without delaying the others in concurrent mode" {
+        $Concurrent = $true
+        $stopwatch = [System.Diagnostics.Stopwatch]::StartNew()
+        $results = Invoke-Collectors -Collectors $script:collectors -TimeBudgets $script:timeBudgets
+
+        $results.Hung.Status | Should -Be "timeout"
+        $results.Fast | Should -BeOfType [datetime]
+        $stopwatch.Elapsed.TotalSeconds | Should -BeLessThan 10
+    }
+}
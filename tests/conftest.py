@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; py-indent-offset: 4; max-line-length: 100 -*-
+
+# Copyright (C) 2025  Christopher Pommer <cp.software@outlook.de>
+# Enhanced with SCCM support by Mario Fellner <mario.fellner@outlook.at>
+
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+####################################################################################################
+# BENCHMARK SUITE: Microsoft Windows Update with SCCM Support
+#
+# Benchmarks of the hot paths of the check plug-in, gated against stored baselines, and the check
+# result tests in test_check.py. The check plug-in is loaded with the real cmk.agent_based.v2 if
+# available, and with the stub in tools/stubs otherwise.
+#
+# Timings are stored relative to a fixed pure Python calibration workload measured in the same
+# run, so that the baselines carry over between machines of different speed. A benchmark fails
+# if its relative cost exceeds the baseline by more than the tolerance.
+#
+#   python3 -m pytest                           gate against tests/benchmark_baseline.json
+#   python3 -m pytest --benchmark-tolerance 50  allow 50% instead of the stored tolerance
+#   python3 -m pytest --benchmark-update        store the measured costs as new baselines
+####################################################################################################
+
+import functools
+import gc
+import json
+import sys
+import time
+from collections.abc import Callable, Iterator, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Optional
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tools"))
+
+# pylint: disable=wrong-import-position
+from ms_win_update_v2_sections import (  # noqa: E402
+    generate_section,
+    load_check_plugin,
+    SectionMix,
+    string_table,
+)
+
+BASELINE_FILE = Path(__file__).resolve().parent / "benchmark_baseline.json"
+
+# Number of timed rounds per benchmark, the fastest one counts
+_ROUNDS = 15
+
+# Measurements per benchmark: when storing new baselines the median counts, when gating a
+# benchmark is measured again if it exceeds the tolerance
+_MEASUREMENTS = 3
+
+# Section compositions of the benchmarks
+MIXES = {
+    # Windows Update only, a few pending updates
+    "small": SectionMix(mean_updates=4.0, sccm_host_share=0.0, ignore_rate=0.1),
+    # The fleet average of the load test
+    "typical": SectionMix(),
+    # SCCM managed servers with a large catalog
+    "large_sccm": SectionMix(
+        update_count=500, sccm_host_share=1.0, sccm_update_share=0.9, ignore_rate=0.05
+    ),
+}
+
+# Hosts per benchmark round for each mix
+HOSTS = {"small": 400, "typical": 200, "large_sccm": 10}
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("benchmark")
+    group.addoption(
+        "--benchmark-tolerance",
+        type=float,
+        default=None,
+        help="allowed regression in percent (default: as stored in the baseline file)",
+    )
+    group.addoption(
+        "--benchmark-update",
+        action="store_true",
+        help="store the measured costs as new baselines instead of gating",
+    )
+
+
+def _calibration_workload() -> None:
+    # Mix of the operations the check plug-in consists of: string splitting, dict lookups,
+    # object creation and sorting
+    table = [f"KEY{index % 7}:value {index}\tfield {index}".split("\t") for index in range(2000)]
+    counts: dict[str, int] = {}
+    for row in table:
+        key, _sep, value = row[0].partition(":")
+        counts[key] = counts.get(key, 0) + len(value)
+    sorted((row[1], index) for index, row in enumerate(table))
+
+
+def _best_times(func: Callable[[], Any]) -> tuple[float, float]:
+    """Return the fastest round of func and of the calibration workload.
+
+    The rounds of both alternate, so that both see the same load of the machine. CPU time is
+    measured rather than wall time, so time in which other processes run does not count. Like
+    timeit, the garbage collector is disabled while timing.
+    """
+    best = best_calibration = float("inf")
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _round in range(_ROUNDS):
+            start = time.process_time()
+            _calibration_workload()
+            middle = time.process_time()
+            func()
+            end = time.process_time()
+            best_calibration = min(best_calibration, middle - start)
+            best = min(best, end - middle)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return best, best_calibration
+
+
+@dataclass
+class Measurement:
+    name: str
+    hosts_per_second: float
+    relative_cost: float
+    calibration: float
+    baseline: Optional[float]
+
+
+class BenchmarkRecorder:
+    """Times benchmarks and compares them with the stored baselines."""
+
+    def __init__(self, tolerance: Optional[float], update: bool) -> None:
+        self.update = update
+        self.stored: dict[str, Any] = (
+            json.loads(BASELINE_FILE.read_text()) if BASELINE_FILE.exists() else {}
+        )
+        self.tolerance = (
+            tolerance if tolerance is not None else self.stored.get("tolerance_percent", 30.0)
+        )
+        self.measurements: list[Measurement] = []
+
+    def __call__(self, name: str, func: Callable[[], Any], hosts: int) -> Measurement:
+        """Time func, which processes the given number of hosts, and gate on the baseline."""
+        func()  # warm up caches of the interpreter and of the check plug-in
+        baseline = self.stored.get("benchmarks", {}).get(name, {}).get("relative_cost")
+        limit = None if self.update or baseline is None else baseline * (1 + self.tolerance / 100)
+
+        candidates = []
+        for _measurement in range(_MEASUREMENTS):
+            seconds, calibration = _best_times(func)
+            candidates.append(
+                Measurement(
+                    name=name,
+                    hosts_per_second=hosts / seconds,
+                    relative_cost=seconds / hosts / calibration,
+                    calibration=calibration,
+                    baseline=baseline,
+                )
+            )
+            # A measurement within the limit is conclusive, one above it may be noise
+            if limit is not None and candidates[-1].relative_cost <= limit:
+                break
+        candidates.sort(key=lambda candidate: candidate.relative_cost)
+        # The median for new baselines, the best one for the gate
+        measurement = candidates[len(candidates) // 2 if limit is None else 0]
+        self.measurements.append(measurement)
+
+        if limit is not None:
+            assert measurement.relative_cost <= limit, (
+                f"{name}: relative cost {measurement.relative_cost:.4f} exceeds the baseline "
+                f"{baseline:.4f} by more than {self.tolerance:g}% "
+                f"({measurement.hosts_per_second:,.0f} hosts/s)"
+            )
+        return measurement
+
+    def save(self) -> None:
+        benchmarks = dict(self.stored.get("benchmarks", {}))
+        for measurement in self.measurements:
+            benchmarks[measurement.name] = {
+                "relative_cost": round(measurement.relative_cost, 4),
+                "hosts_per_second": round(measurement.hosts_per_second),
+            }
+        stored = {
+            "tolerance_percent": self.stored.get("tolerance_percent", 30.0),
+            "benchmarks": dict(sorted(benchmarks.items())),
+        }
+        BASELINE_FILE.write_text(json.dumps(stored, indent=2) + "\n")
+
+
+_RECORDER: Optional[BenchmarkRecorder] = None
+
+
+@pytest.fixture(scope="session")
+def benchmark(request: pytest.FixtureRequest) -> Iterator[BenchmarkRecorder]:
+    global _RECORDER
+    _RECORDER = BenchmarkRecorder(
+        request.config.getoption("--benchmark-tolerance"),
+        request.config.getoption("--benchmark-update"),
+    )
+    yield _RECORDER
+    if _RECORDER.update:
+        _RECORDER.save()
+
+
+def pytest_terminal_summary(terminalreporter: Any) -> None:
+    if _RECORDER is None or not _RECORDER.measurements:
+        return
+    terminalreporter.section("ms_win_update_v2 benchmarks")
+    terminalreporter.write_line(
+        f"tolerance: {_RECORDER.tolerance:g}%"
+        + (", baselines updated" if _RECORDER.update else "")
+    )
+    for measurement in _RECORDER.measurements:
+        change = (
+            f"{(measurement.relative_cost / measurement.baseline - 1.0) * 100.0:+6.1f}%"
+            if measurement.baseline
+            else "   new"
+        )
+        terminalreporter.write_line(
+            f"{measurement.name:<32} {measurement.hosts_per_second:>12,.0f} hosts/s  "
+            f"relative cost {measurement.relative_cost:9.4f}  {change}  "
+            f"(calibration {measurement.calibration * 1000:.2f} ms)"
+        )
+
+
+@pytest.fixture(scope="session")
+def plugin() -> ModuleType:
+    return load_check_plugin()
+
+
+@pytest.fixture(scope="session")
+def string_tables() -> Callable[[str], Sequence[list[list[str]]]]:
+    """String tables of the hosts of one benchmark round, by mix."""
+
+    @functools.cache
+    def generate(mix_name: str) -> Sequence[list[list[str]]]:
+        return tuple(
+            string_table(generate_section(host, 1, MIXES[mix_name]))
+            for host in range(HOSTS[mix_name])
+        )
+
+    return generate
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; py-indent-offset: 4; max-line-length: 100 -*-
+
+# Copyright (C) 2025  Christopher Pommer <cp.software@outlook.de>
+# Enhanced with SCCM support by Mario Fellner <mario.fellner@outlook.at>
+
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+
+import pytest
+
+from ms_win_update_v2_sections import IGNORED_PATTERNS
+
+
+@pytest.mark.parametrize("mix", ["small", "typical", "large_sccm"])
+def test_check(benchmark, plugin, string_tables, monkeypatch, mix):
+    params = {
+        **plugin.check_plugin_ms_win_update_v2.check_default_parameters,
+        "ignored_update_patterns": list(IGNORED_PATTERNS),
+    }
+    sections = [plugin.parse_ms_win_update_v2(table) for table in string_tables(mix)]
+
+    # Each host has its own value store, outside of Checkmk there is no check context
+    value_stores = [{} for _section in sections]
+    current = {"value_store": {}}
+    monkeypatch.setattr(plugin, "get_value_store", lambda: current["value_store"])
+
+    def check_all():
+        for section, value_store in zip(sections, value_stores):
+            current["value_store"] = value_store
+            results = list(plugin.check_ms_win_update_v2(params, section))
+            assert results
+
+    benchmark(f"check[{mix}]", check_all, len(sections))
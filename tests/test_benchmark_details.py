@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; py-indent-offset: 4; max-line-length: 100 -*-
+
+# Copyright (C) 2025  Christopher Pommer <cp.software@outlook.de>
+# Enhanced with SCCM support by Mario Fellner <mario.fellner@outlook.at>
+
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+
+import pytest
+
+
+@pytest.mark.parametrize("mix", ["typical", "large_sccm"])
+def test_format_update_details(benchmark, plugin, string_tables, mix):
+    sections = [plugin.parse_ms_win_update_v2(table) for table in string_tables(mix)]
+
+    def format_all():
+        for section in sections:
+            for update in section.updates:
+                assert plugin._format_update_details(update)
+
+    benchmark(f"format_update_details[{mix}]", format_all, len(sections))
+
+
+@pytest.mark.parametrize("mix", ["typical", "large_sccm"])
+def test_render_details(benchmark, plugin, string_tables, mix):
+    # The pending update groups of the service details, with the default limits
+    groups = []
+    for table in string_tables(mix):
+        section = plugin.parse_ms_win_update_v2(table)
+        groups.append(
+            [
+                (
+                    f"{source} - Pending:",
+                    list(section.updates_by_source.get(source, ())),
+                    plugin._update_display_order,
+                    plugin._format_update_details,
+                )
+                for source in ("WindowsUpdate", "SCCM")
+            ]
+        )
+
+    def render_all():
+        for host_groups in groups:
+            plugin._render_details(host_groups, 20, 16000)
+
+    benchmark(f"render_details[{mix}]", render_all, len(groups))
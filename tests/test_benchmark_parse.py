@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; py-indent-offset: 4; max-line-length: 100 -*-
+
+# Copyright (C) 2025  Christopher Pommer <cp.software@outlook.de>
+# Enhanced with SCCM support by Mario Fellner <mario.fellner@outlook.at>
+
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+import pytest
+
+
+@pytest.mark.parametrize("mix", ["small", "typical", "large_sccm"])
+def test_parse(benchmark, plugin, string_tables, mix):
+    tables = string_tables(mix)
+    sections = [plugin.parse_ms_win_update_v2(table) for table in tables]
+    assert [len(section.updates) for section in sections] == [
+        section.total_count for section in sections
+    ]
+
+    def parse_all():
+        # Every section is new to the parser, as after each run of the agent plug-in
+        plugin._PARSE_CACHE.clear()
+        plugin._PARSE_CACHE_STATS["cached_updates"] = 0
+        for table in tables:
+            plugin.parse_ms_win_update_v2(table)
+
+    benchmark(f"parse[{mix}]", parse_all, len(tables))
+
+
+def test_parse_cached(benchmark, plugin, string_tables):
+    # The agent plug-in usually runs asynchronously, so most check cycles see the same output
+    tables = string_tables("typical")
+    for table in tables:
+        plugin.parse_ms_win_update_v2(table)
+    hits = plugin._PARSE_CACHE_STATS["hits"]
+
+    def parse_all():
+        for table in tables:
+            plugin.parse_ms_win_update_v2(table)
+
+    benchmark("parse_cached[typical]", parse_all, len(tables))
+    assert plugin._PARSE_CACHE_STATS["hits"] > hits
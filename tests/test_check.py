@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; py-indent-offset: 4; max-line-length: 100 -*-
+
+# Copyright (C) 2025  Christopher Pommer <cp.software@outlook.de>
+# Enhanced with SCCM support by Mario Fellner <mario.fellner@outlook.at>
+
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+import time
+
+import pytest
+
+NOW = int(time.time())
+
+_KB_UPDATE = "UPDATE\tWindowsUpdate\t2025-01 Cumulative Update\tKB:KB5034441\tSEVERITY:Critical"
+_SCCM_UPDATE = "UPDATE\tSCCM\tSQL Server 2022 CU12\tKB:5036432\tDOWNLOADED:False\tEVAL_STATE:1"
+
+
+def _lines(*updates, sccm="Running", sccm_status="ok"):
+    """Agent output of a host with both sources collected at NOW."""
+    return [
+        "FORMAT_VERSION\t2",
+        f"SOURCE_STATUS\tWindowsUpdate\tok\t{NOW}",
+        f"SOURCE_STATUS\tSCCM\t{sccm_status}\t{NOW}",
+        f"SCCM_CLIENT_STATUS\t{sccm}",
+        "SCCM_CLIENT_VERSION\t5.00.9122.1000",
+        "SCCM_LAST_POLICY_UPDATE\t2025-01-15T08:00:00Z",
+        *updates,
+    ]
+
+
+def _parse(plugin, lines):
+    return plugin.parse_ms_win_update_v2([line.split("\t") for line in lines])
+
+
+def _snapshot(plugin, generation, sequence, kind, *lines):
+    return _parse(plugin, _lines(f"SNAPSHOT\t{generation}\t{sequence}\t{kind}", *lines))
+
+
+def _metrics(results):
+    return {result.name: result.value for result in results if hasattr(result, "name")}
+
+
+@pytest.fixture(name="value_store")
+def fixture_value_store(plugin, monkeypatch):
+    value_store = {}
+    monkeypatch.setattr(plugin, "get_value_store", lambda: value_store)
+    return value_store
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "2025-01-15T00:00:00Z",
+        # WMI DMTF datetime with the offset to UTC in minutes
+        "20250115010000.000000+060",
+        "20250114230000.000000-060",
+        "01/15/2025 00:00:00",
+    ],
+)
+def test_parse_deadline(plugin, value):
+    assert plugin._parse_deadline(value) == 1736899200
+
+
+@pytest.mark.parametrize("value", ["", "tomorrow", "2025-13-45T00:00:00Z", "20250115"])
+def test_parse_deadline_unknown(plugin, value):
+    assert plugin._parse_deadline(value) is None
+
+
+def test_deadlines(plugin):
+    results = list(plugin._check_deadlines({}, [NOW - 7200, NOW + 3600, NOW + 86400], NOW))
+    assert _metrics(results) == {
+        "ms_win_updates_deadline_nearest": 3600,
+        "ms_win_updates_overdue": 1,
+        "ms_win_updates_overdue_age": 7200,
+    }
+
+
+def test_deadline_from_agent_output(plugin, value_store):
+    deadline = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(NOW - 86400))
+    section = _parse(plugin, _lines(f"{_SCCM_UPDATE}\tDEADLINE:{deadline}"))
+    assert section.updates[0].deadline == NOW - 86400
+    metrics = _metrics(plugin.check_ms_win_update_v2({}, section))
+    assert metrics["ms_win_updates_overdue"] == 1
+
+
+def test_forbidden_and_tracked_kbs(plugin, value_store):
+    section = _parse(plugin, _lines(_KB_UPDATE, _SCCM_UPDATE))
+    params = {
+        "forbidden_pending_kbs": ["kb5034441", "KB5000001"],
+        "tracked_kbs": ["5036432", "KB5000002"],
+        # KB rules apply to ignored updates as well
+        "ignored_update_patterns": ["Cumulative Update"],
+    }
+    results = [
+        result
+        for result in plugin.check_ms_win_update_v2(params, section)
+        if getattr(result, "details", "").startswith("KB")
+    ]
+    assert results == [
+        plugin.Result(
+            state=plugin.State.CRIT, summary="KB5034441 must not be pending (WindowsUpdate)"
+        ),
+        plugin.Result(state=plugin.State.OK, notice="KB5036432: pending (SCCM)"),
+        plugin.Result(state=plugin.State.OK, notice="KB5000002: not pending"),
+    ]
+
+
+def test_pending_age(plugin):
+    first = plugin.WindowsUpdate(title="First", source="WindowsUpdate", kb="KB1")
+    second = plugin.WindowsUpdate(title="Second", source="SCCM", kb="2")
+    third = plugin.WindowsUpdate(title="Third", source="SCCM", kb="3")
+    value_store = {}
+
+    list(plugin._check_pending_age({}, [first, second], value_store, NOW))
+    metrics = _metrics(plugin._check_pending_age({}, [first, third], value_store, NOW + 3600))
+
+    # The installed update is forgotten, the new one is pending since the last check
+    assert sorted(value_store["pending_since"].values()) == [NOW, NOW + 3600]
+    assert metrics == {
+        "ms_win_updates_pending_age_oldest": 3600,
+        "ms_win_updates_pending_age_median": 1800,
+    }
+
+
+def test_pending_age_without_updates(plugin):
+    value_store = {"pending_since": {"0123456789abcdef": NOW}}
+    metrics = _metrics(plugin._check_pending_age({}, [], value_store, NOW))
+    assert value_store == {"pending_since": {}}
+    assert metrics == {
+        "ms_win_updates_pending_age_oldest": 0,
+        "ms_win_updates_pending_age_median": 0,
+    }
+
+
+@pytest.mark.parametrize("max_details_size", [60, 200, 1000])
+def test_details_size(plugin, value_store, max_details_size):
+    section = _parse(
+        plugin,
+        _lines(
+            *(
+                f"UPDATE\tWindowsUpdate\tCumulative Update {index}\tKB:KB{5000000 + index}"
+                for index in range(100)
+            ),
+            *(f"UPDATE\tSCCM\tSCCM Update {index}\tKB:{6000000 + index}" for index in range(100)),
+        ),
+    )
+    params = {"max_listed_updates": 50, "max_details_size": max_details_size}
+    (details,) = [
+        result.details
+        for result in plugin.check_ms_win_update_v2(params, section)
+        if getattr(result, "details", "").startswith("Windows Update - Pending:")
+    ]
+    assert len(details.encode("utf-8")) <= max_details_size
+    assert details.endswith(" more")
+
+
+def test_details_size_multibyte(plugin):
+    entries = [f"Aktualisierung für Größe {index}" for index in range(50)]
+    details = plugin._render_details(
+        [("Pending:", entries, len, str), ("Ignored:", entries, len, str)], None, 300
+    )
+    assert len(details.encode("utf-8")) <= 300
+    assert "Ignored:" in details
+
+
+def test_details_headings_do_not_fit(plugin):
+    groups = [("First heading:", ["a"], len, str), ("Second heading:", ["b"], len, str)]
+    # The second group is left out, the "+N more" line of the first one is always reserved
+    assert plugin._render_details(groups, None, 40) == "First heading:\n  • a"
+    assert plugin._render_details(groups, None, 30) == "First heading:\n  +1 more"
+    assert plugin._render_details(groups, None, 5) == ""
+
+
+def test_snapshot_deltas(plugin, value_store):
+    full = _snapshot(plugin, "gen", 0, "full", f"{_KB_UPDATE}\tID:1", f"{_SCCM_UPDATE}\tID:2")
+    delta = _snapshot(
+        plugin,
+        "gen",
+        1,
+        "delta",
+        "UPDATE\tSCCM\tSQL Server 2022 CU13\tKB:5040939\tID:3",
+        "UPDATE_REMOVED\t1",
+    )
+
+    assert _metrics(plugin.check_ms_win_update_v2({}, full))["ms_win_updates_pending"] == 2
+    # The same agent output is checked again, as the agent plug-in runs asynchronously
+    for _cycle in range(2):
+        results = list(plugin.check_ms_win_update_v2({"tracked_kbs": ["5040939"]}, delta))
+        assert _metrics(results)["ms_win_updates_pending"] == 2
+        assert plugin.Result(state=plugin.State.OK, notice="KB5040939: pending (SCCM)") in results
+    assert sorted(value_store["snapshot"]["updates"]) == ["2", "3"]
+
+
+def test_snapshot_gap(plugin, value_store):
+    gap = plugin.Result(state=plugin.State.UNKNOWN, summary=plugin._SNAPSHOT_GAP_MESSAGE)
+    full = _snapshot(plugin, "gen", 0, "full", f"{_KB_UPDATE}\tID:1")
+    list(plugin.check_ms_win_update_v2({}, full))
+
+    # A missed run drops the stored state until the next full snapshot
+    assert list(plugin.check_ms_win_update_v2({}, _snapshot(plugin, "gen", 2, "delta"))) == [gap]
+    assert "snapshot" not in value_store
+    assert list(plugin.check_ms_win_update_v2({}, _snapshot(plugin, "gen", 3, "delta"))) == [gap]
+    # So does a new generation, e.g. after the state file of the agent plug-in was lost
+    list(plugin.check_ms_win_update_v2({}, _snapshot(plugin, "gen", 4, "full")))
+    assert list(plugin.check_ms_win_update_v2({}, _snapshot(plugin, "new", 5, "delta"))) == [gap]
+
+    full = _snapshot(plugin, "new", 0, "full", f"{_KB_UPDATE}\tID:1")
+    assert _metrics(plugin.check_ms_win_update_v2({}, full))["ms_win_updates_pending"] == 1
+
+
+def test_services_not_discovered_with_snapshot(plugin, value_store):
+    section = _snapshot(plugin, "gen", 0, "full", f"{_KB_UPDATE}\tID:1")
+    params = {"per_source": True, "per_classification": True}
+    assert not list(plugin.discover_ms_win_update_v2_services(params, section))
+    params = plugin.check_plugin_ms_win_update_v2_services.check_default_parameters
+    results = list(plugin.check_ms_win_update_v2_services("Security", params, section))
+    assert [result.state for result in results] == [plugin.State.UNKNOWN]
+
+
+def test_services_discovery(plugin):
+    params = {"per_source": True, "per_classification": ["security", "feature_pack"]}
+    items = [
+        service.item
+        for service in plugin.discover_ms_win_update_v2_services(
+            params, _parse(plugin, _lines(_KB_UPDATE, sccm="NotInstalled"))
+        )
+    ]
+    assert items == ["via Windows Update", "Security", "Feature Pack"]
+
+
+def _lagging(results):
+    return [
+        result
+        for result in results
+        if getattr(result, "summary", "").startswith("Nodes lagging behind")
+    ]
+
+
+def test_cluster_merge_and_lagging(plugin, value_store):
+    second = "UPDATE\tWindowsUpdate\tSecurity Update\tKB:KB5000002"
+    results = list(
+        plugin.cluster_check_ms_win_update_v2(
+            {},
+            {
+                "node1": _parse(plugin, _lines(_KB_UPDATE, second)),
+                "node2": _parse(plugin, _lines(_KB_UPDATE)),
+                "node3": None,
+            },
+        )
+    )
+    # Updates pending on several nodes are counted once
+    assert _metrics(results)["ms_win_updates_pending"] == 2
+    assert plugin.Result(state=plugin.State.OK, notice="[node1] Pending: 2") in results
+    assert plugin.Result(state=plugin.State.OK, notice="[node2] Pending: 1") in results
+    assert _lagging(results) == [
+        plugin.Result(
+            state=plugin.State.WARN,
+            summary="Nodes lagging behind: node1 (1 not pending on other nodes)",
+        )
+    ]
+
+
+def test_cluster_lagging_node_state(plugin, value_store):
+    nodes = {
+        "node1": _parse(plugin, _lines(_KB_UPDATE)),
+        "node2": _parse(plugin, _lines()),
+    }
+    results = list(plugin.cluster_check_ms_win_update_v2({"cluster_lagging_node_state": 2}, nodes))
+    assert [result.state for result in _lagging(results)] == [plugin.State.CRIT]
+
+
+def test_cluster_nodes_in_sync(plugin, value_store):
+    nodes = {
+        "node1": _parse(plugin, _lines(_KB_UPDATE, _SCCM_UPDATE)),
+        "node2": _parse(plugin, _lines(_KB_UPDATE, _SCCM_UPDATE)),
+    }
+    assert not _lagging(plugin.cluster_check_ms_win_update_v2({}, nodes))
+
+
+@pytest.mark.parametrize(
+    "other_node",
+    [
+        # The SCCM updates of the other node are incomplete
+        {"sccm_status": "partial"},
+        # Without a running client, the other node does not report its SCCM updates at all
+        {"sccm": "Stopped"},
+        {"sccm": "NotInstalled"},
+    ],
+)
+def test_cluster_incomplete_source_not_compared(plugin, value_store, other_node):
+    nodes = {
+        "node1": _parse(plugin, _lines(_SCCM_UPDATE)),
+        "node2": _parse(plugin, _lines(**other_node)),
+    }
+    assert not _lagging(plugin.cluster_check_ms_win_update_v2({}, nodes))
+
+
+def test_cluster_snapshot_per_node(plugin, value_store):
+    nodes = {
+        "node1": _snapshot(plugin, "gen1", 0, "full", f"{_KB_UPDATE}\tID:1"),
+        "node2": _snapshot(plugin, "gen2", 4, "delta", "UPDATE_REMOVED\t1"),
+    }
+    results = list(plugin.cluster_check_ms_win_update_v2({}, nodes))
+    assert plugin.Result(
+        state=plugin.State.UNKNOWN, summary=f"[node2] {plugin._SNAPSHOT_GAP_MESSAGE}"
+    ) in results
+    assert "snapshot.node1" in value_store and "snapshot.node2" not in value_store
+    assert _metrics(results)["ms_win_updates_pending"] == 1
@@ -0,0 +1,185 @@
+# Copyright (C) 2025  Christopher Pommer <cp.software@outlook.de>
+# Enhanced with SCCM support by Mario Fellner <mario.fellner@outlook.at>
+
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+####################################################################################################
+# BENCHMARK: Microsoft Windows Update agent plug-in
+#
+# Runs the Windows Update collection of ms_win_update_v2.ps1 against a mocked Windows Update
+# Agent, so it does not depend on the pending updates of the host and runs on any system with
+# PowerShell 7. New-Object -ComObject Microsoft.Update.Session returns a session whose search
+# returns the given number of updates.
+#
+# Measured are the runtime and the managed memory allocated by:
+#   search and format   Invoke-WindowsUpdateSearch, with the agent plug-in dot-sourced
+#   agent plug-in       the whole agent plug-in, with SCCM disabled
+#   baseline            the whole baseline agent plug-in, with SCCM disabled (-BaselinePath)
+#
+#   git show e547772:plugin/agents/windows/plugins/ms_win_update_v2.ps1 > ms_win_update_v2_old.ps1
+#   pwsh tools/ms_win_update_v2_bench_agent.ps1 -Updates 5000 -BaselinePath ms_win_update_v2_old.ps1
+####################################################################################################
+
+#Requires -Version 7.0
+
+param(
+    [int]$Updates = 5000,
+    [int]$Iterations = 3,
+    [string]$ScriptPath = (Join-Path $PSScriptRoot "../plugin/agents/windows/plugins/ms_win_update_v2.ps1"),
+    [string]$BaselinePath = ""
+)
+
+function New-MockSearchResult {
+    # Shaped like the ISearchResult of the Windows Update Agent, as far as the agent plug-in
+    # reads it: collections support Count, Item() and enumeration
+    param([int]$Count)
+
+    $severities = @("Critical", "Important", "Moderate", "Low", "")
+    $random = [System.Random]::new(1)
+    $searchUpdates = [System.Collections.Generic.List[object]]::new($Count)
+    for ($index = 0; $index -lt $Count; $index++) {
+        $kb = 5000000 + $index
+        $kbArticleIds = [System.Collections.Generic.List[string]]::new()
+        $kbArticleIds.Add([string]$kb)
+        $categories = [System.Collections.Generic.List[object]]::new()
+        $categories.Add([PSCustomObject]@{ Name = "Security Updates" })
+        $categories.Add([PSCustomObject]@{ Name = "Windows Server 2022" })
+
+        $searchUpdates.Add([PSCustomObject]@{
+            Title = "2025-{0:D2} Cumulative Update for Windows Server 2022 for x64-based Systems (KB{1})" -f (($index % 12) + 1), $kb
+            KBArticleIDs = $kbArticleIds
+            MsrcSeverity = $severities[$index % $severities.Count]
+            Categories = $categories
+            MaxDownloadSize = [decimal]($random.Next(1, 1000) * 1MB)
+            IsDownloaded = ($index % 2) -eq 0
+            RebootRequired = ($index % 3) -eq 0
+        })
+    }
+    return [PSCustomObject]@{ ResultCode = 2; Updates = $searchUpdates }
+}
+
+function New-MockUpdateSession {
+    $session = [PSCustomObject]@{}
+    Add-Member -InputObject $session -MemberType ScriptMethod -Name CreateUpdateSearcher -Value {
+        $searcher = [PSCustomObject]@{ Online = $true }
+        Add-Member -InputObject $searcher -MemberType ScriptMethod -Name Search -Value {
+            param([string]$Criteria)
+            return $global:MsWinUpdateBenchmarkSearchResult
+        }
+        return $searcher
+    }
+    return $session
+}
+
+function Measure-Collection {
+    # Runs the action $Iterations times and returns the fastest run and the fewest allocated
+    # bytes. Output written to the console is captured, so both the pipeline output of the
+    # baseline and the buffered console output of the agent plug-in are counted.
+    param([string]$Name, [scriptblock]$Action)
+
+    $bestSeconds = [double]::MaxValue
+    $bestAllocated = [long]::MaxValue
+    $updateLines = 0
+    for ($iteration = 0; $iteration -lt $Iterations; $iteration++) {
+        [GC]::Collect()
+        [GC]::WaitForPendingFinalizers()
+        $consoleOut = [Console]::Out
+        $writer = [System.IO.StringWriter]::new()
+        [Console]::SetOut($writer)
+        $allocatedBefore = [GC]::GetTotalAllocatedBytes($true)
+        $stopwatch = [System.Diagnostics.Stopwatch]::StartNew()
+        try {
+            $pipelineOutput = & $Action
+        }
+        finally {
+            $stopwatch.Stop()
+            [Console]::SetOut($consoleOut)
+        }
+        $allocated = [GC]::GetTotalAllocatedBytes($true) - $allocatedBefore
+
+        $bestSeconds = [math]::Min($bestSeconds, $stopwatch.Elapsed.TotalSeconds)
+        $bestAllocated = [math]::Min($bestAllocated, $allocated)
+        $text = (@($pipelineOutput) -join "`n") + "`n" + $writer.ToString()
+        $updateLines = [regex]::Matches($text, '(?m)^UPDATE').Count
+    }
+
+    if ($updateLines -ne $Updates) {
+        throw "${Name}: $updateLines update lines instead of $Updates"
+    }
+    return [PSCustomObject]@{
+        Name = $Name
+        Seconds = $bestSeconds
+        AllocatedMB = $bestAllocated / 1MB
+    }
+}
+
+function Measure-SearchFunction {
+    # Dot-sourced, the agent plug-in only defines its functions, in the scope of this function
+    . $ScriptPath -EnableSCCM:$false
+    $criteria = Get-WindowsUpdateSearchCriteria
+    return Measure-Collection -Name "search and format" -Action {
+        Invoke-WindowsUpdateSearch -Criteria $criteria
+    }
+}
+
+$global:MsWinUpdateBenchmarkSearchResult = New-MockSearchResult -Count $Updates
+$global:MsWinUpdateBenchmarkSession = New-MockUpdateSession
+
+# Functions take precedence over cmdlets, so the agent plug-ins get the mocked session
+function global:New-Object {
+    [CmdletBinding(DefaultParameterSetName = "Net")]
+    param(
+        [Parameter(ParameterSetName = "Net", Mandatory = $true, Position = 0)]
+        [string]$TypeName,
+        [Parameter(ParameterSetName = "Net", Position = 1)]
+        [object[]]$ArgumentList,
+        [Parameter(ParameterSetName = "Com", Mandatory = $true)]
+        [string]$ComObject
+    )
+    if ($PSCmdlet.ParameterSetName -eq "Com") {
+        if ($ComObject -eq "Microsoft.Update.Session") {
+            return $global:MsWinUpdateBenchmarkSession
+        }
+        throw "COM object $ComObject is not mocked"
+    }
+    return Microsoft.PowerShell.Utility\New-Object @PSBoundParameters
+}
+
+try {
+    $measurements = [System.Collections.Generic.List[object]]::new()
+    $measurements.Add((Measure-SearchFunction))
+    $measurements.Add((Measure-Collection -Name "agent plug-in" -Action {
+        & $ScriptPath -EnableSCCM:$false
+    }))
+    if ($BaselinePath) {
+        $measurements.Add((Measure-Collection -Name "baseline" -Action {
+            & $BaselinePath -EnableSCCM:$false
+        }))
+    }
+}
+finally {
+    Remove-Item -Path Function:\New-Object
+    Remove-Variable -Name MsWinUpdateBenchmarkSearchResult, MsWinUpdateBenchmarkSession -Scope Global
+}
+
+Write-Output "Updates: $Updates, iterations: $Iterations (best run)"
+foreach ($measurement in $measurements) {
+    Write-Output ("{0,-20} {1,10:N3} s {2,10:N1} MB allocated" -f $measurement.Name, $measurement.Seconds, $measurement.AllocatedMB)
+}
+if ($BaselinePath) {
+    $current = $measurements[1]
+    $baseline = $measurements[2]
+    Write-Output ("Agent plug-in vs baseline: {0:N1}x faster, {1:N1}x less memory allocated" -f ($baseline.Seconds / $current.Seconds), ($baseline.AllocatedMB / $current.AllocatedMB))
+}
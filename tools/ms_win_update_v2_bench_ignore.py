@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; py-indent-offset: 4; max-line-length: 100 -*-
+
+# Copyright (C) 2025  Christopher Pommer <cp.software@outlook.de>
+# Enhanced with SCCM support by Mario Fellner <mario.fellner@outlook.at>
+
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+####################################################################################################
+# BENCHMARK: Ignore patterns of the Microsoft Windows Update check plug-in
+#
+# Classifies the update titles of one check call against a list of ignore patterns with the
+# strategies considered for _compile_ignore_patterns:
+#
+#   compile per call    the patterns are compiled on every check call and searched one by one
+#                       (the check plug-in before the matcher cache)
+#   regex loop          compiled once, searched one by one
+#   combined regex      compiled once into a single alternation (only possible without
+#                       backreferences and inline global flags in the patterns)
+#   current matcher     _compile_ignore_patterns: substring search for plain-text patterns, the
+#                       remaining regexes one by one
+#   verdict cache       _ignore_verdict, as called by the check function after the first call
+#
+# Most ignore patterns in practice are KB numbers and title fragments, so by default 45 of the 50
+# patterns are plain text:
+#
+#   python3 tools/ms_win_update_v2_bench_ignore.py --patterns 50 --titles 500
+####################################################################################################
+
+import argparse
+import random
+import re
+import sys
+import timeit
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from typing import Optional
+
+from ms_win_update_v2_sections import CHECK_PLUGIN, load_check_plugin
+
+_REGEX_PATTERNS = (
+    "^Feature update",
+    "[Ss]ilverlight",
+    "Driver.*Printer",
+    "Preview of .* Cumulative Update",
+    r"\(KB50[0-4]\d{4}\)",
+)
+_TEXT_PATTERNS = ("Security Intelligence Update", "Definition Update", "Malicious Software")
+
+
+def _patterns(count: int, rnd: random.Random) -> list[str]:
+    regexes = list(_REGEX_PATTERNS[: max(0, count - len(_TEXT_PATTERNS))])
+    texts = list(_TEXT_PATTERNS[: count - len(regexes)])
+    kbs = [
+        f"KB5{rnd.randint(100000, 999999)}"
+        for _index in range(count - len(regexes) - len(texts))
+    ]
+    return kbs + texts + regexes
+
+
+def _titles(count: int, patterns: Sequence[str], rnd: random.Random) -> list[str]:
+    titles = []
+    for index in range(count):
+        kind = rnd.random()
+        if kind < 0.2:
+            titles.append(
+                "Security Intelligence Update for Microsoft Defender Antivirus - KB2267602 "
+                f"(Version 1.4{index}.0)"
+            )
+        elif kind < 0.25 and patterns:
+            # Matched by a KB pattern or one of the text patterns
+            titles.append(f"Update for Windows Server 2022 ({rnd.choice(patterns[:20])})")
+        else:
+            titles.append(
+                f"2025-{index % 12 + 1:02d} Cumulative Update for Windows Server 2022 for "
+                f"x64-based Systems (KB5{rnd.randint(100000, 999999)})"
+            )
+    return titles
+
+
+def _best_time(func: Callable[[], object], repeat: int) -> float:
+    timer = timeit.Timer(func)
+    number, _seconds = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def main(argv: Sequence[str]) -> int:
+    parser = argparse.ArgumentParser(
+        description="Time the ignore pattern strategies of the ms_win_update_v2 check plug-in."
+    )
+    parser.add_argument("--patterns", type=int, default=50, help="number of ignore patterns")
+    parser.add_argument("--titles", type=int, default=500, help="update titles per check call")
+    parser.add_argument("--seed", type=int, default=3, help="seed of the patterns and titles")
+    parser.add_argument("--repeat", type=int, default=5, help="timed repetitions, the best counts")
+    parser.add_argument("--plugin", type=Path, default=CHECK_PLUGIN, help="check plug-in file")
+    args = parser.parse_args(argv)
+
+    module = load_check_plugin(args.plugin)
+    rnd = random.Random(args.seed)
+    patterns = _patterns(args.patterns, rnd)
+    titles = _titles(args.titles, patterns, rnd)
+
+    compiled = [re.compile(pattern) for pattern in patterns]
+    combined = re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+    matcher = module._compile_ignore_patterns(tuple(patterns))
+
+    def compile_per_call() -> list[bool]:
+        regexes = [re.compile(pattern) for pattern in patterns]
+        return [any(regex.search(title) for regex in regexes) for title in titles]
+
+    def regex_loop() -> list[bool]:
+        return [any(regex.search(title) for regex in compiled) for title in titles]
+
+    def combined_regex() -> list[bool]:
+        return [combined.search(title) is not None for title in titles]
+
+    def current_matcher() -> list[bool]:
+        matcher_for_call = module._compile_ignore_patterns(tuple(patterns))
+        return [matcher_for_call(title) is not None for title in titles]
+
+    def verdict_cache() -> list[bool]:
+        return [module._ignore_verdict(matcher, title) is not None for title in titles]
+
+    strategies: list[tuple[str, Callable[[], list[bool]]]] = [
+        ("compile per call", compile_per_call),
+        ("regex loop", regex_loop),
+        ("combined regex", combined_regex),
+        ("current matcher", current_matcher),
+        ("verdict cache", verdict_cache),
+    ]
+    expected = compile_per_call()
+    for name, strategy in strategies:
+        assert strategy() == expected, f"{name} classifies the titles differently"
+
+    literal_count = sum(
+        1 for pattern in patterns if module._REGEX_SPECIAL_CHARS.isdisjoint(pattern)
+    )
+    print(
+        f"{len(patterns)} patterns ({literal_count} plain text) x {len(titles)} titles, "
+        f"{sum(expected)} ignored"
+    )
+    reference: Optional[float] = None
+    for name, strategy in strategies:
+        seconds = _best_time(strategy, args.repeat)
+        reference = reference or seconds
+        print(f"{name:<18} {seconds * 1000:8.3f} ms  {reference / seconds:6.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; py-indent-offset: 4; max-line-length: 100 -*-
+
+# Copyright (C) 2025  Christopher Pommer <cp.software@outlook.de>
+# Enhanced with SCCM support by Mario Fellner <mario.fellner@outlook.at>
+
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+####################################################################################################
+# BENCHMARK: Memory held by parsed sections of the Microsoft Windows Update check plug-in
+#
+# Parses the sections of a fleet of hosts and keeps them, as a Checkmk helper process keeps the
+# parsed sections of its hosts, and reports the growth of the resident set size (Linux only).
+# The updates are drawn from a fleet wide catalog, so the same KBs, titles and categories are
+# pending on many hosts.
+# Each check plug-in is measured in a fresh process. With --compare, an earlier version parses
+# the same sections in the legacy format, e.g. the version before the slotted classes:
+#
+#   git show 7c64b35~1:plugin/cmk_addons_plugins/windows/agent_based/ms_win_update_v2.py \
+#       > /tmp/ms_win_update_v2_old.py
+#   python3 tools/ms_win_update_v2_bench_memory.py --compare /tmp/ms_win_update_v2_old.py
+####################################################################################################
+
+import argparse
+import gc
+import os
+import sys
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from ms_win_update_v2_sections import (
+    CHECK_PLUGIN,
+    generate_section,
+    legacy_string_table,
+    load_check_plugin,
+    SectionMix,
+    string_table,
+)
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def _rss() -> int:
+    with open("/proc/self/statm", encoding="ascii") as statm:
+        return int(statm.read().split()[1]) * _PAGE_SIZE
+
+
+def _measure(path: str, hosts: int, mix: SectionMix, seed: int) -> tuple[int, int]:
+    """Parse and keep the sections of the hosts, return the RSS growth and the update count."""
+    module = load_check_plugin(Path(path))
+    updates = mix.update_count
+    # Check plug-ins before the tab separated format only parse the legacy one
+    probe = generate_section(0, seed, mix)
+    legacy = len(module.parse_ms_win_update_v2(string_table(probe)).updates) != updates
+    convert = legacy_string_table if legacy else string_table
+
+    gc.collect()
+    start = _rss()
+    sections = []
+    for host in range(hosts):
+        # The string table is dropped after parsing, as in Checkmk, so only what the parsed
+        # section references stays
+        sections.append(
+            module.parse_ms_win_update_v2(convert(generate_section(host, seed, mix)))
+        )
+        # The parse cache of the current check plug-in is bounded and not part of the sections
+        if (cache := getattr(module, "_PARSE_CACHE", None)) is not None:
+            cache.clear()
+    gc.collect()
+    return _rss() - start, sum(len(section.updates) for section in sections)
+
+
+def main(argv: Sequence[str]) -> int:
+    parser = argparse.ArgumentParser(
+        description="Measure the memory held by parsed ms_win_update_v2 sections."
+    )
+    parser.add_argument("--hosts", type=int, default=20000, help="number of hosts")
+    parser.add_argument("--updates", type=int, default=50, help="updates per host")
+    parser.add_argument(
+        "--catalog",
+        type=int,
+        default=300,
+        help="size of the fleet wide update catalog, 0 for unique updates on every host",
+    )
+    parser.add_argument("--seed", type=int, default=1, help="seed of the generated sections")
+    parser.add_argument("--plugin", type=Path, default=CHECK_PLUGIN, help="check plug-in file")
+    parser.add_argument("--compare", type=Path, help="earlier check plug-in file to compare with")
+    args = parser.parse_args(argv)
+
+    mix = SectionMix(update_count=args.updates, catalog_size=args.catalog or None)
+    print(
+        f"Hosts: {args.hosts}, updates per host: {args.updates}, "
+        f"catalog: {args.catalog or 'unique updates'}"
+    )
+    results = {}
+    for label, path in (("current", args.plugin), ("compared", args.compare)):
+        if path is None:
+            continue
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            growth, update_count = executor.submit(
+                _measure, str(path), args.hosts, mix, args.seed
+            ).result()
+        results[label] = growth
+        print(
+            f"{label:<9} {growth / 2**20:8.0f} MiB  {growth / max(update_count, 1):6.0f} B/update"
+            f"  ({path})"
+        )
+    if len(results) == 2:
+        print(f"Reduction: {(1 - results['current'] / results['compared']) * 100:.0f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; py-indent-offset: 4; max-line-length: 100 -*-
+
+# Copyright (C) 2025  Christopher Pommer <cp.software@outlook.de>
+# Enhanced with SCCM support by Mario Fellner <mario.fellner@outlook.at>
+
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+####################################################################################################
+# BENCHMARK: Parse function of the Microsoft Windows Update check plug-in
+#
+# Times parse_ms_win_update_v2 on synthetic sections with 0 to 50,000 updates, in the current and
+# in the legacy format. With --compare, an earlier version of the check plug-in parses the same
+# sections in the legacy format, e.g. the version before the single pass parser. The speedup is
+# relative to the current format, or to the legacy one if --plugin does not parse the current one.
+#
+#   git show e547772:plugin/cmk_addons_plugins/windows/agent_based/ms_win_update_v2.py \
+#       > /tmp/ms_win_update_v2_old.py
+#   python3 tools/ms_win_update_v2_bench_parse.py --compare /tmp/ms_win_update_v2_old.py
+####################################################################################################
+
+import argparse
+import sys
+import timeit
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Optional
+
+from ms_win_update_v2_sections import (
+    CHECK_PLUGIN,
+    generate_section,
+    legacy_string_table,
+    load_check_plugin,
+    SectionMix,
+    string_table,
+)
+
+
+def _cold_parse(module: ModuleType, table: list[list[str]]) -> Callable[[], Any]:
+    """Return a call of the parse function that does not benefit from earlier calls."""
+
+    def parse() -> Any:
+        # Caches of the current check plug-in, earlier versions have none
+        if (cache := getattr(module, "_PARSE_CACHE", None)) is not None:
+            cache.clear()
+            module._PARSE_CACHE_STATS["cached_updates"] = 0
+        if (parse_update_line := getattr(module, "_parse_update_line", None)) is not None:
+            parse_update_line.cache_clear()
+        return module.parse_ms_win_update_v2(table)
+
+    return parse
+
+
+def _best_time(func: Callable[[], Any], min_seconds: float, repeat: int) -> float:
+    """Return the fastest time of one call of func, like timeit."""
+    timer = timeit.Timer(func)
+    number, _seconds = timer.autorange(lambda number, seconds: None)
+    number = max(1, int(number * min_seconds / 0.2))
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def _format_time(seconds: float) -> str:
+    return f"{seconds * 1000:10.3f} ms"
+
+
+def main(argv: Sequence[str]) -> int:
+    parser = argparse.ArgumentParser(
+        description="Time the ms_win_update_v2 parse function on synthetic sections."
+    )
+    parser.add_argument(
+        "--updates",
+        type=lambda value: [int(count) for count in value.split(",")],
+        default=[0, 10, 100, 1000, 10000, 50000],
+        help="comma separated update counts of the sections (default: 0,10,...,50000)",
+    )
+    parser.add_argument("--seed", type=int, default=1, help="seed of the generated sections")
+    parser.add_argument("--repeat", type=int, default=5, help="timed repetitions, the best counts")
+    parser.add_argument(
+        "--min-time", type=float, default=0.2, help="minimum seconds per timed repetition"
+    )
+    parser.add_argument("--plugin", type=Path, default=CHECK_PLUGIN, help="check plug-in file")
+    parser.add_argument("--compare", type=Path, help="earlier check plug-in file to compare with")
+    args = parser.parse_args(argv)
+
+    module = load_check_plugin(args.plugin)
+    baseline: Optional[ModuleType] = (
+        load_check_plugin(args.compare, "ms_win_update_v2_baseline") if args.compare else None
+    )
+
+    header = f"{'updates':>8} {'current':>13} {'legacy format':>13} {'per update':>11}"
+    if baseline is not None:
+        header += f" {'compared':>13} {'speedup':>8}"
+    print(header)
+    for count in args.updates:
+        lines = generate_section(0, args.seed, SectionMix(update_count=count))
+        table = string_table(lines)
+        legacy_table = legacy_string_table(lines)
+
+        parse_legacy = _cold_parse(module, legacy_table)
+        assert len(parse_legacy().updates) == count
+        legacy_seconds = _best_time(parse_legacy, args.min_time, args.repeat)
+        # Check plug-ins before the tab separated format only parse the legacy one
+        parse = _cold_parse(module, table)
+        if len(parse().updates) == count:
+            seconds = _best_time(parse, args.min_time, args.repeat)
+            current = _format_time(seconds)
+        else:
+            seconds = legacy_seconds
+            current = f"{'-':>13}"
+        line = (
+            f"{count:>8} {current} {_format_time(legacy_seconds)} "
+            f"{seconds / max(count, 1) * 1e6:8.2f} us"
+        )
+        if baseline is not None:
+            parse_baseline = _cold_parse(baseline, legacy_table)
+            assert len(parse_baseline().updates) == count
+            baseline_seconds = _best_time(parse_baseline, args.min_time, args.repeat)
+            line += f" {_format_time(baseline_seconds)} {baseline_seconds / seconds:7.2f}x"
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; py-indent-offset: 4; max-line-length: 100 -*-
+
+# Copyright (C) 2025  Christopher Pommer <cp.software@outlook.de>
+# Enhanced with SCCM support by Mario Fellner <mario.fellner@outlook.at>
+
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+####################################################################################################
+# BENCHMARK: Value store of the pending update age
+#
+# Simulates one host over a long period: a fixed number of pending updates, of which a share is
+# installed and replaced by new updates every day, checked several times a day. Like Checkmk,
+# the value store is loaded with ast.literal_eval before each check and stored with repr
+# afterwards, around _check_pending_age of the check plug-in.
+#
+# Reported are, at the end of every reported period, the number of entries and the size of the
+# stored state, and the time of loading and storing it:
+#
+#   python3 tools/ms_win_update_v2_bench_pending_age.py --days 180 --pending 500 --replaced 10
+####################################################################################################
+
+import argparse
+import ast
+import random
+import sys
+import time
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+from ms_win_update_v2_sections import CHECK_PLUGIN, load_check_plugin
+
+_START_TIME = 1735689600.0
+
+
+def main(argv: Sequence[str]) -> int:
+    parser = argparse.ArgumentParser(
+        description="Simulate the value store of the ms_win_update_v2 pending update age."
+    )
+    parser.add_argument("--days", type=int, default=180, help="simulated days")
+    parser.add_argument("--pending", type=int, default=500, help="pending updates")
+    parser.add_argument(
+        "--replaced", type=float, default=10.0, help="percentage of the updates replaced per day"
+    )
+    parser.add_argument("--checks", type=int, default=4, help="checks per day")
+    parser.add_argument("--report", type=int, default=30, help="days between reported lines")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the replaced updates")
+    parser.add_argument("--plugin", type=Path, default=CHECK_PLUGIN, help="check plug-in file")
+    args = parser.parse_args(argv)
+
+    module = load_check_plugin(args.plugin)
+    rnd = random.Random(args.seed)
+    next_kb = 5_000_000
+
+    def new_update() -> Any:
+        nonlocal next_kb
+        next_kb += 1
+        return module.WindowsUpdate(
+            source=rnd.choice(("WindowsUpdate", "SCCM")),
+            title=f"{next_kb} Cumulative Update for Windows Server 2022",
+            kb=f"KB{next_kb}",
+        )
+
+    pending = [new_update() for _index in range(args.pending)]
+    replaced = round(args.pending * args.replaced / 100)
+    stored = repr({})
+    store_seconds = 0.0
+    checks = 0
+    print(
+        f"Pending updates: {args.pending}, replaced per day: {replaced}, "
+        f"checks per day: {args.checks}"
+    )
+    print(f"{'day':>5} {'entries':>8} {'stored':>10} {'load+store':>12}")
+    for day in range(1, args.days + 1):
+        for index in rnd.sample(range(len(pending)), replaced):
+            pending[index] = new_update()
+        for check in range(args.checks):
+            now = _START_TIME + (day * args.checks + check) * 86400 / args.checks
+            start = time.perf_counter()
+            value_store = ast.literal_eval(stored)
+            loaded = time.perf_counter()
+            list(module._check_pending_age({}, pending, value_store, now))
+            checked = time.perf_counter()
+            stored = repr(value_store)
+            store_seconds += time.perf_counter() - checked + loaded - start
+            checks += 1
+
+        if day % args.report == 0 or day == args.days:
+            print(
+                f"{day:>5} {len(value_store['pending_since']):>8} "
+                f"{len(stored) / 1024:>6.1f} KiB {store_seconds / checks * 1000:>9.3f} ms"
+            )
+            store_seconds = 0.0
+            checks = 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; py-indent-offset: 4; max-line-length: 100 -*-
+
+# Copyright (C) 2025  Christopher Pommer <cp.software@outlook.de>
+# Enhanced with SCCM support by Mario Fellner <mario.fellner@outlook.at>
+
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+####################################################################################################
+# BENCHMARK: Delta encoded update list
+#
+# Checks the main service of a fleet of hosts over several check cycles, once with the complete
+# update list in every agent output and once delta encoded: a full snapshot, then deltas adding
+# and removing a few updates. Like Checkmk, the value store of a host is loaded with
+# ast.literal_eval before the check and stored with repr afterwards.
+#
+# Reported are the size of the stored value store per host and the CPU time per host and check
+# cycle of parsing, of the check and of loading and storing the value store. The services per
+# source and classification are not available with the delta encoded update list and are not
+# checked.
+####################################################################################################
+
+import argparse
+import ast
+import sys
+import time
+from collections.abc import Sequence
+from pathlib import Path
+from types import ModuleType
+from typing import Any
+
+from ms_win_update_v2_sections import (
+    CHECK_PLUGIN,
+    generate_section,
+    load_check_plugin,
+    SectionMix,
+    string_table,
+)
+
+_SERVICE_ITEMS = (
+    "via Windows Update",
+    "via SCCM",
+    "Security",
+    "Critical",
+    "Definition",
+    "Driver",
+    "Feature Pack",
+)
+
+
+def _host_tables(
+    host: int, seed: int, mix: SectionMix, cycles: int, churn: int
+) -> tuple[list[list[list[str]]], list[list[list[str]]]]:
+    """Return the string tables of one host, with complete and with delta encoded update lists.
+
+    Each cycle removes the oldest churn updates and adds them again under new IDs. The delta
+    encoded tables start with a full snapshot.
+    """
+    lines = generate_section(host, seed, mix)
+    header = [line for line in lines if not line.startswith("UPDATE\t")]
+    rows = {str(index): line for index, line in enumerate(lines) if line.startswith("UPDATE\t")}
+    next_id = len(lines)
+    complete = [string_table(header + list(rows.values()))]
+    delta = [
+        string_table(
+            header
+            + ["SNAPSHOT\tbench\t0\tfull"]
+            + [f"{row}\tID:{update_id}" for update_id, row in rows.items()]
+        )
+    ]
+    for sequence in range(1, cycles):
+        removed = list(rows)[:churn]
+        added = {}
+        for update_id in removed:
+            added[str(next_id)] = rows.pop(update_id)
+            next_id += 1
+        rows.update(added)
+        complete.append(string_table(header + list(rows.values())))
+        delta.append(
+            string_table(
+                header
+                + [f"SNAPSHOT\tbench\t{sequence}\tdelta"]
+                + [f"{row}\tID:{update_id}" for update_id, row in added.items()]
+                + [f"UPDATE_REMOVED\t{update_id}" for update_id in removed]
+            )
+        )
+    return complete, delta
+
+
+def _measure(
+    module: ModuleType, host_tables: Sequence[list[list[list[str]]]]
+) -> tuple[float, float, float, float]:
+    """Parse and check all cycles of all hosts.
+
+    Returns the mean size of the stored value store per host in bytes, and the CPU seconds per
+    host and cycle of parsing, of the check and of loading and storing the value store.
+    """
+    params = dict(module.check_plugin_ms_win_update_v2.check_default_parameters)
+    current: dict[str, Any] = {"value_store": {}}
+    module.get_value_store = lambda: current["value_store"]
+
+    cycles = len(host_tables[0])
+    stored = [repr({}) for _tables in host_tables]
+    parse_seconds = check_seconds = store_seconds = 0.0
+    for cycle in range(cycles):
+        for host, tables in enumerate(host_tables):
+            start = time.process_time()
+            section = module.parse_ms_win_update_v2(tables[cycle])
+            parsed = time.process_time()
+            value_stores = ast.literal_eval(stored[host])
+            loaded = time.process_time()
+
+            current["value_store"] = value_stores.setdefault(("ms_win_update_v2", None), {})
+            results = list(module.check_ms_win_update_v2(params, section))
+
+            checked = time.process_time()
+            stored[host] = repr(value_stores)
+            store_seconds += time.process_time() - checked + loaded - parsed
+            check_seconds += checked - loaded
+            parse_seconds += parsed - start
+            assert module.Result(
+                state=module.State.UNKNOWN, summary=module._SNAPSHOT_GAP_MESSAGE
+            ) not in results
+
+    runs = len(host_tables) * cycles
+    return (
+        sum(len(text) for text in stored) / len(stored),
+        parse_seconds / runs,
+        check_seconds / runs,
+        store_seconds / runs,
+    )
+
+
+def main(argv: Sequence[str]) -> int:
+    parser = argparse.ArgumentParser(
+        description="Measure the value store of the delta encoded ms_win_update_v2 update list."
+    )
+    parser.add_argument("--hosts", type=int, default=100, help="number of hosts")
+    parser.add_argument("--updates", type=int, default=200, help="updates per host")
+    parser.add_argument("--cycles", type=int, default=10, help="check cycles, the first is full")
+    parser.add_argument("--churn", type=int, default=5, help="updates replaced per delta")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the generated sections")
+    parser.add_argument("--plugin", type=Path, default=CHECK_PLUGIN, help="check plug-in file")
+    args = parser.parse_args(argv)
+
+    mix = SectionMix(update_count=args.updates)
+    complete, delta = zip(
+        *(
+            _host_tables(host, args.seed, mix, args.cycles, args.churn)
+            for host in range(args.hosts)
+        )
+    )
+    module = load_check_plugin(args.plugin, "ms_win_update_v2")
+    print(
+        f"Hosts: {args.hosts}, updates per host: {args.updates}, cycles: {args.cycles}, "
+        f"churn: {args.churn}"
+    )
+    print(
+        f"{'':<9} {'stored':>12} {'parse':>12} {'check':>12} {'load+store':>12} {'total':>12}"
+    )
+    for label, host_tables in (("complete", complete), ("delta", delta)):
+        size, *seconds = _measure(module, host_tables)
+        print(
+            f"{label:<9} {size / 1024:8.1f} KiB"
+            + "".join(f" {value * 1000:9.3f} ms" for value in (*seconds, sum(seconds)))
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; py-indent-offset: 4; max-line-length: 100 -*-
+
+# Copyright (C) 2025  Christopher Pommer <cp.software@outlook.de>
+# Enhanced with SCCM support by Mario Fellner <mario.fellner@outlook.at>
+
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+####################################################################################################
+# LOAD TEST: Microsoft Windows Update with SCCM Support
+#
+# This tool estimates the cost of the check plug-in for a fleet of Windows hosts. It generates
+# synthetic agent sections in the format printed by ms_win_update_v2.ps1 and runs the parse and
+# check functions for each host in a process pool.
+#
+# As site user of a Checkmk site, the real cmk.agent_based.v2 is used. Elsewhere, the minimal
+# stub in tools/stubs is put on the module search path instead:
+#
+#   python3 tools/ms_win_update_v2_load.py --hosts 20000
+####################################################################################################
+
+import argparse
+import os
+import resource
+import statistics
+import sys
+import time
+from collections.abc import Iterator, Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from types import ModuleType
+from typing import Any
+
+from ms_win_update_v2_sections import (
+    CHECK_PLUGIN,
+    generate_section,
+    IGNORED_PATTERNS,
+    load_check_plugin,
+    SectionMix,
+    string_table,
+)
+
+
+_MODULE: ModuleType | None = None
+
+
+def _run_hosts(
+    hosts: Sequence[int], options: Mapping[str, Any]
+) -> tuple[list[float], list[float], int]:
+    """Parse and check the sections of the given hosts in a worker process.
+
+    Returns the CPU times and latencies per host in seconds and the peak RSS of the worker in
+    kilobytes.
+    """
+    global _MODULE
+    if _MODULE is None:
+        _MODULE = load_check_plugin(Path(options["plugin"]))
+    module = _MODULE
+
+    params = {
+        **module.check_plugin_ms_win_update_v2.check_default_parameters,
+        "ignored_update_patterns": list(IGNORED_PATTERNS),
+    }
+    mix = SectionMix(mean_updates=options["mean_updates"], ignore_rate=options["ignore_rate"])
+    cpu_times = []
+    latencies = []
+    for host in hosts:
+        host_string_table = string_table(
+            generate_section(host, options["seed"], mix, options["now"])
+        )
+        # Each host has its own value store, outside of Checkmk there is no check context
+        value_store: dict[str, Any] = {}
+        module.get_value_store = lambda: value_store
+
+        for _cycle in range(options["cycles"]):
+            cpu_start = time.process_time()
+            wall_start = time.perf_counter()
+            section = module.parse_ms_win_update_v2(host_string_table)
+            for _result in module.check_ms_win_update_v2(params, section):
+                pass
+            latencies.append(time.perf_counter() - wall_start)
+            cpu_times.append(time.process_time() - cpu_start)
+
+    return cpu_times, latencies, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _chunks(hosts: int, size: int) -> Iterator[range]:
+    for start in range(0, hosts, size):
+        yield range(start, min(start + size, hosts))
+
+
+def _percentile(values: Sequence[float], percent: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def main(argv: Sequence[str]) -> int:
+    parser = argparse.ArgumentParser(
+        description="Estimate the cost of the ms_win_update_v2 check plug-in for a fleet of hosts."
+    )
+    parser.add_argument("--hosts", type=int, default=20000, help="number of hosts")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the generated sections")
+    parser.add_argument(
+        "--mean-updates", type=float, default=15.0, help="median number of updates per host"
+    )
+    parser.add_argument(
+        "--ignore-rate",
+        type=float,
+        default=0.2,
+        help="share of updates matching the ignored update patterns",
+    )
+    parser.add_argument(
+        "--cycles",
+        type=int,
+        default=1,
+        help="check cycles per host; later cycles reuse the parsed section",
+    )
+    parser.add_argument(
+        "--processes", type=int, default=os.cpu_count(), help="number of worker processes"
+    )
+    parser.add_argument(
+        "--now",
+        type=int,
+        help="reference time of the generated sections (Unix timestamp, default: now)",
+    )
+    parser.add_argument("--plugin", type=Path, default=CHECK_PLUGIN, help="check plug-in file")
+    args = parser.parse_args(argv)
+
+    options = {
+        "plugin": str(args.plugin),
+        "seed": args.seed,
+        "mean_updates": args.mean_updates,
+        "ignore_rate": args.ignore_rate,
+        "cycles": args.cycles,
+        # One reference time for all worker processes
+        "now": int(time.time()) if args.now is None else args.now,
+    }
+    chunk_size = max(1, args.hosts // (args.processes * 8))
+
+    cpu_times: list[float] = []
+    latencies: list[float] = []
+    peak_rss = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.processes) as executor:
+        futures = [
+            executor.submit(_run_hosts, chunk, options)
+            for chunk in _chunks(args.hosts, chunk_size)
+        ]
+        for future in futures:
+            chunk_cpu_times, chunk_latencies, rss = future.result()
+            cpu_times += chunk_cpu_times
+            latencies += chunk_latencies
+            peak_rss = max(peak_rss, rss)
+    elapsed = time.perf_counter() - start
+
+    cpu_times.sort()
+    latencies.sort()
+    print(f"Hosts: {args.hosts}, check cycles: {len(latencies)}, processes: {args.processes}")
+    print(f"Elapsed: {elapsed:.2f} s ({len(latencies) / elapsed:.0f} checks/s)")
+    print(
+        f"CPU time per check: total {sum(cpu_times):.2f} s, "
+        f"mean {statistics.fmean(cpu_times) * 1000:.3f} ms, "
+        f"p50 {_percentile(cpu_times, 50) * 1000:.3f} ms, "
+        f"p99 {_percentile(cpu_times, 99) * 1000:.3f} ms"
+    )
+    print(
+        f"Latency per check: p50 {_percentile(latencies, 50) * 1000:.3f} ms, "
+        f"p99 {_percentile(latencies, 99) * 1000:.3f} ms, "
+        f"max {latencies[-1] * 1000:.3f} ms"
+    )
+    print(f"Peak RSS per worker process: {peak_rss / 1024:.1f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
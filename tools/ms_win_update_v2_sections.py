@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; py-indent-offset: 4; max-line-length: 100 -*-
+
+# Copyright (C) 2025  Christopher Pommer <cp.software@outlook.de>
+# Enhanced with SCCM support by Mario Fellner <mario.fellner@outlook.at>
+
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+####################################################################################################
+# SYNTHETIC SECTIONS: Microsoft Windows Update with SCCM Support
+#
+# Generates agent sections in the format printed by ms_win_update_v2.ps1 and loads the check
+# plug-in, for the load test, the benchmarks and the benchmark suite in tests/. Sections can
+# be converted to the legacy format, to compare with earlier versions of the check plug-in.
+####################################################################################################
+
+import importlib.util
+import math
+import random
+import sys
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from types import ModuleType
+from typing import Optional
+
+CHECK_PLUGIN = (
+    Path(__file__).resolve().parent.parent
+    / "plugin/cmk_addons_plugins/windows/agent_based/ms_win_update_v2.py"
+)
+_API_STUBS = Path(__file__).resolve().parent / "stubs"
+
+_TITLES = (
+    "{year}-{month:02d} Cumulative Update for Windows Server 2022 for x64-based Systems",
+    "{year}-{month:02d} Cumulative Update for .NET Framework 3.5, 4.8 and 4.8.1 for Microsoft "
+    "server operating system version 21H2 for x64",
+    "Security Update for Microsoft Office LTSC 2021 (64-bit Edition)",
+    "Servicing Stack Update for Windows Server 2019 for x64-based Systems",
+    "Intel - System - 10.1.19222.8341",
+    "Windows Malicious Software Removal Tool x64 - v5.{month}",
+    "Microsoft Edge-Stable Channel Version {year}.{month} Update for x64 based Editions",
+    "Feature update to Windows 11, version 23H2",
+)
+_IGNORED_TITLE = "Security Intelligence Update for Microsoft Defender Antivirus - KB2267602"
+IGNORED_PATTERNS = ("Security Intelligence Update", "Malicious Software Removal")
+_CATEGORIES = (
+    "Security Updates, Windows Server 2022",
+    "Critical Updates, Windows Server 2022",
+    "Updates, Windows Server 2022",
+    "Drivers",
+    "Feature Packs",
+)
+# Classes queried by the SCCM collector, in the order of the queries
+_SCCM_QUERY_CLASSES = (
+    "CCM_SoftwareUpdate",
+    "CCM_InstalledComponent",
+    "CCM_PolicyAgent_Configuration",
+)
+
+_LEGACY_HEADERS = {
+    "SCCM_CLIENT_STATUS",
+    "SCCM_CLIENT_VERSION",
+    "SCCM_LAST_POLICY_UPDATE",
+    "WINDOWS_UPDATE_COUNT",
+    "SCCM_UPDATE_COUNT",
+    "TOTAL_UPDATE_COUNT",
+}
+
+
+@dataclass(frozen=True)
+class SectionMix:
+    """Composition of the generated sections.
+
+    Without update_count, the number of updates is log-normally distributed around
+    mean_updates, as most hosts have a few pending updates and some (badly maintained or with
+    large SCCM catalogs) have many. Sizes are log-normally distributed as well.
+    """
+
+    mean_updates: float = 15.0
+    update_count: Optional[int] = None
+    # Share of hosts with an SCCM client, and of the updates coming from SCCM on those hosts
+    sccm_host_share: float = 0.7
+    sccm_update_share: float = 0.5
+    # Share of updates matching IGNORED_PATTERNS
+    ignore_rate: float = 0.2
+    severities: Sequence[str] = ("Critical", "Important", "Moderate", "Low", "")
+    size_median_mb: float = 20.0
+    size_sigma: float = 1.5
+    # Without catalog_size, every update is unique. With it, the updates are drawn from a fleet
+    # wide catalog of that many updates, each with a fixed title, KB, severity, category and size,
+    # as the same monthly updates are pending on many hosts.
+    catalog_size: Optional[int] = None
+
+
+def _timestamp(value: float) -> str:
+    """Format a time like ConvertTo-AgentTimestamp of the agent plug-in."""
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(value))
+
+
+def _seconds(value: float) -> str:
+    """Format a duration like Stopwatch.Elapsed.TotalSeconds printed by the agent plug-in."""
+    return f"{value:.7f}"
+
+
+def generate_section(
+    host: int,
+    seed: int,
+    mix: SectionMix = SectionMix(),
+    now: Optional[int] = None,
+) -> list[str]:
+    """Generate the lines of one agent section, without the section header.
+
+    The lines are printed like by the agent plug-in with both sources enabled. Timestamps are
+    relative to now (default: the current time), so the data is as old as after an asynchronous
+    agent run. The section only depends on the arguments.
+    """
+    if now is None:
+        now = int(time.time())
+    rnd = random.Random(seed * 1_000_003 + host)
+    if mix.update_count is None:
+        update_count = int(rnd.lognormvariate(math.log(max(mix.mean_updates, 1.0)), 1.0))
+    else:
+        update_count = mix.update_count
+    sccm = rnd.random() < mix.sccm_host_share
+    lines = [
+        "FORMAT_VERSION\t2",
+        # A reused Windows Update search result is older than the SCCM data
+        f"SOURCE_STATUS\tWindowsUpdate\tok\t{now - rnd.randrange(14400)}",
+        f"SOURCE_STATUS\tSCCM\tok\t{now - rnd.randrange(300)}",
+    ]
+    runtimes = {"wu": rnd.uniform(5.0, 120.0)}
+    if sccm:
+        durations = [rnd.uniform(0.1, 5.0), rnd.uniform(0.05, 0.5), rnd.uniform(0.05, 0.5)]
+        runtimes["sccm_updates"] = durations[0] + rnd.uniform(0.0, 0.5)
+        runtimes["sccm_client"] = sum(durations[1:]) + rnd.uniform(0.0, 0.2)
+        lines += [
+            "SCCM_CLIENT_STATUS\tRunning",
+            "SCCM_CLIENT_VERSION\t5.00.9122.1000",
+            f"SCCM_LAST_POLICY_UPDATE\t{_timestamp(now - rnd.randrange(86400))}",
+        ] + [
+            f"SCCM_QUERY_DURATION\t{class_name}\t{_seconds(duration)}"
+            for class_name, duration in zip(_SCCM_QUERY_CLASSES, durations)
+        ]
+    else:
+        # The agent plug-in reports SCCM without a client, too
+        lines += [
+            "SCCM_CLIENT_STATUS\tNotInstalled",
+            "SCCM_CLIENT_VERSION\t",
+            "SCCM_LAST_POLICY_UPDATE\t",
+        ]
+
+    size_mu = math.log(mix.size_median_mb)
+    counts = {"WindowsUpdate": 0, "SCCM": 0}
+    for index in range(update_count):
+        source = "SCCM" if sccm and rnd.random() < mix.sccm_update_share else "WindowsUpdate"
+        counts[source] += 1
+        if mix.catalog_size:
+            entry_index = rnd.randrange(mix.catalog_size)
+            entry = random.Random(entry_index)
+        else:
+            entry_index = index
+            entry = rnd
+        if entry.random() < mix.ignore_rate:
+            title = _IGNORED_TITLE
+        else:
+            title = entry.choice(_TITLES).format(year=2025, month=entry.randint(1, 12))
+        kb = 5_000_000 + entry.randrange(100_000) * 10 + entry_index % 10
+        size = entry.lognormvariate(size_mu, mix.size_sigma)
+        fields = ["UPDATE", source, title]
+        # Empty and zero values are left out by the agent plug-in
+        if source == "WindowsUpdate":
+            fields.append(f"KB:KB{kb}")
+            if severity := entry.choice(mix.severities):
+                fields.append(f"SEVERITY:{severity}")
+            fields += [
+                f"CATEGORIES:{entry.choice(_CATEGORIES)}",
+                f"SIZE:{size:.2f}MB",
+                f"DOWNLOADED:{rnd.choice(('True', 'False'))}",
+                f"REBOOT:{rnd.choice(('True', 'False'))}",
+            ]
+        else:
+            # EvaluationState 6 = Downloaded
+            evaluation_state = rnd.choice((1, 2, 6, 8))
+            fields += [
+                f"KB:{kb}",
+                f"SIZE:{size:.2f}MB",
+                f"DOWNLOADED:{evaluation_state == 6}",
+                f"EVAL_STATE:{evaluation_state}",
+            ]
+            if rnd.random() < 0.8:
+                fields.append(f"DEADLINE:{_timestamp(now + rnd.randint(-30, 30) * 86400)}")
+            if compliance_state := rnd.choice((0, 2)):
+                fields.append(f"COMPLIANCE:{compliance_state}")
+        lines.append("\t".join(fields))
+
+    # The sources are collected concurrently, so the slowest one determines the total runtime
+    sccm_runtime = runtimes.get("sccm_updates", 0.0) + runtimes.get("sccm_client", 0.0)
+    total_runtime = max(runtimes["wu"], sccm_runtime) + rnd.uniform(0.5, 3.0)
+    lines += [
+        f"WINDOWS_UPDATE_COUNT\t{counts['WindowsUpdate']}",
+        f"SCCM_UPDATE_COUNT\t{counts['SCCM']}",
+        f"TOTAL_UPDATE_COUNT\t{update_count}",
+    ] + [f"AGENT_RUNTIME\t{phase}\t{_seconds(runtime)}" for phase, runtime in runtimes.items()]
+    lines.append(f"AGENT_RUNTIME\ttotal\t{_seconds(total_runtime)}")
+    return lines
+
+
+def string_table(lines: Sequence[str]) -> list[list[str]]:
+    """Split the lines like Checkmk does for a section with sep(9)."""
+    return [line.split("\t") for line in lines]
+
+
+def legacy_string_table(lines: Sequence[str]) -> list[list[str]]:
+    """Convert the lines to the legacy format and split them at whitespace, as before sep(9).
+
+    Header lines become "KEY:value" and update lines "UPDATE|Source|Title|KEY:value|...". Lines
+    the legacy agent plug-in did not print are dropped.
+    """
+    legacy = []
+    for line in lines:
+        fields = line.split("\t")
+        if fields[0] == "UPDATE":
+            legacy.append("|".join(fields))
+        elif fields[0] in _LEGACY_HEADERS:
+            legacy.append(f"{fields[0]}:{fields[1]}")
+    return [line.split() for line in legacy]
+
+
+def load_check_plugin(path: Path = CHECK_PLUGIN, name: str = "ms_win_update_v2") -> ModuleType:
+    """Load a check plug-in file, with the API stub if cmk.agent_based.v2 is not available."""
+    try:
+        import cmk.agent_based.v2  # pylint: disable=import-outside-toplevel,unused-import
+    except ImportError:
+        if str(_API_STUBS) not in sys.path:
+            sys.path.insert(0, str(_API_STUBS))
+    spec = importlib.util.spec_from_file_location(name, path)
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
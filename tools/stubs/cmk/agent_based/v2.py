@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8; py-indent-offset: 4; max-line-length: 100 -*-
+
+# Copyright (C) 2025  Christopher Pommer <cp.software@outlook.de>
+# Enhanced with SCCM support by Mario Fellner <mario.fellner@outlook.at>
+
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+####################################################################################################
+# STUB: cmk.agent_based.v2
+#
+# Minimal stand-in for the Checkmk agent based API, so the tools can load the check plug-ins
+# outside of a Checkmk site. It only provides what the ms_win_update_v2 check plug-ins use, with
+# the same signatures. Rendering and the texts of check_levels are simplified.
+####################################################################################################
+
+import enum
+import time
+from collections.abc import Callable, Iterable, Mapping, MutableMapping
+from dataclasses import dataclass
+from typing import Any, NamedTuple, Optional, Union
+
+
+class State(enum.Enum):
+    OK = 0
+    WARN = 1
+    CRIT = 2
+    UNKNOWN = 3
+
+    @classmethod
+    def worst(cls, *states: "State") -> "State":
+        # CRIT is worse than UNKNOWN
+        return max(states, key=lambda state: (0, 1, 3, 2)[state.value])
+
+
+class Result(NamedTuple("_ResultTuple", [("state", State), ("summary", str), ("details", str)])):
+    def __new__(
+        cls,
+        *,
+        state: State,
+        summary: Optional[str] = None,
+        notice: Optional[str] = None,
+        details: Optional[str] = None,
+    ) -> "Result":
+        if (summary is None) == (notice is None):
+            raise TypeError("Exactly one of 'summary' or 'notice' must be given")
+        text = summary if summary is not None else notice
+        assert text is not None
+        return super().__new__(cls, state, summary or "", details or text)
+
+
+class Metric(NamedTuple):
+    name: str
+    value: float
+    levels: Optional[tuple[Optional[float], Optional[float]]] = None
+    boundaries: Optional[tuple[Optional[float], Optional[float]]] = None
+
+
+class Service(NamedTuple):
+    item: Optional[str] = None
+    parameters: Optional[Mapping[str, Any]] = None
+    labels: Optional[list[Any]] = None
+
+
+StringTable = list[list[str]]
+CheckResult = Iterable[Union[Result, Metric]]
+DiscoveryResult = Iterable[Service]
+
+
+@dataclass(frozen=True)
+class AgentSection:
+    name: str
+    parse_function: Callable[[StringTable], Any]
+    parsed_section_name: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class CheckPlugin:
+    name: str
+    service_name: str
+    discovery_function: Callable[..., DiscoveryResult]
+    check_function: Callable[..., CheckResult]
+    sections: Optional[list[str]] = None
+    discovery_default_parameters: Optional[Mapping[str, Any]] = None
+    discovery_ruleset_name: Optional[str] = None
+    check_default_parameters: Optional[Mapping[str, Any]] = None
+    check_ruleset_name: Optional[str] = None
+    cluster_check_function: Optional[Callable[..., CheckResult]] = None
+
+
+class render:  # pylint: disable=invalid-name
+    @staticmethod
+    def timespan(seconds: float) -> str:
+        for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+            if abs(seconds) >= size:
+                return f"{seconds / size:.1f} {unit}"
+        return f"{seconds:.2f} s"
+
+    @staticmethod
+    def datetime(epoch: float) -> str:
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(epoch))
+
+    @staticmethod
+    def date(epoch: float) -> str:
+        return time.strftime("%Y-%m-%d", time.localtime(epoch))
+
+
+# One value store for everything. Tools replace get_value_store of the loaded plug-in module to
+# keep a value store per host or service.
+_VALUE_STORE: dict[str, Any] = {}
+
+
+def get_value_store() -> MutableMapping[str, Any]:
+    return _VALUE_STORE
+
+
+def _fixed_levels(levels: Any) -> Optional[tuple[float, float]]:
+    # Levels of SimpleLevels form specs: ("fixed", (warn, crit)) or ("no_levels", None)
+    if levels is None or levels[0] != "fixed":
+        return None
+    return levels[1]
+
+
+def check_levels(
+    value: float,
+    *,
+    levels_upper: Any = None,
+    levels_lower: Any = None,
+    metric_name: Optional[str] = None,
+    render_func: Optional[Callable[[float], str]] = None,
+    label: Optional[str] = None,
+    boundaries: Optional[tuple[Optional[float], Optional[float]]] = None,
+    notice_only: bool = False,
+) -> CheckResult:
+    render_value = render_func or (lambda number: f"{number:.2f}")
+    state = State.OK
+    levels_text = ""
+    if (upper := _fixed_levels(levels_upper)) is not None and value >= upper[0]:
+        state = State.CRIT if value >= upper[1] else State.WARN
+        levels_text = f" (warn/crit at {render_value(upper[0])}/{render_value(upper[1])})"
+    elif (lower := _fixed_levels(levels_lower)) is not None and value < lower[0]:
+        state = State.CRIT if value < lower[1] else State.WARN
+        levels_text = f" (warn/crit below {render_value(lower[0])}/{render_value(lower[1])})"
+
+    text = f"{label}: {render_value(value)}" if label else render_value(value)
+    text += levels_text
+    if notice_only:
+        yield Result(state=state, notice=text)
+    else:
+        yield Result(state=state, summary=text)
+
+    if metric_name:
+        yield Metric(metric_name, value, levels=_fixed_levels(levels_upper), boundaries=boundaries)